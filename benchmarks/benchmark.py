@@ -0,0 +1,351 @@
+"""Benchmarks for the hot paths of Proton Mail Tray.
+
+Run from the repository root:
+
+    python benchmarks/benchmark.py --output bench.json
+    python benchmarks/benchmark.py --output new.json --compare bench.json
+
+Proton Mail is replaced by a stub shell script named 'Proton Mail Beta', and the tray runs with the offscreen Qt
+platform, so no display or Proton Mail install is needed.
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Callable, Dict, List, Optional
+
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+base_path = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, base_path)
+
+import psutil
+
+from proton_mail_tray.control import send_command
+from proton_mail_tray.utils import (is_proton_mail_running, process_cache,
+                                    terminate_process)
+
+STUB_SCRIPT = "#!/bin/sh\ntrap 'exit 0' TERM\nwhile :; do sleep 0.1; done\n"
+
+
+def summarize(times: List[float]) -> Dict[str, float]:
+    """Summarize timings in seconds as milliseconds.
+
+    Args:
+        times (list): The timings in seconds.
+
+    Returns:
+        dict: The number of runs and the min, median, p95 and max in milliseconds.
+    """
+    ordered = sorted(times)
+    return {
+        'runs': len(ordered),
+        'min_ms': round(ordered[0] * 1000, 3),
+        'median_ms': round(statistics.median(ordered) * 1000, 3),
+        'p95_ms': round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))] * 1000, 3),
+        'max_ms': round(ordered[-1] * 1000, 3),
+    }
+
+
+def time_calls(function: Callable[[], object], runs: int, setup: Callable[[], object] = lambda: None) -> List[float]:
+    """Time repeated calls of a function.
+
+    Args:
+        function (callable): The function to time.
+        runs (int): The number of calls.
+        setup (callable): Called before each call, outside the timing.
+
+    Returns:
+        list: The time of each call in seconds.
+    """
+    times = []
+    for _ in range(runs):
+        setup()
+        start = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start)
+    return times
+
+
+def make_stub(directory: str) -> str:
+    """Write the stub Proton Mail executable.
+
+    Args:
+        directory (str): The directory to write it to.
+
+    Returns:
+        str: The path to the stub.
+    """
+    path = os.path.join(directory, 'Proton Mail Beta')
+    with open(path, 'w') as f:
+        f.write(STUB_SCRIPT)
+    os.chmod(path, 0o755)
+    return path
+
+
+def kill_all(processes: List[subprocess.Popen]) -> None:
+    """Kill and reap processes.
+
+    Args:
+        processes (list): The processes.
+    """
+    for process in processes:
+        process.kill()
+    for process in processes:
+        process.wait()
+
+
+def bench_scan(stub: str, process_counts: List[int], runs: int) -> Dict[str, dict]:
+    """Measure is_proton_mail_running with a growing number of unrelated processes.
+
+    Args:
+        stub (str): The path to the stub Proton Mail.
+        process_counts (list): The numbers of synthetic sleeper processes to add.
+        runs (int): The number of calls per measurement.
+
+    Returns:
+        dict: The cold (full scan) and cached timings for each process count.
+    """
+    results = {}
+    proton_mail = subprocess.Popen([stub])
+    sleepers = []
+    try:
+        for count in process_counts:
+            while len(sleepers) < count:
+                sleepers.append(subprocess.Popen(['sleep', '600']))
+            total = len(psutil.pids())
+            cold = time_calls(is_proton_mail_running, runs, setup=process_cache.invalidate)
+            cached = time_calls(is_proton_mail_running, runs)
+            assert is_proton_mail_running() == proton_mail.pid
+            results[str(count)] = {'total_processes': total, 'cold': summarize(cold), 'cached': summarize(cached)}
+            print(f"scan with {total} processes: cold {results[str(count)]['cold']['median_ms']} ms, "
+                  f"cached {results[str(count)]['cached']['median_ms']} ms")
+    finally:
+        kill_all(sleepers + [proton_mail])
+        process_cache.invalidate()
+    return results
+
+
+def bench_terminate(children: int, runs: int) -> Dict[str, dict]:
+    """Measure terminate_process on a stub process tree.
+
+    Args:
+        children (int): The number of children in the tree.
+        runs (int): The number of trees to terminate.
+
+    Returns:
+        dict: The timings for a tree that handles SIGTERM and one that ignores it.
+    """
+    results = {}
+    scripts = {
+        'graceful': ' & '.join(['sleep 600'] * children) + ' & wait',
+        'ignores_term': "trap '' TERM; " + ' & '.join(['sleep 600'] * children) + ' & wait',
+    }
+    for name, script in scripts.items():
+        times = []
+        for _ in range(runs):
+            process = subprocess.Popen(['sh', '-c', script])
+            root = psutil.Process(process.pid)
+            deadline = time.monotonic() + 5
+            while len(root.children()) < children and time.monotonic() < deadline:
+                time.sleep(0.01)
+            report = terminate_process(root, timeout=1)
+            times.append(report.elapsed)
+            process.wait()
+        results[name] = summarize(times)
+        print(f"terminate {name} tree of {children + 1}: {results[name]['median_ms']} ms")
+    return results
+
+
+def bench_startup(stub: str, runs: int, executable: Optional[str] = None) -> Dict[str, dict]:
+    """Measure cold startup of the tray until it answers on its control socket, and the command round trip.
+
+    Each run uses fresh XDG directories, so no config, cache or running instance is shared.
+
+    Args:
+        stub (str): The path to the stub Proton Mail.
+        runs (int): The number of startups.
+        executable (str, optional): A built executable to start instead of the source tree.
+
+    Returns:
+        dict: The startup and --status round trip timings.
+    """
+    startup, round_trip = [], []
+    for _ in range(runs):
+        with tempfile.TemporaryDirectory() as xdg:
+            env = {**os.environ, 'PYTHONPATH': base_path}
+            for variable in ('XDG_CONFIG_HOME', 'XDG_CACHE_HOME', 'XDG_STATE_HOME', 'XDG_RUNTIME_DIR'):
+                env[variable] = os.path.join(xdg, variable.lower())
+                os.makedirs(env[variable])
+            socket_path = os.path.join(env['XDG_RUNTIME_DIR'], 'proton-mail-tray.sock')
+
+            command = [executable] if executable else [sys.executable, '-m', 'proton_mail_tray.cli']
+            start = time.perf_counter()
+            process = subprocess.Popen(command + ['--proton-mail-path', stub],
+                                       cwd=base_path, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+            try:
+                while send_command(socket_path, 'ping', timeout=1) is None:
+                    if process.poll() is not None or time.perf_counter() - start > 30:
+                        raise RuntimeError(f"Tray did not start (exit code {process.poll()})")
+                    time.sleep(0.005)
+                startup.append(time.perf_counter() - start)
+                round_trip += time_calls(lambda: send_command(socket_path, 'status'), 10)
+                send_command(socket_path, 'quit')
+                process.wait(timeout=10)
+            finally:
+                if process.poll() is None:
+                    process.kill()
+                    process.wait()
+    results = {'startup': summarize(startup), 'status_round_trip': summarize(round_trip)}
+    label = f"startup of {executable}" if executable else "startup"
+    print(f"{label}: {results['startup']['median_ms']} ms, "
+          f"--status round trip: {results['status_round_trip']['median_ms']} ms")
+    return results
+
+
+def bench_toggle(stub: str, runs: int) -> Dict[str, dict]:
+    """Measure end-to-end open and close latency of a tray click.
+
+    Args:
+        stub (str): The path to the stub Proton Mail.
+        runs (int): The number of open/close cycles.
+
+    Returns:
+        dict: The timings from click to running and from click to stopped.
+    """
+    from PySide6.QtCore import QEventLoop, QTimer
+
+    from proton_mail_tray.app import ProtonMailTray
+    from proton_mail_tray.lifecycle import LifecycleState
+    from proton_mail_tray.targets import load_targets
+
+    def process_events_until(predicate, timeout: float = 10) -> None:
+        deadline = time.monotonic() + timeout
+        while not predicate():
+            if time.monotonic() > deadline:
+                raise RuntimeError("Timed out waiting for the tray")
+            loop = QEventLoop()
+            timer = QTimer()
+            timer.timeout.connect(loop.quit)
+            timer.start(1)
+            loop.exec()
+            timer.stop()
+
+    paths = {'icon_path': os.path.join(base_path, 'resources', 'icon', 'proton-mail.png'), 'proton_mail_path': stub}
+    targets = {key: target.with_path(stub) for key, target in load_targets({}).items()}
+    app = ProtonMailTray([], path_dict=paths, targets=targets)
+    process_events_until(lambda: app.ready and not app.lifecycle.busy)
+
+    open_times, close_times = [], []
+    try:
+        for _ in range(runs):
+            start = time.perf_counter()
+            app._on_tray_icon_activated()
+            process_events_until(lambda: app.lifecycle.state == LifecycleState.RUNNING and not app.lifecycle.busy)
+            open_times.append(time.perf_counter() - start)
+
+            start = time.perf_counter()
+            app._on_tray_icon_activated()
+            process_events_until(lambda: app.lifecycle.state == LifecycleState.STOPPED and not app.lifecycle.busy)
+            close_times.append(time.perf_counter() - start)
+    finally:
+        app.shutdown()
+    results = {'open': summarize(open_times), 'close': summarize(close_times)}
+    print(f"toggle: open {results['open']['median_ms']} ms, close {results['close']['median_ms']} ms")
+    return results
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> List[str]:
+    """Find the medians that got slower than a baseline by more than a threshold.
+
+    Args:
+        results (dict): The new results.
+        baseline (dict): The results to compare against.
+        threshold (float): The allowed slowdown, e.g. 0.2 for 20%.
+
+    Returns:
+        list: A description of each regression.
+    """
+    regressions = []
+
+    def walk(new, old, path):
+        if isinstance(new, dict) and 'median_ms' in new and isinstance(old, dict) and 'median_ms' in old:
+            if old['median_ms'] > 0 and new['median_ms'] > old['median_ms'] * (1 + threshold):
+                regressions.append(f"{'/'.join(path)}: {old['median_ms']} ms -> {new['median_ms']} ms")
+        elif isinstance(new, dict) and isinstance(old, dict):
+            for key in new.keys() & old.keys():
+                walk(new[key], old[key], path + [key])
+
+    walk(results['benchmarks'], baseline.get('benchmarks', {}), [])
+    return regressions
+
+
+def git_commit() -> str:
+    """Get the commit being benchmarked.
+
+    Returns:
+        str: The commit hash, or 'unknown'.
+    """
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=base_path, capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description='Proton Mail Tray benchmarks')
+    parser.add_argument('--output', default='bench.json', help='Where to write the JSON results')
+    parser.add_argument('--compare', help='A previous JSON result to compare against')
+    parser.add_argument('--threshold', type=float, default=0.2, help='The slowdown reported as a regression')
+    parser.add_argument('--processes', default='0,500,2000', help='Sleeper process counts for the scan benchmark')
+    parser.add_argument('--runs', type=int, default=20, help='Runs per measurement')
+    parser.add_argument('--only', nargs='+', choices=['scan', 'terminate', 'startup', 'toggle'],
+                        default=['scan', 'terminate', 'startup', 'toggle'], help='The benchmarks to run')
+    parser.add_argument('--executable', action='append', default=[],
+                        help='A built executable to include in the startup benchmark, e.g. dist/ProtonMailTray and '
+                             'dist/ProtonMailTray/ProtonMailTray to compare the single-file and directory builds')
+    args = parser.parse_args()
+
+    benchmarks = {}
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        stub = make_stub(tmp_dir)
+        if 'scan' in args.only:
+            benchmarks['scan'] = bench_scan(stub, [int(count) for count in args.processes.split(',')], args.runs)
+        if 'terminate' in args.only:
+            benchmarks['terminate'] = bench_terminate(4, max(args.runs // 4, 3))
+        if 'startup' in args.only:
+            benchmarks['startup'] = bench_startup(stub, max(args.runs // 4, 3))
+            for executable in args.executable:
+                benchmarks[f'startup {executable}'] = bench_startup(stub, max(args.runs // 4, 3), executable)
+        if 'toggle' in args.only:
+            benchmarks['toggle'] = bench_toggle(stub, max(args.runs // 2, 3))
+
+    results = {
+        'commit': git_commit(),
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpus': os.cpu_count(),
+        'benchmarks': benchmarks,
+    }
+    with open(args.output, 'w') as f:
+        json.dump(results, f, indent=4)
+    print(f"Results written to {args.output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(results, json.load(f), args.threshold)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
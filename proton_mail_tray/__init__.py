@@ -1,3 +1,38 @@
-from .config import get_proton_mail_path, load_config, save_config
-from .utils import (find_proton_mail_path, is_proton_mail_running,
-                    terminate_process)
+import importlib
+
+# The public names are imported on first use, so that importing a submodule (e.g. proton_mail_tray.cli) does not pay
+# for psutil and the config and discovery modules.
+_EXPORTS = {
+    'ConfigManager': 'config',
+    'get_config_manager': 'config',
+    'get_config_path': 'config',
+    'get_proton_mail_path': 'config',
+    'get_targets': 'config',
+    'load_config': 'config',
+    'save_config': 'config',
+    'validate_config': 'config',
+    'discover_proton_mail_path': 'discovery',
+    'discover_target_path': 'discovery',
+    'Target': 'targets',
+    'load_targets': 'targets',
+    'find_processes': 'utils',
+    'is_proton_mail_running': 'utils',
+    'is_target_running': 'utils',
+    'process_cache': 'utils',
+    'scan_processes': 'utils',
+    'terminate_process': 'utils',
+}
+
+__all__ = sorted(_EXPORTS)
+
+
+def __getattr__(name: str):
+    if name not in _EXPORTS:
+        raise AttributeError(f"module '{__name__}' has no attribute '{name}'")
+    value = getattr(importlib.import_module(f".{_EXPORTS[name]}", __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_EXPORTS))
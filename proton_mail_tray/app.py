@@ -1,159 +1,974 @@
 import argparse
+import atexit
 import json
-import logging.config
-import logging.handlers
+import logging
+import os
 import subprocess
 import sys
+import tempfile
+import time
 from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
 
-import psutil
-from PySide6.QtCore import QThread
-from PySide6.QtGui import QAction, QIcon
+from PySide6.QtCore import QTimer
+from PySide6.QtGui import QAction
 from PySide6.QtWidgets import QApplication, QMenu, QSystemTrayIcon
 
-from proton_mail_tray.config import get_base_path, get_proton_mail_path
-from proton_mail_tray.monitor import SubprocessMonitor
-from proton_mail_tray.utils import is_proton_mail_running, terminate_process
+from proton_mail_tray.icons import StateIcons
+from proton_mail_tray.lazy import lazy_import, resolve
+from proton_mail_tray.lifecycle import Lifecycle, LifecycleState
+from proton_mail_tray.paths import get_app_dir, get_base_path
+from proton_mail_tray.profiling import record, timed
+from proton_mail_tray.targets import PROTON_MAIL, Target
+
+# Loaded once the tray icon is showing, see ProtonMailTray._setup_services
+history = lazy_import('proton_mail_tray.history')
+psutil = lazy_import('psutil')
+telemetry = lazy_import('proton_mail_tray.telemetry')
+utils = lazy_import('proton_mail_tray.utils')
 
 # Logger
 logger = logging.getLogger(__name__)
 
+STATS_ROWS = ('CPU', 'Memory (RSS)', 'Memory (PSS)', 'Threads', 'Processes')
+
+# How much of the resource history the tooltip sparkline shows
+SPARKLINE_SECONDS = 24 * 3600
 
-def setup_logger(logging_config_path: str) -> None:
+
+def setup_logger(logging_config_path: str, log_dir: str,
+                 low_footprint: bool = False) -> Optional['logging.handlers.QueueListener']:
     """Setup the logger using the logging configuration file.
 
+    Log files are written to log_dir. The configured handlers run on a background thread behind a queue, so logging
+    never blocks the GUI thread on file I/O. In low-footprint mode the handlers run inline instead, without the thread,
+    and debug records are neither created nor kept in the ring buffer.
+
     Args:
         logging_config_path (str): The path to the logging configuration file.
+        log_dir (str): The directory for log files.
+        low_footprint (bool): Whether to skip the logging thread and the debug ring buffer.
+
+    Returns:
+        logging.handlers.QueueListener or None: The listener running the handlers, or None in low-footprint mode.
     """
+    import logging.config
+
+    from proton_mail_tray.log import RingBufferHandler, start_queue_listener
+
     with open(logging_config_path) as f_in:
         config = json.load(f_in)
-        config['handlers']['file']['filename'] = str(Path(sys._MEIPASS + config['handlers']['file']['filename']))
+        file_handler = config['handlers']['file']
+        file_handler['filename'] = str(Path(log_dir) / Path(file_handler['filename']).name)
     logging.config.dictConfig(config)
-
-
-def setup_parser() -> argparse.ArgumentParser:
-    """Setup the command line parser.
-
-    Returns:
-        argparse.ArgumentParser: The command line parser.
-    """
-    parser = argparse.ArgumentParser(description='Proton Mail Tray Application')
-    parser.add_argument('--proton-mail-path', type=str, help='Manually specify the path to Proton Mail Beta')
-    return parser
+    if low_footprint:
+        root = logging.getLogger()
+        for handler in [handler for handler in root.handlers if isinstance(handler, RingBufferHandler)]:
+            root.removeHandler(handler)
+        root.setLevel(logging.INFO)
+        return None
+    return start_queue_listener()
 
 
 class ProtonMailTray(QApplication):
     """Proton Mail Tray Application.
 
+    Only the tray icon is created up front. Everything else is set up in phases once the event loop is running, one
+    phase per iteration, so the icon appears before the slower imports, the process scan and the menu: first the
+    startup_phases given by the caller, then the services and finally the menu. ready is True once all have run.
+
     Args:
         sys_argv (list): The system arguments.
         path_dict (dict): A dictionary containing the paths used by the application.
+        targets (dict, optional): The applications managed by the tray, keyed by target key.
+        config (dict, optional): The configuration.
+        log_listener (logging.handlers.QueueListener, optional): The listener running the log handlers.
+        startup_phases (list, optional): (name, callable) pairs to run before the services are set up.
+        started_at (float, optional): The time.perf_counter() value that startup is measured from.
+        low_footprint (bool): Whether to trim memory once startup has finished, see footprint.trim_memory.
     """
 
-    def __init__(self, sys_argv, path_dict: dict):
+    def __init__(self, sys_argv, path_dict: dict, targets: Optional[Dict[str, Target]] = None,
+                 config: Optional[dict] = None, log_listener: Optional['logging.handlers.QueueListener'] = None,
+                 startup_phases: Optional[List[Tuple[str, Callable[[], None]]]] = None,
+                 started_at: Optional[float] = None, low_footprint: bool = False):
         super().__init__(sys_argv)
+        self.started_at = started_at if started_at is not None else time.perf_counter()
+        self.ready = False
+        self.low_footprint = low_footprint
 
         # Paths
         self.path_dict = path_dict
+        self.config = config or {}
+        self.log_listener = log_listener
+        self.set_targets(targets or {})
+
+        # Tray icon, shown straight away. The icon of each state is rendered on first use
+        self.icons = StateIcons(self.path_dict['icon_path'])
+        self.icon_state = 'stopped'
+        self.tray_icon = QSystemTrayIcon(self.icons.icon(self.icon_state))
+        self.tray_icon.setToolTip("Proton Mail Tray: starting")
+        self.tray_icon.setVisible(True)
+        self.tray_icon.show()
+        self.icon_shown_after = time.perf_counter() - self.started_at
+        record('startup.icon', self.icon_shown_after)
+
+        self.control_server = None
+        self.config_watcher = None
+        self.profile_capture = None
+        self._startup_phases = list(startup_phases or [])
+        self._startup_phases += [('services', self._setup_services), ('menu', self._setup_menu)]
+        QTimer.singleShot(0, self._run_startup_phase)
+
+    def set_targets(self, targets: Dict[str, Target]) -> None:
+        """Set the applications managed by the tray. Only has an effect before the services phase.
+
+        Args:
+            targets (dict): The targets, keyed by target key. Disabled targets are left out.
+        """
+        self.targets = {key: target for key, target in targets.items() if target.enabled}
+
+    def _run_startup_phase(self) -> None:
+        """Run the next startup phase and schedule the one after it, or mark the tray ready."""
+        if not self._startup_phases:
+            return
+        name, phase = self._startup_phases.pop(0)
+        start = time.perf_counter()
+        try:
+            phase()
+        except Exception as e:
+            logger.exception(f"Startup phase '{name}' failed: {e}")
+        elapsed = time.perf_counter() - start
+        record(f'startup.{name}', elapsed)
+        logger.info(f"Startup phase '{name}' took {elapsed * 1000:.1f} ms")
+        if self._startup_phases:
+            QTimer.singleShot(0, self._run_startup_phase)
+            return
+        self.ready = True
+        elapsed = time.perf_counter() - self.started_at
+        record('startup', elapsed)
+        logger.info(f"Proton Mail Tray ready in {elapsed * 1000:.1f} ms "
+                    f"(icon shown after {self.icon_shown_after * 1000:.1f} ms)")
+        if self.low_footprint:
+            from proton_mail_tray.footprint import trim_memory
+            trim_memory()
 
-        # Tray icon
-        self.tray_icon = QSystemTrayIcon(QIcon(self.path_dict['icon_path']))
-        if self.tray_icon.icon().isNull():
-            logger.warning(f"Unable to find Proton Mail Tray icon at: {self.path_dict['icon_path']}")
-        self.tray_icon.activated.connect(self._on_tray_icon_activated)
+    def _setup_services(self) -> None:
+        """Set up process management: the monitor, lifecycles, hibernation, stats, watchdog and control server.
 
-        # Menu
+        Ends with the initial scan for targets that are already running.
+        """
+        from proton_mail_tray.hibernation import Hibernator
+        from proton_mail_tray.launch import load_profiles
+        from proton_mail_tray.monitor import SubprocessMonitor
+        from proton_mail_tray.prelaunch import Prelauncher
+        from proton_mail_tray.profiling import load_spans
+        from proton_mail_tray.readiness import ReadinessDetector
+        from proton_mail_tray.throttle import CpuThrottler
+        from proton_mail_tray.prewarm import LaunchTimer, Prewarmer
+        from proton_mail_tray.watchdog import MemoryWatchdog
+        resolve(psutil, telemetry, utils)
+
+        # Answer --toggle, --status and --quit from later invocations, unless another tray already does
+        if 'control_socket_path' in self.path_dict:
+            from proton_mail_tray.control_server import ControlServer
+            self.control_server = ControlServer(self.path_dict['control_socket_path'], self)
+            if not self.control_server.listen():
+                logger.warning("Proton Mail Tray is already running, exiting")
+                self._startup_phases.clear()
+                self.exit(0)
+                return
+            self.control_server.register('toggle', self._on_toggle_command)
+            self.control_server.register('status', self._on_status_command)
+            self.control_server.register('quit', self._on_quit_command)
+            self.control_server.register('stats', self._on_stats_command)
+            self.control_server.register('profile', self._on_profile_command)
+
+        # Watch for Proton Mail exiting, including instances started outside the tray
+        self.monitor = SubprocessMonitor(self)
+        self.monitor.process_exited.connect(self._on_process_exited)
+
+        # Freeze Proton Mail on close instead of terminating it
+        self.hibernator = Hibernator(self.config.get('hibernation'), self)
+        self.hibernator.expired.connect(self._on_hibernation_expired)
+
+        # Open and close each target on a worker thread, tracking its state
+        self.pids: Dict[str, Optional[int]] = {key: None for key in self.targets}
+        self.lifecycles: Dict[str, Lifecycle] = {PROTON_MAIL: Lifecycle('Proton Mail', self)}
+        for key, target in self.targets.items():
+            self.lifecycles[key] = self.lifecycles.get(key) or Lifecycle(target.name, self)
+        for lifecycle in self.lifecycles.values():
+            lifecycle.state_changed.connect(self._update_tooltip)
+        self.lifecycle = self.lifecycles[PROTON_MAIL]
+
+        # Resource usage of the Proton Mail process tree, sampled while the menu is open
+        self.stats = telemetry.StatsSampler(self)
+        self.stats.sampled.connect(self._on_stats_sampled)
+
+        # Restart Proton Mail when its memory stays over the limit
+        self.watchdog = MemoryWatchdog(self.monitor, self.config.get('watchdog'), self)
+        self.watchdog.restart_requested.connect(self._on_watchdog_restart)
+
+        # Renice, duty-cycle and finally restart Proton Mail when it keeps using CPU in the background
+        self.throttler = CpuThrottler(self.monitor, self.config.get('throttle'), self)
+        self.throttler.restart_requested.connect(self._on_throttler_restart)
+        self.lifecycle.before_job = self.throttler.release
+
+        # Keep weeks of Proton Mail's resource use in a fixed-size file, if there is a state directory
+        self.history_recorder = None
+        if self.path_dict.get('state_path'):
+            self.history_recorder = history.HistoryRecorder(
+                os.path.join(self.path_dict['state_path'], 'history.bin'), self.config.get('history'), self)
+        self.lifecycle.state_changed.connect(self._on_proton_mail_state_changed)
+
+        # Read the Proton Mail install into the page cache before the first open, and time launches
+        self.prewarmer = Prewarmer(self.config.get('prewarm'), self)
+        self.launch_timer = LaunchTimer(self)
+        self._launched_at = None
+        self._open_failed = False
+
+        # Detect when an opened Proton Mail can be used, and keep the click-to-ready latency across restarts
+        self.readiness = ReadinessDetector(parent=self)
+        self.readiness.ready.connect(self._on_proton_mail_ready)
+        self._clicked_at = None
+        if self._latency_path is not None:
+            load_spans(self._latency_path, 'ready.')
+
+        # Named priorities, limits and flags to start Proton Mail with
+        self.launch_profiles = load_profiles(self.config)
+
+        # Start Proton Mail hidden and frozen in the background, so the first click only resumes it
+        self.prelauncher = Prelauncher(self.config.get('prelaunch'), self)
+        self.prelauncher.launch_requested.connect(self._on_prelaunch)
+        self._prelaunched_pid = None
+
+        # Apply edits to the config file without a restart
+        if 'config_path' in self.path_dict:
+            from proton_mail_tray.config import get_config_manager
+            from proton_mail_tray.config_watcher import ConfigWatcher
+            self.config_watcher = ConfigWatcher(get_config_manager(self.path_dict['config_path']), self)
+            self.config_watcher.changed.connect(self._on_config_changed)
+
+        self.tray_icon.activated.connect(lambda reason: self._on_tray_icon_activated())
+        self._update_tooltip()
+        self.lifecycle.run(lambda: utils.find_processes(self.targets.values()), self._on_initial_scan)
+
+    @property
+    def _latency_path(self) -> Optional[str]:
+        """str or None: The file the click-to-ready latency is kept in, if there is a state directory."""
+        state_path = self.path_dict.get('state_path')
+        return os.path.join(state_path, 'latency.json') if state_path else None
+
+    def _setup_menu(self) -> None:
+        """Set up an empty context menu, filled in by _build_menu the first time it opens."""
         self.menu = QMenu()
+        self.target_actions = {}
+        self.stats_actions = {}
+        self.menu.aboutToShow.connect(self._build_menu)
+        self.menu.aboutToShow.connect(self._update_target_actions)
+        self.menu.aboutToShow.connect(self._on_menu_shown)
+        self.menu.aboutToHide.connect(self._on_menu_hidden)
+        self.tray_icon.setContextMenu(self.menu)
+
+    def _build_menu(self) -> None:
+        """Add the menu entries, once: an entry per target, the Stats submenu and Quit."""
+        if not self.menu.isEmpty():
+            return
+        for key, target in self.targets.items():
+            action = QAction(target.name)
+            action.triggered.connect(lambda checked=False, key=key: self._on_target_action(key))
+            self.menu.addAction(action)
+            self.target_actions[key] = action
+        if self.target_actions:
+            self.menu.addSeparator()
+        self.stats_menu = self.menu.addMenu("Stats")
+        for row in STATS_ROWS:
+            self.stats_actions[row] = self.stats_menu.addAction(f"{row}: n/a")
+            self.stats_actions[row].setEnabled(False)
+        if self.log_listener is not None:
+            self.save_log_action = self.menu.addAction("Save debug log")
+            self.save_log_action.triggered.connect(self._on_save_debug_log)
+        self.menu.addSeparator()
         self.quit_action = QAction("Quit")
         self.quit_action.triggered.connect(self._on_quit)
         self.menu.addAction(self.quit_action)
-        self.tray_icon.setContextMenu(self.menu)
-        self.tray_icon.setVisible(True)
-        self.tray_icon.show()
 
-        # Watch for external Proton Mail termination
-        self.monitor_thread = QThread()
-        self.monitor = SubprocessMonitor()
-        self.monitor.moveToThread(self.monitor_thread)
-        self.monitor_thread.started.connect(self.monitor.start)
-        self.monitor_thread.start()
+    def _on_initial_scan(self, pids) -> None:
+        """Adopt the targets that were already running when the tray started.
 
-    def _on_tray_icon_activated(self) -> None:
-        """Open or close Proton Mail when the tray icon is clicked.
+        Args:
+            pids (dict or Exception): The PID of each target, or the exception raised by the scan.
+        """
+        if isinstance(pids, Exception):
+            return
+        for key, pid in pids.items():
+            if pid:
+                self._set_pid(key, pid)
+                frozen = key == PROTON_MAIL and self.hibernator.is_frozen(pid)
+                self.lifecycles[key].set_state(LifecycleState.FROZEN if frozen else LifecycleState.RUNNING)
+        if not pids.get(PROTON_MAIL):
+            self.prewarmer.schedule(self.path_dict.get('proton_mail_path'))
+            self.prelauncher.schedule()
+
+    def _set_pid(self, key: str, pid: Optional[int], process: Optional[subprocess.Popen] = None) -> None:
+        """Record the PID of a target and watch it for exit.
+
+        Args:
+            key (str): The target key.
+            pid (int or None): The PID, or None if the target is not running.
+            process (subprocess.Popen, optional): The Popen object if the tray started the process.
+        """
+        self.pids[key] = pid
+        if pid is None:
+            return
+        utils.process_cache.store(key, pid)
+        if key == PROTON_MAIL and process is not None:
+            self.monitor.set_proton_mail_subprocess(process)
+        else:
+            self.monitor.watch(pid, process)
+
+    def _update_tooltip(self, *args) -> None:
+        """Show the state of every target, the last Proton Mail stats and its memory history in the tooltip.
+
+        The icon shows the state of Proton Mail.
+        """
+        lines = [f"{lifecycle.name}: {lifecycle.state.value}" for lifecycle in self.lifecycles.values()]
+        if self.lifecycle.state == LifecycleState.RUNNING and self.readiness.waiting:
+            lines[0] = f"{self.lifecycle.name}: starting…"
+        elif self.lifecycle.state == LifecycleState.STOPPED and self._open_failed:
+            lines[0] = f"{self.lifecycle.name}: failed to start"
+        sample = self.stats.last_sample
+        if sample is not None and self.lifecycle.state == LifecycleState.RUNNING:
+            cpu = f"{sample.cpu_percent:.1f}%" if sample.cpu_percent is not None else "n/a"
+            memory = telemetry.format_bytes(sample.pss or sample.rss)
+            lines[0] += f" (CPU {cpu}, {memory}, {sample.processes} processes)"
+        if self.history_recorder is not None and self.lifecycle.state == LifecycleState.RUNNING:
+            spark = history.sparkline([record.rss for record in self.history_recorder.recent(SPARKLINE_SECONDS)])
+            if spark:
+                lines.insert(1, f"Memory ({SPARKLINE_SECONDS // 3600} h): {spark}")
+        self.tray_icon.setToolTip("\n".join(lines))
+        self._update_icon()
+
+    def _update_icon(self) -> None:
+        """Swap in the cached icon of the Proton Mail state, if it changed."""
+        state = self.lifecycle.state
+        if state == LifecycleState.STOPPED:
+            icon_state = 'error' if self._open_failed else 'stopped'
+        elif state == LifecycleState.RUNNING and not self.readiness.waiting:
+            icon_state = 'running'
+        elif state == LifecycleState.FROZEN:
+            icon_state = 'frozen'
+        else:
+            icon_state = 'starting'
+        if icon_state != self.icon_state:
+            self.icon_state = icon_state
+            self.tray_icon.setIcon(self.icons.icon(icon_state))
+
+    def _on_proton_mail_state_changed(self, state: LifecycleState) -> None:
+        """Point the watchdog, throttler and history at Proton Mail while it is running, and stop pre-warming once it
+        starts.
+
+        Args:
+            state (LifecycleState): The new state.
+        """
+        if state == LifecycleState.STARTING:
+            self.prewarmer.cancel()
+            self.prelauncher.cancel()
+        self.watchdog.set_pid(self.pids.get(PROTON_MAIL) if state == LifecycleState.RUNNING else None)
+        self.throttler.set_pid(self.pids.get(PROTON_MAIL) if state == LifecycleState.RUNNING else None)
+        if self.history_recorder is not None:
+            self.history_recorder.set_pid(self.pids.get(PROTON_MAIL) if state == LifecycleState.RUNNING else None)
+
+    def _on_watchdog_restart(self, pid: int, sample) -> None:
+        """Restart Proton Mail because it has used too much memory.
+
+        Args:
+            pid (int): The PID of Proton Mail.
+            sample (TreeSample): The sample that triggered the restart.
+        """
+        self._restart_proton_mail(pid, self.watchdog.restart_finished)
+
+    def _on_throttler_restart(self, pid: int, sample) -> None:
+        """Restart Proton Mail because throttling did not stop it using CPU in the background.
+
+        Args:
+            pid (int): The PID of Proton Mail.
+            sample (TreeSample): The sample that triggered the restart.
+        """
+        self._restart_proton_mail(pid, self.throttler.restart_finished)
+
+    def _restart_proton_mail(self, pid: int, on_finished: Callable[[Optional[int]], None]) -> None:
+        """Restart Proton Mail on the worker thread.
+
+        A Proton Mail without visible windows is restarted the way it is pre-launched: hidden, and frozen once it has
+        settled, so restarting an app in the background does not put a window in front of the user. When windows
+        cannot be inspected, it is restarted normally.
+
+        Args:
+            pid (int): The PID of Proton Mail.
+            on_finished (callable): Called once the restart has completed with the new PID if it is running, or None if
+                it failed to start or was frozen, or with the old PID if the lifecycle was busy.
+        """
+        def restart():
+            from proton_mail_tray.windows import find_windows
+            visible_windows = find_windows(pid)
+            self.lifecycle.request_state(LifecycleState.STOPPING)
+            try:
+                utils.terminate_process(psutil.Process(pid))
+                utils.process_cache.invalidate(pid)
+            except (psutil.NoSuchProcess, psutil.AccessDenied) as e:
+                logger.exception(f"Failed to close Proton Mail for restart: {e}")
+                return LifecycleState.RUNNING, pid, None
+            self.lifecycle.request_state(LifecycleState.STARTING)
+            if visible_windows == []:
+                logger.info("Restarting Proton Mail in the background, it had no visible windows")
+                return self._launch_hidden()
+            process = self._open_proton_mail(self.path_dict['proton_mail_path'])
+            if process is None:
+                return LifecycleState.STOPPED, None, None
+            return LifecycleState.RUNNING, process.pid, process
+
+        def on_done(result):
+            self._on_toggle_finished(PROTON_MAIL, result)
+            on_finished(self.pids.get(PROTON_MAIL) if self.lifecycle.state == LifecycleState.RUNNING else None)
+
+        if not self.lifecycle.run(restart, on_done):
+            on_finished(pid)  # busy, check again on the next interval
+
+    def _on_config_changed(self, config: dict) -> None:
+        """Apply a reloaded configuration.
+
+        Paths and the hibernation, watchdog, throttling and history settings take effect immediately. Targets that are
+        enabled or disabled only gain or lose their menu entry on the next start.
+
+        Args:
+            config (dict): The new configuration.
+        """
+        self.config = config
+        self.hibernator.configure(config.get('hibernation'))
+        self.watchdog.configure(config.get('watchdog'))
+        self.throttler.configure(config.get('throttle'))
+        if self.history_recorder is not None:
+            self.history_recorder.configure(config.get('history'))
+        self.prewarmer.configure(config.get('prewarm'))
+        self.prelauncher.configure(config.get('prelaunch'))
+        from proton_mail_tray.launch import load_profiles
+        self.launch_profiles = load_profiles(config)
+
+        from proton_mail_tray.config import get_targets
+        from proton_mail_tray.discovery import is_executable
+        proton_mail_path = config.get('proton_mail_path')
+        if not proton_mail_path or not is_executable(proton_mail_path):
+            proton_mail_path = self.path_dict.get('proton_mail_path')
+        self.path_dict['proton_mail_path'] = proton_mail_path
+        targets = get_targets(config, proton_mail_path)
+        for key, target in targets.items():
+            if key in self.targets and target.enabled:
+                self.targets[key] = target
+        added = {key for key, target in targets.items() if target.enabled} - set(self.targets)
+        removed = set(self.targets) - {key for key, target in targets.items() if target.enabled}
+        if added or removed:
+            logger.info(f"Targets added {sorted(added)} or removed {sorted(removed)} apply after a restart")
+
+    def _on_menu_shown(self) -> None:
+        """Start sampling Proton Mail's resource usage while the menu is open."""
+        self.stats.set_pid(self.pids.get(PROTON_MAIL) if self.lifecycle.state == LifecycleState.RUNNING else None)
+        self.stats.start()
+
+    def _on_menu_hidden(self) -> None:
+        """Stop sampling when the menu closes."""
+        self.stats.stop()
+
+    def _on_stats_sampled(self, sample) -> None:
+        """Show a new resource usage sample in the Stats submenu and the tooltip.
+
+        Args:
+            sample (TreeSample or None): The sample, or None if Proton Mail is not running.
+        """
+        if sample is None:
+            values = dict.fromkeys(STATS_ROWS, "n/a")
+        else:
+            values = {
+                'CPU': f"{sample.cpu_percent:.1f}%" if sample.cpu_percent is not None else "n/a",
+                'Memory (RSS)': telemetry.format_bytes(sample.rss),
+                'Memory (PSS)': telemetry.format_bytes(sample.pss),
+                'Threads': str(sample.threads),
+                'Processes': str(sample.processes),
+            }
+        for row, action in self.stats_actions.items():
+            action.setText(f"{row}: {values[row]}")
+        self._update_tooltip()
+
+    def _on_toggle_command(self) -> dict:
+        """Open or close Proton Mail for the --toggle command.
+
+        Returns:
+            dict: Whether the toggle was started, and the state before it.
+        """
+        state = self.lifecycle.state.value
+        return {'accepted': self._on_tray_icon_activated(), 'state': state}
+
+    def _on_status_command(self) -> dict:
+        """Report the state of every target for the --status command.
+
+        Returns:
+            dict: The state and PID of each target, and the last Proton Mail stats.
+        """
+        targets = {key: {'name': lifecycle.name, 'state': lifecycle.state.value, 'busy': lifecycle.busy,
+                         'pid': self.pids.get(key)}
+                   for key, lifecycle in self.lifecycles.items()}
+        sample = self.stats.last_sample
+        return {'targets': targets, 'stats': sample._asdict() if sample is not None else None}
+
+    def _on_quit_command(self) -> dict:
+        """Quit once the reply to the --quit command has been sent.
+
+        Returns:
+            dict: An empty reply.
+        """
+        QTimer.singleShot(0, self._on_quit)
+        return {}
+
+    def _on_stats_command(self) -> dict:
+        """Dump the timing stats for the --dump-stats command.
+
+        Returns:
+            dict: The summary of each span and the file it was written to.
+        """
+        path = os.path.join(self.path_dict.get('state_path') or tempfile.gettempdir(), 'timing_stats.json')
+        from proton_mail_tray.profiling import dump_stats
+        return {'spans': dump_stats(path), 'path': path}
+
+    def _on_profile_command(self, kind: str = 'cprofile', seconds: float = 10) -> dict:
+        """Capture a cProfile or tracemalloc profile for a number of seconds, for the --profile commands.
+
+        Args:
+            kind (str): 'cprofile' or 'tracemalloc'.
+            seconds (float): The length of the capture.
+
+        Returns:
+            dict: The file the profile will be written to.
+        """
+        if self.profile_capture is not None:
+            raise RuntimeError(f"A {self.profile_capture.kind} capture is already running")
+        from proton_mail_tray.profiling import ProfileCapture
+        capture = ProfileCapture(kind, self.path_dict.get('state_path') or tempfile.gettempdir())
+        capture.start()
+        self.profile_capture = capture
+        QTimer.singleShot(int(seconds * 1000), self._stop_profile_capture)
+        return {'path': capture.output_path, 'seconds': seconds}
+
+    def _stop_profile_capture(self) -> None:
+        """Finish the running profile capture."""
+        if self.profile_capture is not None:
+            try:
+                self.profile_capture.stop()
+            finally:
+                self.profile_capture = None
+
+    def _on_save_debug_log(self) -> None:
+        """Write the recent debug records held in memory to the log file."""
+        from proton_mail_tray.log import flush_ring_buffers
+        flushed = flush_ring_buffers(self.log_listener)
+        logger.info(f"Saved {flushed} debug records to the log")
+
+    def _on_process_exited(self, pid: int, returncode: Optional[int]) -> None:
+        """Handle a watched application exiting, whether closed by the tray or externally.
+
+        Args:
+            pid (int): The PID of the exited process.
+            returncode (int or None): The return code, or None if the process was not started by the tray.
+        """
+        logger.info(f"Process {pid} exited with return code {returncode}")
+        utils.process_cache.invalidate(pid)
+        self.hibernator.forget(pid, exited=True)
+        for key, target_pid in self.pids.items():
+            if target_pid == pid:
+                self.pids[key] = None
+                self.lifecycles[key].set_state(LifecycleState.STOPPED)
+
+    def _update_target_actions(self) -> None:
+        """Label each target's menu entry with the action a click will take."""
+        for key, action in self.target_actions.items():
+            target = self.targets[key]
+            lifecycle = self.lifecycles[key]
+            if lifecycle.busy:
+                action.setText(f"{target.name} ({lifecycle.state.value}…)")
+            elif lifecycle.state == LifecycleState.RUNNING:
+                action.setText(f"Close {target.name}")
+            else:
+                action.setText(f"Open {target.name}")
+            action.setEnabled(not lifecycle.busy and (lifecycle.state != LifecycleState.STOPPED
+                                                      or target.path is not None))
+
+    def _on_target_action(self, key: str) -> None:
+        """Open or close a target from its menu entry.
+
+        Args:
+            key (str): The target key.
+        """
+        if key == PROTON_MAIL:
+            self._on_tray_icon_activated()
+            return
+        target = self.targets[key]
+        lifecycle = self.lifecycles[key]
+        lifecycle.run(lambda: self._toggle_target(target, lifecycle),
+                      lambda result: self._on_toggle_finished(key, result))
+
+    def _toggle_target(self, target: Target, lifecycle: Lifecycle) -> tuple:
+        """Open or close a target other than Proton Mail. Runs on the target's worker thread.
 
         Args:
-            reason (QSystemTrayIcon.ActivationReason): The reason the tray icon was activated.
+            target (Target): The target to toggle.
+            lifecycle (Lifecycle): The target's lifecycle.
+
+        Returns:
+            tuple: The resulting state, PID and Popen object (if started by the tray).
+        """
+        pid = utils.is_target_running(target)
+        if pid:
+            lifecycle.request_state(LifecycleState.STOPPING)
+            if self._close_target(target, pid):
+                return LifecycleState.STOPPED, None, None
+            return LifecycleState.RUNNING, pid, None
+        lifecycle.request_state(LifecycleState.STARTING)
+        process = self._open_target(target)
+        if process is None:
+            return LifecycleState.STOPPED, None, None
+        return LifecycleState.RUNNING, process.pid, process
+
+    def _open_target(self, target: Target) -> Optional[subprocess.Popen]:
+        """Open a target other than Proton Mail.
+
+        Args:
+            target (Target): The target to open.
+
+        Returns:
+            subprocess.Popen or None: The started process, or None if it could not be started.
         """
-        if is_proton_mail_running():
-            self._close_proton_mail()
+        try:
+            process = subprocess.Popen([target.path])
+            logger.info(f"{target.name} opened successfully")
+            return process
+        except Exception as e:
+            logger.exception(f"Failed to open {target.name}: {e}")
+            return None
+
+    def _close_target(self, target: Target, pid: int) -> bool:
+        """Close a target other than Proton Mail.
+
+        Args:
+            target (Target): The target to close.
+            pid (int): The PID of the target.
+
+        Returns:
+            bool: True if the target was closed.
+        """
+        try:
+            utils.terminate_process(psutil.Process(pid))
+            utils.process_cache.invalidate(pid)
+            logger.info(f"{target.name} closed successfully")
+            return True
+        except (psutil.NoSuchProcess, psutil.AccessDenied) as e:
+            logger.exception(f"Failed to close {target.name}: {e}")
+            return False
+
+    def _on_toggle_finished(self, key: str, result) -> None:
+        """Apply the result of an open/close job on the GUI thread.
+
+        Args:
+            key (str): The target key.
+            result (tuple or Exception): The state, PID and Popen object from the job, or the exception it raised.
+        """
+        if isinstance(result, Exception):
+            pid = self.pids[key]
+            state = LifecycleState.RUNNING if pid and psutil.pid_exists(pid) else LifecycleState.STOPPED
+            process = None
         else:
-            self._open_proton_mail(self.path_dict['proton_mail_path'])
+            state, pid, process = result
+        self._set_pid(key, pid, process)
+        self.lifecycles[key].set_state(state)
+        if key != PROTON_MAIL:
+            return
+        if process is not None and self._launched_at is not None:
+            self.launch_timer.start(pid, self._launched_at, self.prewarmer.prewarmed)
+        if state == LifecycleState.RUNNING and self._clicked_at is not None:
+            self.readiness.watch(pid, self._clicked_at, 'cold' if process is not None else 'resume')
+        elif state != LifecycleState.RUNNING:
+            self.readiness.cancel()
+        self._clicked_at = None
+        self._update_tooltip()
 
-    def _open_proton_mail(self, proton_mail_path: str) -> None:
-        """Open Proton Mail.
+    def _on_proton_mail_ready(self, pid: int, how: str, seconds: float) -> None:
+        """Show that Proton Mail is ready and persist the click-to-ready latency.
+
+        Args:
+            pid (int): The PID of Proton Mail.
+            how (str): How readiness was detected.
+            seconds (float): The time from the click to ready.
+        """
+        self._update_tooltip()
+        if self._latency_path is not None:
+            from proton_mail_tray.profiling import save_spans
+            try:
+                save_spans(self._latency_path, 'ready.')
+            except OSError as e:
+                logger.warning(f"Failed to save the click-to-ready latency: {e}")
+
+    @timed('click')
+    def _on_tray_icon_activated(self) -> bool:
+        """Open or close Proton Mail when the tray icon is clicked.
+
+        The work runs on a worker thread. Clicks while Proton Mail is starting or stopping are ignored, except that a
+        pre-launched Proton Mail that has not been frozen yet is kept running.
+
+        Returns:
+            bool: True if the toggle was started.
+        """
+        clicked_at = time.monotonic()
+        if self.prelauncher.interrupt():
+            self._clicked_at = clicked_at
+            return True
+        if not self.lifecycle.run(self._toggle_proton_mail,
+                                  lambda result: self._on_toggle_finished(PROTON_MAIL, result)):
+            return False
+        self._clicked_at = clicked_at
+        return True
+
+    @timed('toggle_proton_mail')
+    def _toggle_proton_mail(self) -> tuple:
+        """Open, close or resume Proton Mail. Runs on the Proton Mail worker thread.
+
+        A hibernated Proton Mail is resumed rather than closed.
+
+        Returns:
+            tuple: The resulting state, PID and Popen object (if started by the tray).
+        """
+        proton_mail_pid = utils.is_proton_mail_running()
+        if proton_mail_pid and self.hibernator.is_frozen(proton_mail_pid):
+            self.lifecycle.request_state(LifecycleState.STARTING)
+            self._resume_proton_mail(proton_mail_pid)
+            return LifecycleState.RUNNING, proton_mail_pid, None
+        elif proton_mail_pid:
+            self.lifecycle.request_state(LifecycleState.STOPPING)
+            return self._close_proton_mail(proton_mail_pid)
+        else:
+            self.lifecycle.request_state(LifecycleState.STARTING)
+            process = self._open_proton_mail(self.path_dict['proton_mail_path'])
+            if process is None:
+                return LifecycleState.STOPPED, None, None
+            return LifecycleState.RUNNING, process.pid, process
+
+    def _resume_proton_mail(self, proton_mail_pid: int) -> None:
+        """Resume a hibernated Proton Mail.
+
+        Args:
+            proton_mail_pid (int): The PID of the frozen Proton Mail.
+        """
+        if not self.hibernator.thaw(proton_mail_pid):
+            logger.warning(f"Failed to resume Proton Mail (PID {proton_mail_pid})")
+        elif proton_mail_pid == self._prelaunched_pid:
+            self._restore_priorities(proton_mail_pid)
+
+    def _restore_priorities(self, proton_mail_pid: int) -> None:
+        """Move a pre-launched Proton Mail that is being opened from the pre-launch profile to the normal one.
+
+        Args:
+            proton_mail_pid (int): The PID of Proton Mail.
+        """
+        self._prelaunched_pid = None
+        launch_config = self.config.get('launch', {})
+        profile = launch_config.get('profile')
+        if (launch_config.get('prelaunch_profile') or profile) == profile:
+            return
+        from proton_mail_tray.launch import get_profile, restore_priorities
+        restore_priorities(proton_mail_pid, get_profile(self.launch_profiles, profile))
+
+    @timed('open_proton_mail')
+    def _open_proton_mail(self, proton_mail_path: str, profile: Optional[str] = None) -> Optional[subprocess.Popen]:
+        """Open Proton Mail with a launch profile.
 
         Args:
             proton_mail_path (str): The path to the Proton Mail Beta executable.
+            profile (str, optional): The launch profile, the configured 'launch.profile' by default.
+
+        Returns:
+            subprocess.Popen or None: The started process, or None if it could not be started.
         """
         try:
-            process = subprocess.Popen([proton_mail_path])
-            logger.info("Proton Mail opened successfully")
-            self.monitor.set_proton_mail_subprocess(process)
+            from proton_mail_tray.launch import get_profile, launch
+            launch_config = self.config.get('launch', {})
+            profile = get_profile(self.launch_profiles, profile or launch_config.get('profile'))
+            start = time.perf_counter()
+            process = launch(proton_mail_path, profile)
+            self._launched_at = start
+            self._open_failed = False
+            cache = 'pre-warmed' if self.prewarmer.prewarmed else 'not pre-warmed'
+            logger.info(f"Proton Mail process started (cold start, {cache}, launched in "
+                        f"{(time.perf_counter() - start) * 1000:.1f} ms), waiting for it to be ready")
+            return process
         except Exception as e:
             logger.exception(f"Failed to open Proton Mail: {e}")
+            self._open_failed = True
+            return None
 
-    def _close_proton_mail(self) -> None:
+    @timed('close_proton_mail')
+    def _close_proton_mail(self, proton_mail_pid: int) -> tuple:
         """Close Proton Mail.
 
-        If the process is not found or access is denied, log the exception.
+        With hibernation enabled the process tree is frozen, otherwise it is terminated. If the process is not found or
+        access is denied, log the exception.
+
+        Args:
+            proton_mail_pid (int): The PID of Proton Mail.
+
+        Returns:
+            tuple: The resulting state, PID and Popen object.
         """
-        proton_mail_pid = is_proton_mail_running()
-        if proton_mail_pid:
-            try:
-                process = psutil.Process(proton_mail_pid)
-                terminate_process(process)
-                logger.info("Proton Mail closed successfully")
-            except (psutil.NoSuchProcess, psutil.AccessDenied) as e:
-                logger.exception(f"Failed to close Proton Mail: {e}")
-        else:
-            logger.info("Proton Mail is not running")
+        if self.hibernator.enabled and self.hibernator.freeze(proton_mail_pid):
+            logger.info("Proton Mail hibernated successfully")
+            return LifecycleState.FROZEN, proton_mail_pid, None
+        try:
+            process = psutil.Process(proton_mail_pid)
+            utils.terminate_process(process)
+            utils.process_cache.invalidate(proton_mail_pid)
+            logger.info("Proton Mail closed successfully")
+            return LifecycleState.STOPPED, None, None
+        except (psutil.NoSuchProcess, psutil.AccessDenied) as e:
+            logger.exception(f"Failed to close Proton Mail: {e}")
+            return LifecycleState.RUNNING, proton_mail_pid, None
+
+    def _on_prelaunch(self) -> None:
+        """Launch Proton Mail in the background and freeze it once it has settled, on the worker thread.
+
+        The frozen instance is not terminated after terminate_after_minutes, since it is waiting for the first click.
+        """
+        if self.lifecycle.state != LifecycleState.STOPPED:
+            return
+
+        def prelaunch():
+            pid = utils.is_proton_mail_running()
+            if pid:
+                return LifecycleState.RUNNING, pid, None
+            self.lifecycle.request_state(LifecycleState.STARTING)
+            logger.info("Pre-launching Proton Mail")
+            return self._launch_hidden()
+
+        self.lifecycle.run(prelaunch, lambda result: self._on_toggle_finished(PROTON_MAIL, result))
+
+    def _launch_hidden(self) -> tuple:
+        """Launch Proton Mail with the pre-launch profile, hide its windows and freeze it once it has settled.
+
+        Runs on the Proton Mail worker thread. The windows are unmapped as soon as they appear, and mapped again when
+        it is resumed, or straight away if it is clicked while settling. Either way it then gets the priorities of the
+        normal launch profile.
+
+        Returns:
+            tuple: The resulting state, PID and Popen object.
+        """
+        launch_config = self.config.get('launch', {})
+        process = self._open_proton_mail(self.path_dict['proton_mail_path'],
+                                         launch_config.get('prelaunch_profile') or launch_config.get('profile'))
+        if process is None:
+            return LifecycleState.STOPPED, None, None
+        self._prelaunched_pid = process.pid
+        if (self.prelauncher.wait_until_settled(process.pid)
+                and self.hibernator.freeze(process.pid, expire=False, hidden_windows=self.prelauncher.hidden_windows)):
+            return LifecycleState.FROZEN, process.pid, process
+        self._restore_priorities(process.pid)  # opened while settling, or could not be frozen
+        return LifecycleState.RUNNING, process.pid, process
+
+    def _on_hibernation_expired(self, pid: int) -> None:
+        """Terminate a Proton Mail that has been frozen for too long, on the worker thread.
+
+        Args:
+            pid (int): The PID of the frozen Proton Mail.
+        """
+        def terminate():
+            self.lifecycle.request_state(LifecycleState.STOPPING)
+            self.hibernator.terminate(pid)
+            return LifecycleState.STOPPED, None, None
+
+        if not self.lifecycle.run(terminate, lambda result: self._on_toggle_finished(PROTON_MAIL, result)):
+            self.hibernator.forget(pid)
 
     def _on_quit(self):
-        """Stop the monitor thread and close the application."""
+        """Stop the monitor and workers and close the application."""
+        self.shutdown()
+        logger.info("Quitting")
+        self.quit()
+
+    def shutdown(self) -> None:
+        """Stop the samplers, timers, workers and monitor, thawing a frozen Proton Mail, without quitting."""
         try:
+            self.stats.shutdown()
+            self.watchdog.shutdown()
+            self.throttler.shutdown()
+            if self.history_recorder is not None:
+                self.history_recorder.shutdown()
+            self.prelauncher.shutdown()
+            self.readiness.shutdown()
+            self.prewarmer.shutdown()
+            self.launch_timer.stop()
+            for lifecycle in self.lifecycles.values():
+                lifecycle.shutdown()
+            if self.hibernator.frozen_pid is not None:
+                self.hibernator.thaw(self.hibernator.frozen_pid)  # never leave Proton Mail frozen without the tray
             self.monitor.stop()
-            self.monitor_thread.exit()
-            self.monitor_thread.wait()
+            if self.control_server is not None:
+                self.control_server.close()
         except Exception as e:
-            logger.exception(f"Failed to stop monitor thread: {e}")
-            logger.info("Quitting")
-        self.quit()
+            logger.exception(f"Failed to stop monitor: {e}")
+        logger.info(f"Process cache stats: {utils.process_cache.stats()}")
 
 
-def main():
-    # Parser & args
-    parser = setup_parser()
-    args = parser.parse_args()
+def main(args: argparse.Namespace, control_socket_path: str) -> int:
+    """Start the tray.
 
-    # Paths
+    The tray icon is shown first. Logging, the config, path discovery and the targets are set up in the first startup
+    phases, once the event loop is running.
+
+    Args:
+        args (argparse.Namespace): The command-line arguments.
+        control_socket_path (str): The path of the control socket.
+
+    Returns:
+        int: The exit code.
+    """
+    start = time.perf_counter()
     base_path = get_base_path()
+    print(str(base_path))
     paths = {
         'base_path': str(base_path),
         'icon_path': str(base_path / 'resources' / 'icon' / 'proton-mail.png'),
-        'config_path': str(base_path / 'configs' / 'config.json'),
+        'control_socket_path': control_socket_path,
         'logging_config_path': str(base_path / 'configs' / 'logging_config.json'),
-        'proton_mail_path': get_proton_mail_path(args, str(base_path / 'configs' / 'config.json'))
+        'state_path': str(get_app_dir('state')),
     }
 
-    # Logger
-    print(paths['base_path'])
-    setup_logger(paths['logging_config_path'])
+    def setup_logging():
+        app.log_listener = setup_logger(paths['logging_config_path'], paths['state_path'], args.low_footprint)
+        if app.log_listener is not None:
+            atexit.register(app.log_listener.stop)
+        logger.info("========== Proton Mail Tray instance started ==========")
+
+    def setup_config():
+        from proton_mail_tray.config import (get_config_path, get_proton_mail_path,
+                                             get_targets, load_config)
+        paths['config_path'] = str(get_config_path(str(base_path / 'configs' / 'config.json')))
+        paths['proton_mail_path'] = get_proton_mail_path(args, paths['config_path'])
+        app.config = load_config(paths['config_path'])
+        app.set_targets(get_targets(app.config, paths['proton_mail_path']))
 
-    # Application
-    app = ProtonMailTray(sys.argv, path_dict=paths)
-    logger.info("========== Proton Mail Tray instance started ==========")
-    sys.exit(app.exec())
+    if args.low_footprint:
+        from proton_mail_tray.footprint import apply_low_footprint_env
+        apply_low_footprint_env()
+    app = ProtonMailTray(sys.argv, path_dict=paths, startup_phases=[('logging', setup_logging),
+                                                                    ('config', setup_config)], started_at=start,
+                         low_footprint=args.low_footprint)
+    return app.exec()
 
 
 if __name__ == "__main__":
-    main()
+    from proton_mail_tray.cli import main as cli_main
+    sys.exit(cli_main())
@@ -0,0 +1,125 @@
+import argparse
+import json
+import sys
+from typing import List, Optional
+
+from proton_mail_tray.control import send_command
+from proton_mail_tray.paths import get_control_socket_path
+
+
+def setup_parser() -> argparse.ArgumentParser:
+    """Setup the command line parser.
+
+    Returns:
+        argparse.ArgumentParser: The command line parser.
+    """
+    parser = argparse.ArgumentParser(description='Proton Mail Tray Application')
+    parser.add_argument('--proton-mail-path', type=str, help='Manually specify the path to Proton Mail Beta')
+    parser.add_argument('--low-footprint', action='store_true',
+                        help='Keep the memory use of the tray down: skip unused Qt plugins, the logging thread and '
+                             'the debug log, and trim memory after startup')
+    commands = parser.add_mutually_exclusive_group()
+    commands.add_argument('--toggle', dest='command', action='store_const', const='toggle',
+                          help='Open or close Proton Mail in the running tray')
+    commands.add_argument('--status', dest='command', action='store_const', const='status',
+                          help='Print the state of the running tray as JSON')
+    commands.add_argument('--quit', dest='command', action='store_const', const='quit',
+                          help='Quit the running tray')
+    commands.add_argument('--dump-stats', dest='command', action='store_const', const='stats',
+                          help='Print the timing stats of the running tray as JSON and save them to its state directory')
+    commands.add_argument('--profile', type=float, metavar='SECONDS',
+                          help='Capture a cProfile profile of the running tray for a number of seconds')
+    commands.add_argument('--trace-memory', type=float, metavar='SECONDS',
+                          help='Capture the memory allocations of the running tray for a number of seconds')
+    commands.add_argument('--export-history', choices=('csv', 'json'),
+                          help="Print Proton Mail's recorded resource use as CSV or JSON, without a running tray")
+    parser.add_argument('--since', type=str, metavar='TIME',
+                        help="With --export-history, leave out records before this time: a duration before now such "
+                             "as '24h' or '7d', or an ISO 8601 date")
+    parser.add_argument('--until', type=str, metavar='TIME',
+                        help='With --export-history, leave out records after this time')
+    return parser
+
+
+def export_history(kind: str, since: Optional[str] = None, until: Optional[str] = None) -> int:
+    """Print the resource history from the state directory.
+
+    Args:
+        kind (str): 'csv' or 'json'.
+        since (str, optional): Leave out records before this time, see history.parse_time.
+        until (str, optional): Leave out records after this time.
+
+    Returns:
+        int: The exit code.
+    """
+    from proton_mail_tray.history import HistoryFile, parse_time, write_csv, write_json
+    from proton_mail_tray.paths import get_app_dir
+
+    path = get_app_dir('state') / 'history.bin'
+    try:
+        since_time = parse_time(since) if since else None
+        until_time = parse_time(until) if until else None
+    except ValueError as e:
+        print(f"Invalid time: {e}", file=sys.stderr)
+        return 2
+    try:
+        history = HistoryFile(str(path))
+    except FileNotFoundError:
+        print(f"No resource history recorded yet ({path})", file=sys.stderr)
+        return 1
+    except (OSError, ValueError) as e:
+        print(f"Unable to read resource history: {e}", file=sys.stderr)
+        return 1
+    try:
+        records = history.records(since_time, until_time)
+    finally:
+        history.close()
+    (write_csv if kind == 'csv' else write_json)(records, sys.stdout)
+    return 0
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Run a command against the running tray, or start the tray if there is none.
+
+    Commands only use the control socket, so they return without loading Qt. --export-history reads the state directory
+    and loads Qt for the history module, but not psutil.
+
+    Args:
+        argv (list, optional): The command line arguments, sys.argv[1:] by default.
+
+    Returns:
+        int: The exit code.
+    """
+    parser = setup_parser()
+    args = parser.parse_args(argv)
+    if args.export_history is None and (args.since is not None or args.until is not None):
+        parser.error('--since and --until can only be used with --export-history')
+    if args.export_history is not None:
+        return export_history(args.export_history, args.since, args.until)
+    socket_path = get_control_socket_path()
+
+    params = {}
+    if args.profile is not None:
+        args.command, params = 'profile', {'kind': 'cprofile', 'seconds': args.profile}
+    elif args.trace_memory is not None:
+        args.command, params = 'profile', {'kind': 'tracemalloc', 'seconds': args.trace_memory}
+
+    if args.command is not None:
+        reply = send_command(socket_path, args.command, **params)
+        if reply is None:
+            print("Proton Mail Tray is not running", file=sys.stderr)
+            return 1
+        if args.command in ('status', 'stats', 'profile') or not reply.get('ok'):
+            print(json.dumps(reply, indent=4))
+        return 0 if reply.get('ok') else 1
+
+    if send_command(socket_path, 'ping', timeout=0.5) is not None:
+        print("Proton Mail Tray is already running", file=sys.stderr)
+        return 0
+
+    from proton_mail_tray import app
+    return app.main(args, socket_path)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
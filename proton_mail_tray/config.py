@@ -1,29 +1,272 @@
+import copy
 import json
 import logging
 import os
-import sys
 from pathlib import Path
-from typing import Optional
+from typing import Dict, Optional
 
-from proton_mail_tray.utils import find_proton_mail_path
+from proton_mail_tray.discovery import (discover_proton_mail_path,
+                                        discover_target_path, is_executable)
+from proton_mail_tray.paths import get_app_dir, write_json_atomic
+from proton_mail_tray.profiling import span
+from proton_mail_tray.targets import PROTON_MAIL, Target, load_targets
 
 logger = logging.getLogger(__name__)
 
+NUMBER = (int, float)
 
-def get_base_path() -> Path:
-    """Determine the base path of the application.
+# The expected type of each known setting. Nested dicts describe sections, unknown keys are kept as they are.
+CONFIG_SCHEMA = {
+    'proton_mail_path': str,
+    'targets': dict,
+    'hibernation': {
+        'enabled': bool,
+        'terminate_after_minutes': NUMBER,
+    },
+    'watchdog': {
+        'enabled': bool,
+        'memory_limit_mb': NUMBER,
+        'sustained_minutes': NUMBER,
+        'check_interval_seconds': NUMBER,
+        'restart_when': str,
+        'idle_cpu_percent': NUMBER,
+    },
+    'throttle': {
+        'enabled': bool,
+        'cpu_percent': NUMBER,
+        'sustained_seconds': NUMBER,
+        'escalate_after_seconds': NUMBER,
+        'check_interval_seconds': NUMBER,
+        'when': str,
+        'nice': int,
+        'duty_cycle_percent': NUMBER,
+        'duty_cycle_period_seconds': NUMBER,
+        'restart': bool,
+    },
+    'history': {
+        'enabled': bool,
+        'interval_seconds': NUMBER,
+        'days': NUMBER,
+    },
+    'prewarm': {
+        'enabled': bool,
+        'delay_seconds': NUMBER,
+        'max_mb': NUMBER,
+        'max_memory_pressure': NUMBER,
+        'min_available_percent': NUMBER,
+    },
+    'prelaunch': {
+        'enabled': bool,
+        'delay_seconds': NUMBER,
+        'idle_cpu_percent': NUMBER,
+        'min_available_mb': NUMBER,
+        'retry_seconds': NUMBER,
+        'settle_seconds': NUMBER,
+        'settle_timeout_seconds': NUMBER,
+    },
+    'launch': {
+        'profile': str,
+        'prelaunch_profile': (str, type(None)),
+        'profiles': dict,
+    },
+}
 
-    Finds the base path of the application, whether it is ran via executable or source code.
+TARGET_SCHEMA = {
+    'name': str,
+    'process_name': str,
+    'paths': list,
+    'aliases': list,
+    'path': (str, type(None)),
+    'enabled': bool,
+}
+
+PROFILE_SCHEMA = {
+    'nice': int,
+    'ionice': (str, type(None)),
+    'ionice_level': (int, type(None)),
+    'cpu_affinity': list,
+    'oom_score_adj': (int, type(None)),
+    'rlimits': dict,
+    'electron_flags': list,
+    'memory_high_mb': (int, type(None)),
+}
+
+
+def get_config_path(legacy_path: Optional[str] = None) -> Path:
+    """Get the path of the user configuration file, creating its directory if needed.
+
+    The file lives in $XDG_CONFIG_HOME/proton-mail-tray, so it survives upgrades and is writable from a frozen build,
+    whose bundled files are unpacked to a temporary directory. On first use it is seeded from the legacy config file.
+
+    Args:
+        legacy_path (str, optional): The path of the config file bundled with the application.
 
     Returns:
-        Path: The base path of the application.
+        Path: The path to config.json.
     """
-    if getattr(sys, 'frozen', False):  # if executable
-        return Path(sys._MEIPASS)
-    else:  # if source
-        base_path = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
-        sys.path.append(base_path)
-        return Path(base_path)
+    config_path = get_app_dir('config') / 'config.json'
+    if not config_path.exists() and legacy_path and os.path.exists(legacy_path):
+        logger.info(f"Copying configuration from {legacy_path} to {config_path}")
+        save_config(str(config_path), load_config(legacy_path))
+    return config_path
+
+
+def validate_config(config, schema: Optional[dict] = None, section: str = 'config') -> dict:
+    """Check a configuration against the schema, dropping the settings that have the wrong type.
+
+    Each dropped setting is logged, so a typo falls back to its default rather than crashing the tray.
+
+    Args:
+        config (dict): The configuration to check.
+        schema (dict, optional): The schema to check against, CONFIG_SCHEMA by default.
+        section (str): The name of the section being checked, used in logs.
+
+    Returns:
+        dict: A copy of the configuration with only valid settings.
+    """
+    schema = CONFIG_SCHEMA if schema is None else schema
+    if not isinstance(config, dict):
+        logger.warning(f"Ignoring {section}: expected an object, got {type(config).__name__}")
+        return {}
+    valid = {}
+    for key, value in config.items():
+        expected = schema.get(key)
+        if isinstance(expected, dict):
+            value = validate_config(value, expected, f"{section}.{key}")
+        elif expected is not None and not _has_type(value, expected):
+            logger.warning(f"Ignoring {section}.{key}: unexpected value {value!r}")
+            continue
+        valid[key] = value
+    if section == 'config' and 'targets' in valid:
+        valid['targets'] = {key: validate_config(target, TARGET_SCHEMA, f"targets.{key}")
+                            for key, target in valid['targets'].items()}
+    if section == 'config.launch' and 'profiles' in valid:
+        valid['profiles'] = {key: validate_config(profile, PROFILE_SCHEMA, f"launch.profiles.{key}")
+                             for key, profile in valid['profiles'].items()}
+    return valid
+
+
+def _has_type(value, expected) -> bool:
+    """Check a value against a schema type, not accepting booleans as numbers.
+
+    Args:
+        value: The value to check.
+        expected (type or tuple): The expected type or types.
+
+    Returns:
+        bool: True if the value has the expected type.
+    """
+    expected = expected if isinstance(expected, tuple) else (expected,)
+    if isinstance(value, bool) and bool not in expected:
+        return False
+    return isinstance(value, expected)
+
+
+class ConfigManager:
+    """Load, cache and save a configuration file.
+
+    The parsed configuration is cached along with the file's mtime, size and inode, so loading again only costs a
+    stat until the file changes. Saving writes to a temporary file in the same directory and renames it over the
+    config, so a crash never leaves a half-written file, and is skipped if the configuration has not changed.
+
+    Args:
+        file_path (str): The path to the configuration file.
+    """
+
+    def __init__(self, file_path: str):
+        self.file_path = str(file_path)
+        self._stamp = None
+        self._config = None
+
+    def load(self) -> dict:
+        """Load the configuration, from the cache if the file has not changed.
+
+        Returns:
+            dict: The validated configuration, or empty if the file does not exist or is not valid JSON.
+        """
+        stamp = self._read_stamp()
+        if stamp is not None and stamp == self._stamp:
+            return copy.deepcopy(self._config)
+
+        logger.info(f"Loading configuration from {self.file_path}")
+        self._stamp = stamp
+        self._config = None
+        if stamp is None:
+            return {}
+        try:
+            with span('config.load'), open(self.file_path, 'r') as f:
+                self._config = validate_config(json.load(f))
+        except (OSError, json.JSONDecodeError):
+            logger.warning(f"Unable to load configuration from {self.file_path}")
+            return {}
+        return copy.deepcopy(self._config)
+
+    def save(self, config: dict) -> bool:
+        """Save the configuration atomically, unless it is unchanged.
+
+        Args:
+            config (dict): The configuration to save.
+
+        Returns:
+            bool: True if the file was written.
+        """
+        self.load()
+        if self._config is not None and config == self._config:
+            logger.debug(f"Configuration unchanged, not saving {self.file_path}")
+            return False
+
+        logger.info(f"Saving configuration to {self.file_path}")
+        try:
+            with span('config.save'):
+                write_json_atomic(self.file_path, config)
+        except Exception as e:
+            logger.error(f"Unable to save configuration to {self.file_path}: {e}")
+            return False
+        self._stamp = self._read_stamp()
+        self._config = copy.deepcopy(config)
+        logger.info(f"Configuration saved to {self.file_path}")
+        return True
+
+    def update(self, changes: dict) -> bool:
+        """Merge top-level settings into the configuration and save it if anything changed.
+
+        Args:
+            changes (dict): The settings to set.
+
+        Returns:
+            bool: True if the file was written.
+        """
+        return self.save({**self.load(), **changes})
+
+    def _read_stamp(self) -> Optional[tuple]:
+        """Read what identifies the current version of the file.
+
+        Returns:
+            tuple or None: The mtime, size and inode of the file, or None if it does not exist.
+        """
+        try:
+            stat = os.stat(self.file_path)
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size, stat.st_ino
+
+
+_managers: Dict[str, ConfigManager] = {}
+
+
+def get_config_manager(file_path: str) -> ConfigManager:
+    """Get the shared ConfigManager of a configuration file.
+
+    Args:
+        file_path (str): The path to the configuration file.
+
+    Returns:
+        ConfigManager: The manager, created on first use.
+    """
+    key = os.path.abspath(file_path)
+    if key not in _managers:
+        _managers[key] = ConfigManager(file_path)
+    return _managers[key]
 
 
 def load_config(file_path: str) -> dict:
@@ -35,37 +278,25 @@ def load_config(file_path: str) -> dict:
     Returns:
         dict: The configuration, or empty if the file does not exist or is not valid JSON.
     """
-    logger.info(f"Loading configuration from {file_path}")
-    if os.path.exists(file_path):
-        try:
-            with open(file_path, 'r') as f:
-                return json.load(f)
-        except json.JSONDecodeError:
-            logger.warning(f"Unable to load configuration from {file_path}")
-    return {}
+    return get_config_manager(file_path).load()
 
 
 def save_config(file_path: str, config: dict) -> None:
-    """Save the configuration to a file.
+    """Save the configuration to a file, unless it is unchanged.
 
     Args:
         file_path (str): The path to the configuration file.
         config (dict): The configuration to save.
     """
-    logger.info(f"Saving configuration to {file_path}")
-    try:
-        with open(file_path, 'w') as f:
-            json.dump(config, f)
-            logger.info(f"Configuration saved to {file_path}")
-    except Exception as e:
-        logger.error(f"Unable to save configuration to {file_path}: {e}")
+    get_config_manager(file_path).save(config)
 
 
 def get_proton_mail_path(args, file_path: str) -> Optional[str]:
     """Get the path to Proton Mail Beta, either from CLI, config, or find it.
 
-    Args passed via CLI take precedence over the config file. If the path is not found in the config file, it will be
-    searched for.
+    Args passed via CLI take precedence over the config file and are saved to it as the user's choice. A path in the
+    config file is only used while it is an executable file. Otherwise Proton Mail is searched for, and where it was
+    found is kept in the discovery cache rather than the config file, so it is searched for again when it moves.
 
     Args:
         args (argparse.Namespace): The command-line arguments.
@@ -75,20 +306,47 @@ def get_proton_mail_path(args, file_path: str) -> Optional[str]:
         str or None: The path to Proton Mail Beta, or None if it could not be found.
     """
     config = load_config(file_path)
+    configured_path = config.get('proton_mail_path')
     if args.proton_mail_path is not None:
         logger.info(f"Proton Mail path provided via CLI: {args.proton_mail_path}")
         proton_mail_path = args.proton_mail_path
-        config['proton_mail_path'] = proton_mail_path
-        save_config(file_path, config)
-    elif 'proton_mail_path' in config:
-        # TODO: Improve this
-        logger.info(f"Proton Mail path found in config: {config['proton_mail_path']}")
-        proton_mail_path = config['proton_mail_path']
-    else:
-        logger.info("Proton Mail path not found in config, searching for it...")
-        proton_mail_path = find_proton_mail_path()
-        if proton_mail_path:
+        if configured_path != proton_mail_path:
             config['proton_mail_path'] = proton_mail_path
             save_config(file_path, config)
+    elif configured_path and is_executable(configured_path):
+        logger.info(f"Proton Mail path found in config: {configured_path}")
+        proton_mail_path = configured_path
+    else:
+        if configured_path:
+            logger.warning(f"Proton Mail path in config is not an executable file: {configured_path}, "
+                           f"searching for it...")
+        else:
+            logger.info("Proton Mail path not found in config, searching for it...")
+        proton_mail_path = discover_proton_mail_path()
 
     return proton_mail_path
+
+
+def get_targets(config: dict, proton_mail_path: Optional[str]) -> Dict[str, Target]:
+    """Get the target registry with the path of each target resolved.
+
+    Proton Mail uses the path from get_proton_mail_path. Other targets use the path set in the config, or are searched
+    for in their standard locations if they are enabled.
+
+    Args:
+        config (dict): The configuration.
+        proton_mail_path (str or None): The path to Proton Mail Beta.
+
+    Returns:
+        dict: The targets, keyed by target key.
+    """
+    targets = {}
+    for key, target in load_targets(config).items():
+        if key == PROTON_MAIL:
+            path = proton_mail_path
+        elif target.path is None and target.enabled:
+            path = discover_target_path(target)
+        else:
+            path = target.path
+        targets[key] = target.with_path(path)
+    return targets
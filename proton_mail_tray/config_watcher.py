@@ -0,0 +1,75 @@
+import logging
+import os
+from typing import Optional
+
+from PySide6.QtCore import QFileSystemWatcher, QObject, QTimer, Signal
+
+from proton_mail_tray.config import ConfigManager
+
+logger = logging.getLogger(__name__)
+
+RELOAD_DELAY_MS = 250
+
+
+class ConfigWatcher(QObject):
+    """Reload the configuration when its file changes on disk.
+
+    Both the file and its directory are watched: editors and ConfigManager.save replace the file with a rename, which
+    drops the watch on the file itself. Bursts of events are coalesced into one reload after RELOAD_DELAY_MS, and
+    changed is only emitted when the parsed configuration differs from the last one.
+
+    Args:
+        manager (ConfigManager): The manager of the configuration file.
+        parent (QObject, optional): The parent object.
+
+    Signals:
+        changed (dict): Emitted with the new configuration.
+    """
+
+    changed = Signal(dict)
+
+    def __init__(self, manager: ConfigManager, parent: Optional[QObject] = None):
+        super().__init__(parent)
+        self.manager = manager
+        self.config = manager.load()
+
+        self._reload_timer = QTimer(self)
+        self._reload_timer.setSingleShot(True)
+        self._reload_timer.setInterval(RELOAD_DELAY_MS)
+        self._reload_timer.timeout.connect(self.reload)
+
+        self._watcher = QFileSystemWatcher(self)
+        self._watcher.fileChanged.connect(self._on_changed)
+        self._watcher.directoryChanged.connect(self._on_changed)
+        directory = os.path.dirname(os.path.abspath(manager.file_path))
+        if os.path.isdir(directory):
+            self._watcher.addPath(directory)
+        self._watch_file()
+
+    def reload(self) -> bool:
+        """Reload the configuration and emit changed if it differs.
+
+        Returns:
+            bool: True if the configuration changed.
+        """
+        self._watch_file()
+        config = self.manager.load()
+        if config == self.config:
+            return False
+        logger.info(f"Configuration reloaded from {self.manager.file_path}")
+        self.config = config
+        self.changed.emit(config)
+        return True
+
+    def _watch_file(self) -> None:
+        """Watch the file again if it has been replaced."""
+        if os.path.exists(self.manager.file_path) and self.manager.file_path not in self._watcher.files():
+            self._watcher.addPath(self.manager.file_path)
+
+    def _on_changed(self, path: str) -> None:
+        """Schedule a reload after a file system event.
+
+        Args:
+            path (str): The file or directory that changed.
+        """
+        self._reload_timer.start()
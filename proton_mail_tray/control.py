@@ -0,0 +1,68 @@
+import json
+import logging
+import socket
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+COMMANDS = ('ping', 'toggle', 'status', 'quit', 'stats', 'profile')
+
+# Replies are a single short line, so this only guards against a stuck or foreign server
+MAX_REPLY_BYTES = 64 * 1024
+
+
+def send_command(socket_path: str, command: str, timeout: float = 2.0, **params) -> Optional[dict]:
+    """Send a command to the running tray and wait for its reply.
+
+    Requests and replies are single lines of JSON. This module only uses the standard library, so a command costs no
+    Qt startup.
+
+    Args:
+        socket_path (str): The path of the control socket.
+        command (str): The command, one of COMMANDS.
+        timeout (float): The time to wait for the tray in seconds.
+        **params: The parameters of the command.
+
+    Returns:
+        dict or None: The reply, or None if no tray is listening on the socket.
+    """
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(timeout)
+            sock.connect(socket_path)
+            sock.sendall(json.dumps({'command': command, **params}).encode() + b'\n')
+            data = b''
+            while not data.endswith(b'\n') and len(data) < MAX_REPLY_BYTES:
+                chunk = sock.recv(4096)
+                if not chunk:
+                    break
+                data += chunk
+    except (FileNotFoundError, ConnectionRefusedError):
+        return None
+    except OSError as e:
+        logger.warning(f"Unable to send '{command}' to {socket_path}: {e}")
+        return None
+    try:
+        reply = json.loads(data)
+    except ValueError:
+        logger.warning(f"Invalid reply to '{command}' from {socket_path}: {data[:200]!r}")
+        return None
+    return reply if isinstance(reply, dict) else None
+
+
+def parse_request(line: bytes) -> Optional[dict]:
+    """Read a request line.
+
+    Args:
+        line (bytes): The request, without the trailing newline.
+
+    Returns:
+        dict or None: The request with a 'command' string and any parameters, or None if it is not valid.
+    """
+    try:
+        request = json.loads(line)
+    except ValueError:
+        return None
+    if not isinstance(request, dict) or not isinstance(request.get('command'), str):
+        return None
+    return request
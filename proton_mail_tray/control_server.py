@@ -0,0 +1,129 @@
+import json
+import logging
+import os
+from typing import Callable, Dict, Optional
+
+from PySide6.QtCore import QObject
+from PySide6.QtNetwork import QLocalServer, QLocalSocket
+
+from proton_mail_tray.control import MAX_REPLY_BYTES, parse_request, send_command
+
+logger = logging.getLogger(__name__)
+
+
+class ControlServer(QObject):
+    """Answer commands from later invocations of the tray on a Unix domain socket.
+
+    The socket also enforces a single instance: listen fails while another tray answers on it, and a socket left
+    behind by a tray that crashed is removed. The socket is only accessible to the user.
+
+    Args:
+        socket_path (str): The path of the socket.
+        parent (QObject, optional): The parent object.
+    """
+
+    def __init__(self, socket_path: str, parent: Optional[QObject] = None):
+        super().__init__(parent)
+        self.socket_path = socket_path
+        self.handlers: Dict[str, Callable[..., dict]] = {'ping': lambda: {}}
+        self._buffers: Dict[QLocalSocket, bytes] = {}
+        self._server = QLocalServer(self)
+        self._server.setSocketOptions(QLocalServer.SocketOption.UserAccessOption)
+        self._server.newConnection.connect(self._on_new_connection)
+
+    @property
+    def listening(self) -> bool:
+        """bool: Whether the server is accepting commands."""
+        return self._server.isListening()
+
+    def register(self, command: str, handler: Callable[..., dict]) -> None:
+        """Register the handler of a command.
+
+        Args:
+            command (str): The command.
+            handler (callable): Called on the GUI thread with the request's parameters as keyword arguments, returning
+                the fields to add to the reply.
+        """
+        self.handlers[command] = handler
+
+    def listen(self) -> bool:
+        """Start listening, unless another instance already is.
+
+        QLocalServer replaces an existing socket file when access options are set, so a live instance has to be
+        detected by pinging it first.
+
+        Returns:
+            bool: True if this instance now owns the socket.
+        """
+        if os.path.exists(self.socket_path):
+            if send_command(self.socket_path, 'ping', timeout=0.5) is not None:
+                logger.warning(f"Another instance is listening on {self.socket_path}")
+                return False
+            logger.info(f"Removing stale control socket {self.socket_path}")
+            QLocalServer.removeServer(self.socket_path)
+        if not self._server.listen(self.socket_path):
+            logger.error(f"Unable to listen on {self.socket_path}: {self._server.errorString()}")
+            return False
+        logger.info(f"Listening for commands on {self.socket_path}")
+        return True
+
+    def close(self) -> None:
+        """Stop listening and remove the socket."""
+        self._server.close()
+
+    def _on_new_connection(self) -> None:
+        """Accept pending connections."""
+        while self._server.hasPendingConnections():
+            connection = self._server.nextPendingConnection()
+            self._buffers[connection] = b''
+            connection.readyRead.connect(lambda connection=connection: self._on_ready_read(connection))
+            connection.disconnected.connect(lambda connection=connection: self._on_disconnected(connection))
+
+    def _on_ready_read(self, connection: QLocalSocket) -> None:
+        """Read a request and reply once a full line has arrived.
+
+        Args:
+            connection (QLocalSocket): The client connection.
+        """
+        if connection not in self._buffers:
+            return
+        self._buffers[connection] += connection.readAll().data()
+        data = self._buffers[connection]
+        if b'\n' not in data:
+            if len(data) > MAX_REPLY_BYTES:
+                connection.disconnectFromServer()
+            return
+        reply = self._dispatch(parse_request(data.split(b'\n', 1)[0]))
+        connection.write(json.dumps(reply).encode() + b'\n')
+        connection.flush()
+        connection.disconnectFromServer()
+
+    def _dispatch(self, request: Optional[dict]) -> dict:
+        """Run the handler of a request.
+
+        Args:
+            request (dict or None): The request, or None if it was not valid.
+
+        Returns:
+            dict: The reply.
+        """
+        params = dict(request or {})
+        command = params.pop('command', None)
+        handler = self.handlers.get(command)
+        if handler is None:
+            return {'ok': False, 'error': f"unknown command: {command}"}
+        logger.info(f"Control command: {command}")
+        try:
+            return {'ok': True, **handler(**params)}
+        except Exception as e:
+            logger.exception(f"Control command '{command}' failed: {e}")
+            return {'ok': False, 'error': str(e)}
+
+    def _on_disconnected(self, connection: QLocalSocket) -> None:
+        """Forget a closed connection.
+
+        Args:
+            connection (QLocalSocket): The client connection.
+        """
+        self._buffers.pop(connection, None)
+        connection.deleteLater()
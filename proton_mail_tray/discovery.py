@@ -0,0 +1,316 @@
+import configparser
+import glob
+import json
+import logging
+import os
+import shlex
+import shutil
+from typing import Dict, List, NamedTuple, Optional
+
+from proton_mail_tray.paths import get_app_dir, get_xdg_home, write_json_atomic
+from proton_mail_tray.targets import PROTON_MAIL, Target, load_targets
+
+logger = logging.getLogger(__name__)
+
+OPT_DIR = '/opt'
+SNAP_BIN_DIR = '/snap/bin'
+FLATPAK_EXPORT_DIRS = [os.path.join(get_xdg_home('data'), 'flatpak', 'exports'), '/var/lib/flatpak/exports']
+
+# Candidates from earlier sources are preferred. Native installs come first because they are started directly, so
+# the process the tray starts is the one it looks for in /proc.
+SOURCES = ('standard', 'desktop', 'path', 'opt', 'flatpak', 'snap')
+
+
+class Candidate(NamedTuple):
+    """A possible install of a target.
+
+    Attributes:
+        path (str): The path to the executable.
+        source (str): Where it was found, one of SOURCES.
+    """
+
+    path: str
+    source: str
+
+
+def is_executable(path: str) -> bool:
+    """Check whether a path is an executable file.
+
+    Args:
+        path (str): The path to check.
+
+    Returns:
+        bool: True if the path is a file the user may execute.
+    """
+    return os.path.isfile(path) and os.access(path, os.X_OK)
+
+
+def desktop_dirs() -> List[str]:
+    """List the directories holding .desktop entries, in XDG precedence order.
+
+    Returns:
+        list: The applications directories of the XDG data dirs, Flatpak exports and Snap.
+    """
+    data_dirs = [str(get_xdg_home('data'))]
+    data_dirs += (os.environ.get('XDG_DATA_DIRS') or '/usr/local/share:/usr/share').split(':')
+    data_dirs += [os.path.join(export_dir, 'share') for export_dir in FLATPAK_EXPORT_DIRS]
+    data_dirs.append('/var/lib/snapd/desktop')
+    dirs = []
+    for data_dir in data_dirs:
+        applications = os.path.join(data_dir, 'applications')
+        if data_dir and applications not in dirs:
+            dirs.append(applications)
+    return dirs
+
+
+def read_desktop_exec(file_path: str) -> Optional[List[str]]:
+    """Read the command line of a .desktop entry.
+
+    Args:
+        file_path (str): The path to the .desktop file.
+
+    Returns:
+        list or None: The Exec command split into arguments, without field codes, or None if it has none.
+    """
+    parser = configparser.ConfigParser(interpolation=None, strict=False)
+    try:
+        parser.read(file_path, encoding='utf-8')
+        command = parser.get('Desktop Entry', 'Exec', fallback=None)
+        if not command:
+            return None
+        return [arg for arg in shlex.split(command) if not (len(arg) == 2 and arg.startswith('%'))]
+    except (configparser.Error, UnicodeDecodeError, ValueError) as e:
+        logger.debug(f"Unable to read desktop entry {file_path}: {e}")
+        return None
+
+
+def _executable_from_exec(args: List[str]) -> Optional[Candidate]:
+    """Find the executable a .desktop command line starts.
+
+    Args:
+        args (list): The Exec command split into arguments.
+
+    Returns:
+        Candidate or None: The executable, or None if it could not be resolved.
+    """
+    args = list(args)
+    # Skip an 'env VAR=value ...' prefix
+    if args and os.path.basename(args[0]) == 'env':
+        args.pop(0)
+    while args and '=' in args[0] and not args[0].startswith('/'):
+        args.pop(0)
+    if not args:
+        return None
+
+    if os.path.basename(args[0]) == 'flatpak':
+        # flatpak run [options] <app id> [args]
+        app_id = next((arg for arg in args[2:] if not arg.startswith('-')), None) if args[1:2] == ['run'] else None
+        return _flatpak_launcher(app_id) if app_id else None
+
+    path = args[0] if os.path.isabs(args[0]) else shutil.which(args[0])
+    if path is None or not is_executable(path):
+        return None
+    if path.startswith(SNAP_BIN_DIR + os.sep):
+        return Candidate(path, 'snap')
+    return Candidate(os.path.realpath(path), 'desktop')
+
+
+def _flatpak_launcher(app_id: str) -> Optional[Candidate]:
+    """Find the exported launcher of a Flatpak app.
+
+    Args:
+        app_id (str): The Flatpak app ID.
+
+    Returns:
+        Candidate or None: The launcher, or None if the app is not installed.
+    """
+    for export_dir in FLATPAK_EXPORT_DIRS:
+        path = os.path.join(export_dir, 'bin', app_id)
+        if is_executable(path):
+            return Candidate(path, 'flatpak')
+    return None
+
+
+def find_candidates(target: Target) -> List[Candidate]:
+    """Search every known install location for a target.
+
+    Native executables are resolved to their real path, since the kernel names a process after the file it was
+    started from and a symlink in PATH would not match the target's process name. Flatpak and Snap launchers are
+    kept as they are.
+
+    Args:
+        target (Target): The target to find.
+
+    Returns:
+        list: The candidates without duplicates, best first.
+    """
+    names = [target.process_name] + target.aliases
+    candidates = [Candidate(path, 'standard') for path in target.paths if is_executable(path)]
+
+    for applications in desktop_dirs():
+        for name in names:
+            args = read_desktop_exec(os.path.join(applications, f'{name}.desktop'))
+            candidate = _executable_from_exec(args) if args else None
+            if candidate is not None:
+                candidates.append(candidate)
+
+    for name in names:
+        path = shutil.which(name)
+        if path is not None and not path.startswith(SNAP_BIN_DIR + os.sep):
+            candidates.append(Candidate(os.path.realpath(path), 'path'))
+
+    for path in sorted(glob.glob(os.path.join(glob.escape(OPT_DIR), '*', glob.escape(target.process_name)))):
+        if is_executable(path):
+            candidates.append(Candidate(os.path.realpath(path), 'opt'))
+
+    for name in target.aliases:
+        candidate = _flatpak_launcher(name)
+        if candidate is not None:
+            candidates.append(candidate)
+        path = os.path.join(SNAP_BIN_DIR, name)
+        if is_executable(path):
+            candidates.append(Candidate(path, 'snap'))
+
+    return rank_candidates(target, candidates)
+
+
+def rank_candidates(target: Target, candidates: List[Candidate]) -> List[Candidate]:
+    """Order candidates best first and drop duplicates.
+
+    Executables named after the target's process come first, then candidates are ordered by SOURCES.
+
+    Args:
+        target (Target): The target the candidates are for.
+        candidates (list): The candidates in the order they were found.
+
+    Returns:
+        list: The ranked candidates.
+    """
+    unique = {}
+    for candidate in candidates:
+        unique.setdefault(candidate.path, candidate)
+    return sorted(unique.values(), key=lambda candidate: (os.path.basename(candidate.path) != target.process_name,
+                                                          SOURCES.index(candidate.source)))
+
+
+class DiscoveryCache:
+    """Remember where each target was found, so later startups cost one stat() per target.
+
+    An entry is only trusted while the executable still has the mtime and inode it had when it was found, so an
+    upgrade or uninstall triggers a new search.
+
+    Args:
+        file_path (str): The path to the cache file.
+    """
+
+    def __init__(self, file_path: str):
+        self.file_path = str(file_path)
+        self._entries = None
+
+    def lookup(self, target: Target) -> Optional[str]:
+        """Get the cached path of a target if the executable has not changed.
+
+        Args:
+            target (Target): The target to look up.
+
+        Returns:
+            str or None: The cached path, or None on a miss.
+        """
+        entry = self._load().get(target.key)
+        if not isinstance(entry, dict) or entry.get('process_name') != target.process_name:
+            return None
+        try:
+            stat = os.stat(entry['path'])
+        except (OSError, KeyError, TypeError):
+            return None
+        if [stat.st_mtime_ns, stat.st_ino] != [entry.get('mtime_ns'), entry.get('inode')]:
+            return None
+        return entry['path']
+
+    def store(self, target: Target, candidate: Candidate) -> None:
+        """Cache where a target was found.
+
+        Args:
+            target (Target): The target.
+            candidate (Candidate): The chosen install.
+        """
+        try:
+            stat = os.stat(candidate.path)
+        except OSError:
+            return
+        entries = self._load()
+        entries[target.key] = {'path': candidate.path, 'source': candidate.source,
+                               'process_name': target.process_name,
+                               'mtime_ns': stat.st_mtime_ns, 'inode': stat.st_ino}
+        try:
+            write_json_atomic(self.file_path, entries)
+        except Exception as e:
+            logger.error(f"Unable to save discovery cache to {self.file_path}: {e}")
+
+    def _load(self) -> Dict[str, dict]:
+        """Read the cache file once.
+
+        Returns:
+            dict: The entries keyed by target key.
+        """
+        if self._entries is None:
+            self._entries = {}
+            try:
+                with open(self.file_path, 'r') as f:
+                    entries = json.load(f)
+                if isinstance(entries, dict):
+                    self._entries = entries
+            except (OSError, ValueError):
+                pass
+        return self._entries
+
+
+_cache = None
+
+
+def get_discovery_cache() -> DiscoveryCache:
+    """Get the shared discovery cache in the XDG cache directory.
+
+    Returns:
+        DiscoveryCache: The cache, created on first use.
+    """
+    global _cache
+    if _cache is None:
+        _cache = DiscoveryCache(str(get_app_dir('cache') / 'discovery.json'))
+    return _cache
+
+
+def discover_target_path(target: Target, cache: Optional[DiscoveryCache] = None) -> Optional[str]:
+    """Find where a target is installed, from the cache if the executable is unchanged.
+
+    Args:
+        target (Target): The target to find.
+        cache (DiscoveryCache, optional): The cache to use, the shared one by default.
+
+    Returns:
+        str or None: The path to the target, or None if it could not be found.
+    """
+    cache = cache or get_discovery_cache()
+    path = cache.lookup(target)
+    if path is not None:
+        logger.info(f"Found {target.name} at: {path} (cached)")
+        return path
+
+    logger.info(f"Searching for {target.name}...")
+    candidates = find_candidates(target)
+    if not candidates:
+        logger.info(f"{target.name} not found.")
+        return None
+    logger.info(f"Found {target.name} at: {candidates[0].path} ({candidates[0].source}), "
+                f"{len(candidates) - 1} other candidates")
+    cache.store(target, candidates[0])
+    return candidates[0].path
+
+
+def discover_proton_mail_path() -> Optional[str]:
+    """Find where Proton Mail Beta is installed.
+
+    Returns:
+        str or None: The path to Proton Mail Beta, or None if it could not be found.
+    """
+    return discover_target_path(load_targets({})[PROTON_MAIL])
@@ -0,0 +1,49 @@
+import ctypes
+import gc
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+# Qt settings for low-footprint mode, used unless already set in the environment. The generic platform theme is built
+# into the xcb and wayland plugins, so no theme plugin (and toolkit such as GTK) is loaded, and the tray has no use for
+# OpenGL.
+LOW_FOOTPRINT_ENV = {
+    'QT_QPA_PLATFORMTHEME': 'generic',
+    'QT_XCB_GL_INTEGRATION': 'none',
+}
+
+
+def apply_low_footprint_env() -> None:
+    """Keep Qt from loading the plugins the tray does not need. Call before the QApplication is created."""
+    for variable, value in LOW_FOOTPRINT_ENV.items():
+        os.environ.setdefault(variable, value)
+
+
+def trim_memory() -> None:
+    """Release what startup left behind once the tray is idle.
+
+    Collects garbage, then moves every surviving object to the permanent generation with gc.freeze, so later
+    collections never walk (and write to the pages of) the objects startup created. Finally asks glibc to return free
+    heap pages to the system.
+    """
+    collected = gc.collect()
+    gc.freeze()
+    trimmed = _malloc_trim()
+    logger.info(f"Trimmed memory after startup: {collected} objects collected, {gc.get_freeze_count()} frozen"
+                f"{', heap trimmed' if trimmed else ''}")
+
+
+def _malloc_trim() -> bool:
+    """Call glibc's malloc_trim(0).
+
+    Returns:
+        bool: True if memory was returned to the system, False if it was not or the C library has no malloc_trim.
+    """
+    try:
+        malloc_trim = ctypes.CDLL(None).malloc_trim  # the C library the interpreter is linked against
+    except (OSError, AttributeError):
+        return False
+    malloc_trim.argtypes = [ctypes.c_size_t]
+    malloc_trim.restype = ctypes.c_int
+    return bool(malloc_trim(0))
@@ -0,0 +1,224 @@
+import logging
+import signal
+import time
+from typing import Dict, List, Optional
+
+import psutil
+from PySide6.QtCore import QObject, QTimer, Signal
+
+from proton_mail_tray.utils import (is_process_frozen, signal_process_tree,
+                                    terminate_process)
+from proton_mail_tray.windows import find_windows, set_windows_mapped
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_HIBERNATION_CONFIG = {
+    'enabled': False,
+    'terminate_after_minutes': 30,
+}
+
+
+class Hibernator(QObject):
+    """Freeze Proton Mail on close and terminate it once it has been frozen for too long.
+
+    Freezing sends SIGSTOP to the whole process tree, so a closed Proton Mail uses no CPU and reopens with SIGCONT
+    instead of a cold start. Its windows are unmapped first when xdotool is available, so a frozen window is not left
+    on screen. freeze, thaw and terminate may be called from a worker thread.
+
+    Args:
+        config (dict): The 'hibernation' section of the config.
+        parent (QObject, optional): The parent object.
+
+    Signals:
+        expired (int): Emitted with the PID of a frozen instance once it should be terminated.
+    """
+
+    expired = Signal(int)
+    _timer_requested = Signal(int)
+
+    def __init__(self, config: Optional[dict] = None, parent: Optional[QObject] = None):
+        super().__init__(parent)
+        self.configure(config)
+        self.frozen_pid = None
+        self._frozen_at = None
+        self._frozen_tree = {}
+        self._hidden_windows = []
+
+        self._terminate_timer = QTimer(self)
+        self._terminate_timer.setSingleShot(True)
+        self._terminate_timer.timeout.connect(self._on_terminate_timeout)
+        self._timer_requested.connect(self._on_timer_requested)
+
+    def configure(self, config: Optional[dict]) -> None:
+        """Apply the hibernation settings. An instance that is already frozen keeps its termination time.
+
+        Args:
+            config (dict or None): The 'hibernation' section of the config.
+        """
+        config = {**DEFAULT_HIBERNATION_CONFIG, **(config or {})}
+        self.enabled = bool(config['enabled'])
+        self.terminate_after_ms = int(config['terminate_after_minutes'] * 60 * 1000)
+
+    def is_frozen(self, pid: int) -> bool:
+        """Check whether a PID is frozen.
+
+        Args:
+            pid (int): The PID to check.
+
+        Returns:
+            bool: True if the process is stopped.
+        """
+        return is_process_frozen(pid)
+
+    def freeze(self, pid: int, expire: bool = True, hidden_windows: Optional[List[str]] = None) -> bool:
+        """Hide and freeze a process tree, and schedule its termination.
+
+        Args:
+            pid (int): The PID at the root of the tree.
+            expire (bool): Whether to terminate the tree once it has been frozen for terminate_after_minutes.
+            hidden_windows (list, optional): Windows of the tree that were already unmapped, to map again on thaw.
+
+        Returns:
+            bool: True if the tree was frozen.
+        """
+        self._hide_windows(pid)
+        self._hidden_windows += [window for window in hidden_windows or [] if window not in self._hidden_windows]
+        frozen = signal_process_tree(pid, signal.SIGSTOP)
+        if not frozen:
+            self._show_windows()
+            return False
+        self.frozen_pid = pid
+        self._frozen_at = time.monotonic()
+        self._frozen_tree = self._creation_times(frozen)
+        if expire:
+            self._timer_requested.emit(self.terminate_after_ms)
+            logger.info(f"Proton Mail hibernated: froze {len(frozen)} processes, terminating in "
+                        f"{self.terminate_after_ms // 60000} minutes unless reopened")
+        else:
+            logger.info(f"Proton Mail hibernated: froze {len(frozen)} processes until reopened")
+        return True
+
+    def thaw(self, pid: int) -> bool:
+        """Resume a frozen process tree and show its windows.
+
+        Args:
+            pid (int): The PID at the root of the tree.
+
+        Returns:
+            bool: True if the tree was resumed.
+        """
+        start = time.perf_counter()
+        resumed = signal_process_tree(pid, signal.SIGCONT, parent_first=False)
+        self._show_windows()
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        frozen_for = time.monotonic() - self._frozen_at if self._frozen_at is not None else 0
+        self.forget(pid)
+        if not resumed:
+            return False
+        logger.info(f"Proton Mail reopened from hibernation in {elapsed_ms:.1f} ms "
+                    f"({len(resumed)} processes, frozen for {frozen_for:.0f} s)")
+        return True
+
+    def forget(self, pid: int, exited: bool = False) -> None:
+        """Stop tracking a frozen PID, e.g. because it exited.
+
+        A frozen root that exited on its own (killed by the OOM killer, say) leaves its descendants stopped and
+        reparented to init, out of reach of any later walk of its tree. Those are resumed and sent SIGTERM.
+
+        Args:
+            pid (int): The PID to forget.
+            exited (bool): Whether the process exited while frozen, rather than being thawed or terminated.
+        """
+        if pid == self.frozen_pid:
+            self._timer_requested.emit(-1)
+            if exited:
+                self._terminate_orphans(pid)
+            self.frozen_pid = None
+            self._frozen_at = None
+            self._frozen_tree = {}
+            self._hidden_windows = []
+
+    def terminate(self, pid: int) -> None:
+        """Resume and terminate a frozen process tree.
+
+        The tree is resumed first so its processes can handle SIGTERM and shut down cleanly.
+
+        Args:
+            pid (int): The PID at the root of the tree.
+        """
+        signal_process_tree(pid, signal.SIGCONT, parent_first=False)
+        self.forget(pid)
+        try:
+            terminate_process(psutil.Process(pid))
+        except (psutil.NoSuchProcess, psutil.AccessDenied) as e:
+            logger.exception(f"Failed to terminate hibernated Proton Mail: {e}")
+
+    def _on_timer_requested(self, timeout_ms: int) -> None:
+        """Start the termination timer, or stop it if the timeout is negative, on the GUI thread.
+
+        Args:
+            timeout_ms (int): The timeout in milliseconds.
+        """
+        if timeout_ms < 0:
+            self._terminate_timer.stop()
+        else:
+            self._terminate_timer.start(timeout_ms)
+
+    def _on_terminate_timeout(self) -> None:
+        """Report that the frozen instance has been frozen for too long."""
+        if self.frozen_pid is not None:
+            logger.info(f"Proton Mail has been frozen for {self.terminate_after_ms // 60000} minutes, terminating")
+            self.expired.emit(self.frozen_pid)
+
+    def _terminate_orphans(self, pid: int) -> None:
+        """Resume and send SIGTERM to the processes frozen with a root that has exited.
+
+        Args:
+            pid (int): The PID of the exited root.
+        """
+        orphans = []
+        for tree_pid, create_time in self._frozen_tree.items():
+            if tree_pid == pid:
+                continue
+            try:
+                process = psutil.Process(tree_pid)
+                if process.create_time() == create_time:  # not a new process that reused the PID
+                    process.send_signal(signal.SIGCONT)
+                    process.terminate()
+                    orphans.append(tree_pid)
+            except (psutil.NoSuchProcess, psutil.AccessDenied):
+                pass
+        if orphans:
+            logger.warning(f"Frozen Proton Mail {pid} exited, terminating {len(orphans)} processes left frozen")
+
+    @staticmethod
+    def _creation_times(pids: List[int]) -> Dict[int, float]:
+        """Read the creation times of processes, to tell them apart from later processes with the same PIDs.
+
+        Args:
+            pids (list): The PIDs.
+
+        Returns:
+            dict: The creation time of each PID that still exists.
+        """
+        creation_times = {}
+        for pid in pids:
+            try:
+                creation_times[pid] = psutil.Process(pid).create_time()
+            except (psutil.NoSuchProcess, psutil.AccessDenied):
+                pass
+        return creation_times
+
+    def _hide_windows(self, pid: int) -> None:
+        """Unmap the visible X11 windows of a process, if possible.
+
+        Args:
+            pid (int): The PID that owns the windows.
+        """
+        self._hidden_windows = find_windows(pid) or []
+        set_windows_mapped(self._hidden_windows, False)
+
+    def _show_windows(self) -> None:
+        """Map the windows hidden by the last freeze."""
+        set_windows_mapped(self._hidden_windows, True)
+        self._hidden_windows = []
@@ -0,0 +1,426 @@
+import csv
+import json
+import logging
+import math
+import mmap
+import os
+import re
+import struct
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import IO, List, NamedTuple, Optional, Sequence
+
+from PySide6.QtCore import QObject, QTimer, Signal
+
+from proton_mail_tray.lazy import lazy_import
+
+# Only the recorder samples the tree, so exporting the history does not load psutil
+telemetry = lazy_import('proton_mail_tray.telemetry')
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b'PMTH'
+VERSION = 1
+
+# Magic, version, record size, capacity and the number of records ever written, padded to 32 bytes
+HEADER = struct.Struct('<4sHHIQ12x')
+# Unix time, tree RSS in bytes, CPU percent (100 is one full core) and process count, padded to 24 bytes
+RECORD = struct.Struct('<dQfH2x')
+
+DEFAULT_HISTORY_CONFIG = {
+    'enabled': True,
+    'interval_seconds': 300,
+    'days': 30,
+}
+
+SPARK_BLOCKS = '▁▂▃▄▅▆▇█'
+
+DURATION_UNITS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400, 'w': 604800}
+
+
+class HistoryRecord(NamedTuple):
+    """Resource usage of the Proton Mail process tree at one point in time.
+
+    Attributes:
+        timestamp (float): When the sample was taken, as Unix time.
+        rss (int): The total resident set size in bytes.
+        cpu_percent (float): CPU use since the previous sample, where 100 is one full core.
+        processes (int): The number of processes in the tree.
+    """
+
+    timestamp: float
+    rss: int
+    cpu_percent: float
+    processes: int
+
+
+class HistoryFile:
+    """A fixed-size ring of HistoryRecords in a memory-mapped file.
+
+    The file is a header followed by capacity fixed-size slots. Each record overwrites the oldest slot, so the file
+    never grows and never needs rotating, and an append is a copy into the mapping plus an update of the record count
+    in the header, written after the record. Writes reach the disk through the page cache like any other dirty page.
+
+    An existing file is reused. If it was made with a different capacity, its most recent records are copied into a
+    new file, and a file that is not a history file (or is damaged) is replaced.
+
+    Args:
+        path (str): The path of the file.
+        capacity (int, optional): The number of records to keep. Without it the file is opened read-only, with the
+            capacity it was made with.
+
+    Raises:
+        OSError: If the file cannot be opened or created.
+        ValueError: If a file opened read-only is not a valid history file.
+    """
+
+    def __init__(self, path: str, capacity: Optional[int] = None):
+        self.path = path
+        self.read_only = capacity is None
+        if self.read_only:
+            with open(path, 'rb') as f:
+                self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            if self._read_header() is None:
+                self._mmap.close()
+                raise ValueError(f"{path} is not a resource history file")
+            self.capacity = self._read_header()[0]
+            return
+
+        self.capacity = capacity
+        previous = self._read_existing(path)
+        if previous is not None and previous[0] == capacity:
+            self._mmap = self._map(path)
+            return
+        self._create(path)
+        self._mmap = self._map(path)
+        if previous is not None:
+            for record in previous[1][-capacity:]:
+                self.append(record)
+            logger.info(f"Resized resource history {path} from {previous[0]} to {capacity} records")
+
+    def __len__(self) -> int:
+        return min(self.count, self.capacity)
+
+    @property
+    def count(self) -> int:
+        """int: The number of records ever written."""
+        return HEADER.unpack_from(self._mmap, 0)[4]
+
+    def append(self, record: HistoryRecord) -> None:
+        """Write a record over the oldest one.
+
+        Args:
+            record (HistoryRecord): The record.
+        """
+        count = self.count
+        RECORD.pack_into(self._mmap, HEADER.size + (count % self.capacity) * RECORD.size, record.timestamp,
+                         record.rss, record.cpu_percent, min(record.processes, 0xffff))
+        HEADER.pack_into(self._mmap, 0, MAGIC, VERSION, RECORD.size, self.capacity, count + 1)
+
+    def records(self, since: Optional[float] = None, until: Optional[float] = None) -> List[HistoryRecord]:
+        """Read the records, oldest first.
+
+        Args:
+            since (float, optional): Leave out records before this Unix time.
+            until (float, optional): Leave out records after this Unix time.
+
+        Returns:
+            list: The HistoryRecords.
+        """
+        records = self.tail(len(self))
+        if since is not None or until is not None:
+            since = float('-inf') if since is None else since
+            until = float('inf') if until is None else until
+            records = [record for record in records if since <= record.timestamp <= until]
+        return records
+
+    def tail(self, limit: int) -> List[HistoryRecord]:
+        """Read the most recent records, oldest first.
+
+        Args:
+            limit (int): The number of records.
+
+        Returns:
+            list: Up to limit HistoryRecords.
+        """
+        count = self.count
+        length = min(limit, count, self.capacity)
+        if length <= 0:
+            return []
+        first = (count - length) % self.capacity
+        end = first + length
+        data = self._mmap[HEADER.size + first * RECORD.size:HEADER.size + min(end, self.capacity) * RECORD.size]
+        if end > self.capacity:
+            data += self._mmap[HEADER.size:HEADER.size + (end - self.capacity) * RECORD.size]
+        return [HistoryRecord(*values) for values in RECORD.iter_unpack(data)]
+
+    def close(self) -> None:
+        """Unmap the file."""
+        self._mmap.close()
+
+    def _read_header(self) -> Optional[tuple]:
+        """Check the header of the mapped file.
+
+        Returns:
+            tuple or None: The capacity and record count, or None if this is not a valid history file.
+        """
+        if len(self._mmap) < HEADER.size:
+            return None
+        magic, version, record_size, capacity, count = HEADER.unpack_from(self._mmap, 0)
+        if (magic != MAGIC or version != VERSION or record_size != RECORD.size or capacity == 0
+                or len(self._mmap) != HEADER.size + capacity * RECORD.size):
+            return None
+        return capacity, count
+
+    def _read_existing(self, path: str) -> Optional[tuple]:
+        """Read the capacity and records of an existing file.
+
+        Args:
+            path (str): The path of the file.
+
+        Returns:
+            tuple or None: The capacity and records, or None if there is no valid history file.
+        """
+        try:
+            existing = HistoryFile(path)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logger.warning(f"Replacing unreadable resource history {path}: {e}")
+            return None
+        try:
+            return existing.capacity, existing.records()
+        finally:
+            existing.close()
+
+    def _create(self, path: str) -> None:
+        """Create an empty file with room for capacity records.
+
+        Args:
+            path (str): The path of the file.
+        """
+        tmp_path = f'{path}.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(HEADER.pack(MAGIC, VERSION, RECORD.size, self.capacity, 0))
+            f.truncate(HEADER.size + self.capacity * RECORD.size)
+        os.replace(tmp_path, path)
+
+    @staticmethod
+    def _map(path: str) -> mmap.mmap:
+        """Map a file for writing.
+
+        Args:
+            path (str): The path of the file.
+
+        Returns:
+            mmap.mmap: The mapping.
+        """
+        with open(path, 'r+b') as f:
+            return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_WRITE)
+
+
+class HistoryRecorder(QObject):
+    """Keep a long-term history of Proton Mail's resource usage in a HistoryFile.
+
+    While a PID is set, the tree's RSS, CPU use and process count are sampled on a worker thread every interval and
+    appended to the file, which holds days worth of samples and then wraps around. Sampling skips PSS, and the file is
+    only opened once there is a sample to write, so the recorder costs one read of /proc/<pid>/stat per process every
+    few minutes.
+
+    Args:
+        path (str): The path of the history file.
+        config (dict, optional): The 'history' section of the config.
+        parent (QObject, optional): The parent object.
+    """
+
+    _sample_ready = Signal(object)
+
+    def __init__(self, path: str, config: Optional[dict] = None, parent: Optional[QObject] = None):
+        super().__init__(parent)
+        self.path = path
+        self.pid = None
+        self.history = None
+        self.capacity = None
+        self._sampler = telemetry.TreeSampler(include_pss=False)
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='history recorder')
+        self._in_flight = False
+
+        self._timer = QTimer(self)
+        self._timer.timeout.connect(self._sample)
+        self._sample_ready.connect(self._on_sample_ready)
+        self.configure(config)
+
+    def configure(self, config: Optional[dict]) -> None:
+        """Apply the history settings. A new size takes effect when the next sample is written.
+
+        Args:
+            config (dict or None): The 'history' section of the config.
+        """
+        config = {**DEFAULT_HISTORY_CONFIG, **(config or {})}
+        self.enabled = bool(config['enabled'])
+        interval = float(config['interval_seconds'])
+        capacity = max(math.ceil(float(config['days']) * 86400 / interval), 1)
+        if capacity != self.capacity:
+            self.capacity = capacity
+            self._close()
+        self._timer.setInterval(int(interval * 1000))
+        self._update_timer()
+
+    def set_pid(self, pid: Optional[int]) -> None:
+        """Set the PID of the running Proton Mail, or None to stop recording.
+
+        Args:
+            pid (int or None): The PID of Proton Mail.
+        """
+        if pid == self.pid:
+            return
+        self.pid = pid
+        self._update_timer()
+        if self._timer.isActive():
+            self._sample()  # sets the CPU baseline for the first record
+
+    def recent(self, seconds: float) -> List[HistoryRecord]:
+        """Read the records of the last few seconds.
+
+        Args:
+            seconds (float): How far back to go.
+
+        Returns:
+            list: The HistoryRecords, oldest first, or an empty list if nothing has been recorded yet.
+        """
+        if self.history is None:
+            return []
+        since = time.time() - seconds
+        # Only read as many records as the interval allows for, not the whole file
+        limit = math.ceil(seconds * 1000 / max(self._timer.interval(), 1)) + 1
+        return [record for record in self.history.tail(limit) if record.timestamp >= since]
+
+    def shutdown(self) -> None:
+        """Stop recording, the worker thread and unmap the file."""
+        self._timer.stop()
+        self._executor.shutdown(wait=True)
+        self._close()
+
+    def _update_timer(self) -> None:
+        """Run the timer while recording is enabled and Proton Mail is running."""
+        if self.enabled and self.pid is not None:
+            if not self._timer.isActive():
+                self._timer.start()
+        else:
+            self._timer.stop()
+
+    def _close(self) -> None:
+        """Unmap the history file, to be reopened with the current capacity."""
+        if self.history is not None:
+            self.history.close()
+            self.history = None
+
+    def _sample(self) -> None:
+        """Sample the tree on the worker thread."""
+        if self._in_flight or self.pid is None:
+            return
+        self._in_flight = True
+        self._executor.submit(self._sample_in_worker, self.pid)
+
+    def _sample_in_worker(self, pid: int) -> None:
+        """Take a sample and post it to the GUI thread.
+
+        Args:
+            pid (int): The PID at the root of the tree.
+        """
+        try:
+            sample = self._sampler.sample(pid)
+        except Exception as e:
+            logger.exception(f"Failed to sample process tree of {pid}: {e}")
+            sample = None
+        self._sample_ready.emit(sample)
+
+    def _on_sample_ready(self, sample: Optional['telemetry.TreeSample']) -> None:
+        """Append a sample to the history file, opening it first if needed.
+
+        Args:
+            sample (TreeSample or None): The sample.
+        """
+        self._in_flight = False
+        if sample is None or sample.pid != self.pid or sample.cpu_percent is None or not self.enabled:
+            return
+        if self.history is None:
+            try:
+                self.history = HistoryFile(self.path, self.capacity)
+            except OSError as e:
+                logger.warning(f"Unable to open resource history {self.path}, not recording: {e}")
+                self.enabled = False
+                self._update_timer()
+                return
+        self.history.append(HistoryRecord(time.time(), sample.rss, sample.cpu_percent, sample.processes))
+
+
+def parse_time(value: str, now: Optional[float] = None) -> float:
+    """Parse a point in time given as a duration before now ('90m', '24h', '7d') or an ISO 8601 date.
+
+    Args:
+        value (str): The value.
+        now (float, optional): The current Unix time, time.time() by default.
+
+    Returns:
+        float: The Unix time.
+
+    Raises:
+        ValueError: If the value is neither.
+    """
+    match = re.fullmatch(r'(\d+(?:\.\d+)?)([smhdw])', value.strip())
+    if match:
+        now = time.time() if now is None else now
+        return now - float(match.group(1)) * DURATION_UNITS[match.group(2)]
+    return datetime.fromisoformat(value).timestamp()
+
+
+def write_csv(records: Sequence[HistoryRecord], stream: IO[str]) -> None:
+    """Write records as CSV with a header row, timestamps in ISO 8601.
+
+    Args:
+        records (list): The HistoryRecords.
+        stream (file): The text stream to write to.
+    """
+    writer = csv.writer(stream)
+    writer.writerow(['time', 'rss_bytes', 'cpu_percent', 'processes'])
+    for record in records:
+        writer.writerow([datetime.fromtimestamp(record.timestamp).isoformat(timespec='seconds'), record.rss,
+                         f'{record.cpu_percent:.1f}', record.processes])
+
+
+def write_json(records: Sequence[HistoryRecord], stream: IO[str]) -> None:
+    """Write records as a JSON array of objects.
+
+    Args:
+        records (list): The HistoryRecords.
+        stream (file): The text stream to write to.
+    """
+    json.dump([{'time': datetime.fromtimestamp(record.timestamp).isoformat(timespec='seconds'),
+                'timestamp': record.timestamp, 'rss_bytes': record.rss,
+                'cpu_percent': round(record.cpu_percent, 1), 'processes': record.processes}
+               for record in records], stream, indent=4)
+    stream.write('\n')
+
+
+def sparkline(values: Sequence[float], width: int = 24) -> str:
+    """Draw values as a line of block characters, scaled between their minimum and maximum.
+
+    With more values than width, each character shows the largest value of its share.
+
+    Args:
+        values (list): The values, oldest first.
+        width (int): The maximum number of characters.
+
+    Returns:
+        str: The sparkline, empty without values.
+    """
+    if len(values) > width:
+        buckets = [values[len(values) * i // width:len(values) * (i + 1) // width] for i in range(width)]
+        values = [max(bucket) for bucket in buckets]
+    if not values:
+        return ''
+    low, high = min(values), max(values)
+    span = (high - low) or 1
+    return ''.join(SPARK_BLOCKS[round((value - low) / span * (len(SPARK_BLOCKS) - 1))] for value in values)
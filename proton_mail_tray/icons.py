@@ -0,0 +1,148 @@
+import logging
+from typing import Dict, Iterable, Optional, Tuple
+
+from PySide6.QtCore import QRectF
+from PySide6.QtGui import QColor, QGuiApplication, QIcon, QImage, QPainter, QPen, QPixmap
+
+logger = logging.getLogger(__name__)
+
+# The badge drawn over the icon for each state, None for the plain icon
+STATE_BADGES = {
+    'stopped': None,
+    'starting': QColor('#f0a020'),
+    'running': QColor('#2bb24c'),
+    'frozen': QColor('#3d8bfd'),
+    'error': QColor('#dc3545'),
+}
+
+# The sizes tray hosts ask for, in device-independent pixels
+ICON_SIZES = (16, 22, 24, 32, 48, 64)
+
+# The badge diameter as a share of the icon size
+BADGE_SCALE = 0.45
+
+
+class StateIcons:
+    """Render the tray icon for each state and keep the results.
+
+    The base image is read once. Each state's pixmap is rendered the first time a size and device pixel ratio is asked
+    for, from a scaled copy of the base image that is shared by all states, and kept for the life of the tray. So a
+    state change only swaps in a cached QIcon instead of painting or reading the PNG again.
+
+    Args:
+        icon_path (str): The path of the base icon.
+        sizes (iterable, optional): The icon sizes to render, in device-independent pixels.
+        device_pixel_ratios (iterable, optional): The ratios to render for, those of the screens by default.
+    """
+
+    def __init__(self, icon_path: str, sizes: Iterable[int] = ICON_SIZES,
+                 device_pixel_ratios: Optional[Iterable[float]] = None):
+        self.sizes = tuple(sizes)
+        self._device_pixel_ratios = tuple(device_pixel_ratios) if device_pixel_ratios is not None else None
+        self.base = QImage(icon_path)
+        if self.base.isNull():
+            logger.warning(f"Unable to find Proton Mail Tray icon at: {icon_path}")
+        self.renders = 0
+        self._scaled: Dict[int, QImage] = {}
+        self._pixmaps: Dict[Tuple[str, int, float], QPixmap] = {}
+        self._icons: Dict[str, QIcon] = {}
+
+    @property
+    def device_pixel_ratios(self) -> Tuple[float, ...]:
+        """tuple: The device pixel ratios to render for."""
+        if self._device_pixel_ratios is not None:
+            return self._device_pixel_ratios
+        ratios = {1.0} | {screen.devicePixelRatio() for screen in QGuiApplication.screens()}
+        return tuple(sorted(ratios))
+
+    def icon(self, state: str) -> QIcon:
+        """Get the icon for a state, rendering it on first use.
+
+        Args:
+            state (str): One of STATE_BADGES.
+
+        Returns:
+            QIcon: The icon, with a pixmap for every size and device pixel ratio.
+        """
+        icon = self._icons.get(state)
+        if icon is None:
+            icon = QIcon()
+            for device_pixel_ratio in self.device_pixel_ratios:
+                for size in self.sizes:
+                    icon.addPixmap(self.pixmap(state, size, device_pixel_ratio))
+            self._icons[state] = icon
+        return icon
+
+    def pixmap(self, state: str, size: int, device_pixel_ratio: float = 1.0) -> QPixmap:
+        """Get the pixmap for a state at one size, rendering it on first use.
+
+        Args:
+            state (str): One of STATE_BADGES.
+            size (int): The size in device-independent pixels.
+            device_pixel_ratio (float): The device pixel ratio.
+
+        Returns:
+            QPixmap: The pixmap, size × device_pixel_ratio pixels wide.
+        """
+        key = (state, size, device_pixel_ratio)
+        pixmap = self._pixmaps.get(key)
+        if pixmap is None:
+            pixmap = self._render(STATE_BADGES[state], size, device_pixel_ratio)
+            self._pixmaps[key] = pixmap
+        return pixmap
+
+    def _render(self, badge: Optional[QColor], size: int, device_pixel_ratio: float) -> QPixmap:
+        """Paint the base image with a state badge in the bottom right corner.
+
+        Args:
+            badge (QColor or None): The badge colour, None for no badge.
+            size (int): The size in device-independent pixels.
+            device_pixel_ratio (float): The device pixel ratio.
+
+        Returns:
+            QPixmap: The rendered pixmap.
+        """
+        self.renders += 1
+        pixels = round(size * device_pixel_ratio)
+        image = QImage(pixels, pixels, QImage.Format.Format_ARGB32_Premultiplied)
+        image.fill(0)  # transparent
+        painter = QPainter(image)
+        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+        painter.setRenderHint(QPainter.RenderHint.SmoothPixmapTransform)
+        if not self.base.isNull():
+            painter.drawImage(0, 0, self._scaled_base(pixels))
+        if badge is not None:
+            diameter = pixels * BADGE_SCALE
+            outline = max(pixels / 16, 1.0)
+            painter.setPen(QPen(QColor('white'), outline))
+            painter.setBrush(badge)
+            painter.drawEllipse(QRectF(pixels - diameter - outline / 2, pixels - diameter - outline / 2,
+                                       diameter, diameter))
+        painter.end()
+
+        pixmap = QPixmap.fromImage(image)
+        pixmap.setDevicePixelRatio(device_pixel_ratio)
+        return pixmap
+
+    def _scaled_base(self, pixels: int) -> QImage:
+        """Get the base image scaled to a size, shared by every state.
+
+        Args:
+            pixels (int): The size in device pixels.
+
+        Returns:
+            QImage: The scaled image.
+        """
+        scaled = self._scaled.get(pixels)
+        if scaled is None:
+            # Painted rather than QImage.scaled, which needs the Qt namespace: that alone takes tens of ms to import
+            scale = pixels / max(self.base.width(), self.base.height())
+            width, height = self.base.width() * scale, self.base.height() * scale
+            scaled = QImage(pixels, pixels, QImage.Format.Format_ARGB32_Premultiplied)
+            scaled.fill(0)
+            painter = QPainter(scaled)
+            painter.setRenderHint(QPainter.RenderHint.SmoothPixmapTransform)
+            painter.drawImage(QRectF((pixels - width) / 2, (pixels - height) / 2, width, height), self.base)
+            painter.end()
+            self._scaled[pixels] = scaled
+        return scaled
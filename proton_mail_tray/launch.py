@@ -0,0 +1,313 @@
+import logging
+import os
+import resource
+import subprocess
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+import psutil
+
+from proton_mail_tray.utils import process_tree_pids
+
+logger = logging.getLogger(__name__)
+
+CGROUP_ROOT = '/sys/fs/cgroup'
+
+DEFAULT_PROFILE = 'interactive'
+
+# 'interactive' leaves Proton Mail as it would be started from the desktop. 'background' suits an instance that mostly
+# syncs: it yields CPU and disk to everything else and is the first to go when memory runs out. It has no Electron
+# flags, since those are fixed at launch and would stay with a pre-launched instance once it is opened.
+DEFAULT_PROFILES = {
+    'interactive': {},
+    'background': {
+        'nice': 10,
+        'ionice': 'idle',
+        'oom_score_adj': 500,
+    },
+}
+
+# The priorities of a process started without a profile, restored for the settings a profile leaves unset
+PLAIN_PRIORITIES = {'nice': 0, 'ionice': 'best-effort', 'ionice_level': 4, 'oom_score_adj': 0}
+
+IONICE_CLASSES = {
+    'realtime': psutil.IOPRIO_CLASS_RT,
+    'best-effort': psutil.IOPRIO_CLASS_BE,
+    'idle': psutil.IOPRIO_CLASS_IDLE,
+}
+
+RLIMITS = {
+    'as': resource.RLIMIT_AS,
+    'core': resource.RLIMIT_CORE,
+    'data': resource.RLIMIT_DATA,
+    'memlock': resource.RLIMIT_MEMLOCK,
+    'nofile': resource.RLIMIT_NOFILE,
+    'nproc': resource.RLIMIT_NPROC,
+}
+
+
+@dataclass(frozen=True)
+class LaunchProfile:
+    """How to run an application: its priorities, limits and extra command-line flags.
+
+    Attributes:
+        name (str): The profile name used in the config file.
+        nice (int or None): The nice value, from -20 to 19.
+        ionice (str or None): The I/O scheduling class: 'realtime', 'best-effort' or 'idle'.
+        ionice_level (int or None): The priority within the realtime or best-effort class, from 0 to 7.
+        cpu_affinity (list): The CPUs to run on, or empty for all of them.
+        oom_score_adj (int or None): The OOM killer adjustment, from -1000 to 1000.
+        rlimits (dict): Resource limits by name ('as', 'core', 'data', 'memlock', 'nofile', 'nproc'), each a soft
+            limit or [soft, hard].
+        electron_flags (list): Extra command-line flags, e.g. Chromium's --renderer-process-limit.
+        memory_high_mb (int or None): The cgroup v2 memory.high throttling limit, where cgroups are delegated.
+    """
+
+    name: str
+    nice: Optional[int] = None
+    ionice: Optional[str] = None
+    ionice_level: Optional[int] = None
+    cpu_affinity: List[int] = field(default_factory=list)
+    oom_score_adj: Optional[int] = None
+    rlimits: Dict[str, object] = field(default_factory=dict)
+    electron_flags: List[str] = field(default_factory=list)
+    memory_high_mb: Optional[int] = None
+
+    def describe(self) -> str:
+        """Summarize the settings of the profile for the log.
+
+        Returns:
+            str: The settings that differ from a plain launch.
+        """
+        settings = []
+        if self.nice is not None:
+            settings.append(f"nice {self.nice}")
+        if self.ionice is not None:
+            settings.append(f"ionice {self.ionice}" + (f"/{self.ionice_level}" if self.ionice_level is not None else ""))
+        if self.cpu_affinity:
+            settings.append(f"CPUs {','.join(str(cpu) for cpu in self.cpu_affinity)}")
+        if self.oom_score_adj is not None:
+            settings.append(f"oom_score_adj {self.oom_score_adj}")
+        settings += [f"rlimit {name} {limit}" for name, limit in self.rlimits.items()]
+        if self.memory_high_mb is not None:
+            settings.append(f"memory.high {self.memory_high_mb} MB")
+        if self.electron_flags:
+            settings.append(f"flags {' '.join(self.electron_flags)}")
+        return ', '.join(settings) or 'defaults'
+
+
+def load_profiles(config: dict) -> Dict[str, LaunchProfile]:
+    """Build the launch profiles from the defaults and the 'launch.profiles' section of the config.
+
+    Entries in the config override the matching default field by field, and unknown names add new profiles.
+
+    Args:
+        config (dict): The configuration.
+
+    Returns:
+        dict: The profiles, keyed by name.
+    """
+    overrides = config.get('launch', {}).get('profiles', {})
+    profiles = {}
+    for name in list(DEFAULT_PROFILES) + [name for name in overrides if name not in DEFAULT_PROFILES]:
+        entry = {**DEFAULT_PROFILES.get(name, {}), **overrides.get(name, {})}
+        if entry.get('ionice') is not None and entry['ionice'] not in IONICE_CLASSES:
+            logger.warning(f"Ignoring unknown ionice class '{entry['ionice']}' of launch profile '{name}'")
+            entry['ionice'] = None
+        unknown = set(entry.get('rlimits', {})) - set(RLIMITS)
+        if unknown:
+            logger.warning(f"Ignoring unknown rlimits {sorted(unknown)} of launch profile '{name}'")
+        profiles[name] = LaunchProfile(name=name,
+                                       nice=entry.get('nice'),
+                                       ionice=entry.get('ionice'),
+                                       ionice_level=entry.get('ionice_level'),
+                                       cpu_affinity=list(entry.get('cpu_affinity', [])),
+                                       oom_score_adj=entry.get('oom_score_adj'),
+                                       rlimits={key: value for key, value in entry.get('rlimits', {}).items()
+                                                if key in RLIMITS},
+                                       electron_flags=list(entry.get('electron_flags', [])),
+                                       memory_high_mb=entry.get('memory_high_mb'))
+    return profiles
+
+
+def get_profile(profiles: Dict[str, LaunchProfile], name: Optional[str]) -> LaunchProfile:
+    """Look up a profile by name, falling back to the interactive profile.
+
+    Args:
+        profiles (dict): The profiles from load_profiles.
+        name (str or None): The profile name.
+
+    Returns:
+        LaunchProfile: The profile.
+    """
+    if name is not None and name not in profiles:
+        logger.warning(f"Unknown launch profile '{name}', using '{DEFAULT_PROFILE}'")
+    return profiles.get(name) or profiles.get(DEFAULT_PROFILE) or LaunchProfile(DEFAULT_PROFILE)
+
+
+def find_cgroup_parent(proc_root: str = '/proc', cgroup_root: str = CGROUP_ROOT) -> Optional[str]:
+    """Find a cgroup v2 directory we may create child groups with a memory controller in.
+
+    That is the parent of our own cgroup, e.g. app.slice under systemd's delegated user@.service, if it is writable
+    and has the memory controller enabled for its children.
+
+    Args:
+        proc_root (str): The mount point of procfs.
+        cgroup_root (str): The mount point of the cgroup v2 hierarchy.
+
+    Returns:
+        str or None: The directory, or None without a delegated cgroup v2 memory controller.
+    """
+    try:
+        with open(f'{proc_root}/self/cgroup') as f:
+            lines = f.read().splitlines()
+        own = next(line[3:] for line in lines if line.startswith('0::'))
+        parent = os.path.dirname(os.path.join(cgroup_root, own.lstrip('/')).rstrip('/'))
+        with open(os.path.join(parent, 'cgroup.subtree_control')) as f:
+            controllers = f.read().split()
+    except (OSError, StopIteration):
+        return None
+    if 'memory' not in controllers or not os.access(parent, os.W_OK):
+        return None
+    return parent
+
+
+def create_cgroup(name: str, memory_high: int, parent: Optional[str] = None) -> Optional[str]:
+    """Create (or reuse) a cgroup with a memory.high limit for a launch profile.
+
+    Args:
+        name (str): The profile name.
+        memory_high (int): The memory.high limit in bytes.
+        parent (str, optional): The parent cgroup directory, found with find_cgroup_parent by default.
+
+    Returns:
+        str or None: The cgroup directory, or None if cgroups are not delegated to us.
+    """
+    parent = parent or find_cgroup_parent()
+    if parent is None:
+        return None
+    path = os.path.join(parent, f'proton-mail-tray-{name}')
+    try:
+        os.makedirs(path, exist_ok=True)
+        with open(os.path.join(path, 'memory.high'), 'w') as f:
+            f.write(str(memory_high))
+    except OSError as e:
+        logger.debug(f"Failed to set up cgroup {path}: {e}")
+        return None
+    return path
+
+
+def apply_profile(pid: int, profile: LaunchProfile, cgroup_parent: Optional[str] = None) -> Dict[str, str]:
+    """Apply a profile to a running process tree.
+
+    Every process already in the tree is updated, and the processes it starts later inherit the settings. Each
+    setting is applied on its own, so one that is not permitted (e.g. a negative nice value without privileges) does
+    not stop the others.
+
+    Args:
+        pid (int): The PID at the root of the tree.
+        profile (LaunchProfile): The profile to apply.
+        cgroup_parent (str, optional): The parent cgroup directory, found with find_cgroup_parent by default.
+
+    Returns:
+        dict: 'ok' or the error for each setting applied.
+    """
+    results = {}
+
+    def apply(setting: str, function) -> None:
+        errors = []
+        for tree_pid in process_tree_pids(pid):
+            try:
+                function(tree_pid)
+            except (OSError, ValueError, psutil.Error) as e:
+                errors.append(f"{tree_pid}: {e}")
+        results[setting] = '; '.join(errors) if errors else 'ok'
+
+    def set_oom_score_adj(tree_pid: int) -> None:
+        with open(f'/proc/{tree_pid}/oom_score_adj', 'w') as f:
+            f.write(str(profile.oom_score_adj))
+
+    def set_rlimits(tree_pid: int) -> None:
+        for name, limit in profile.rlimits.items():
+            soft, hard = limit if isinstance(limit, list) else (limit, psutil.Process(tree_pid).rlimit(RLIMITS[name])[1])
+            psutil.Process(tree_pid).rlimit(RLIMITS[name], (soft, hard))
+
+    if profile.nice is not None:
+        apply('nice', lambda tree_pid: psutil.Process(tree_pid).nice(profile.nice))
+    if profile.ionice is not None:
+        ionice_class = IONICE_CLASSES[profile.ionice]
+        level = profile.ionice_level if ionice_class != psutil.IOPRIO_CLASS_IDLE else None
+        apply('ionice', lambda tree_pid: psutil.Process(tree_pid).ionice(ionice_class, level))
+    if profile.cpu_affinity:
+        apply('cpu_affinity', lambda tree_pid: psutil.Process(tree_pid).cpu_affinity(profile.cpu_affinity))
+    if profile.oom_score_adj is not None:
+        apply('oom_score_adj', set_oom_score_adj)
+    if profile.rlimits:
+        apply('rlimits', set_rlimits)
+    if profile.memory_high_mb is not None:
+        cgroup = create_cgroup(profile.name, profile.memory_high_mb * 1024 * 1024, cgroup_parent)
+        if cgroup is None:
+            results['memory_high'] = 'no delegated cgroup v2 memory controller'
+        else:
+            def join_cgroup(tree_pid: int) -> None:
+                with open(os.path.join(cgroup, 'cgroup.procs'), 'w') as f:
+                    f.write(str(tree_pid))
+            apply('memory_high', join_cgroup)
+    return results
+
+
+def restore_priorities(pid: int, profile: LaunchProfile) -> Dict[str, str]:
+    """Give a running process tree the priorities of a profile, e.g. when a pre-launched instance is opened.
+
+    Only the nice value, I/O priority and oom_score_adj are changed. A setting the profile leaves unset goes back to
+    what a plain launch gets. Electron flags only take effect at launch, and limits and cgroups are left as they are.
+
+    Args:
+        pid (int): The PID at the root of the tree.
+        profile (LaunchProfile): The profile.
+
+    Returns:
+        dict: 'ok' or the error for each setting applied.
+    """
+    if profile.ionice is not None:
+        ionice, ionice_level = profile.ionice, profile.ionice_level
+    else:
+        ionice, ionice_level = PLAIN_PRIORITIES['ionice'], PLAIN_PRIORITIES['ionice_level']
+    priorities = LaunchProfile(
+        profile.name,
+        nice=profile.nice if profile.nice is not None else PLAIN_PRIORITIES['nice'],
+        ionice=ionice,
+        ionice_level=ionice_level,
+        oom_score_adj=profile.oom_score_adj if profile.oom_score_adj is not None else PLAIN_PRIORITIES['oom_score_adj'])
+    results = apply_profile(pid, priorities)
+    logger.info(f"Moved PID {pid} to the priorities of profile '{profile.name}': {priorities.describe()}")
+    for setting, error in results.items():
+        if error != 'ok':
+            logger.warning(f"Launch profile '{profile.name}': could not restore {setting}: {error}")
+    return results
+
+
+def launch(path: str, profile: LaunchProfile) -> subprocess.Popen:
+    """Start an application with a launch profile and log what was applied.
+
+    The settings are applied from the tray right after the process starts, rather than in the child before exec,
+    because preexec_fn is not safe in a process with threads.
+
+    Args:
+        path (str): The path to the executable.
+        profile (LaunchProfile): The profile.
+
+    Returns:
+        subprocess.Popen: The started process.
+
+    Raises:
+        OSError: If the executable could not be started.
+    """
+    process = subprocess.Popen([path, *profile.electron_flags])
+    results = apply_profile(process.pid, profile)
+    failed = {setting: error for setting, error in results.items() if error != 'ok'}
+    logger.info(f"Launched {os.path.basename(path)} (PID {process.pid}) with profile '{profile.name}': "
+                f"{profile.describe()}")
+    for setting, error in failed.items():
+        logger.warning(f"Launch profile '{profile.name}': could not apply {setting}: {error}")
+    return process
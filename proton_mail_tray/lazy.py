@@ -0,0 +1,45 @@
+import importlib
+import importlib.util
+import sys
+from types import ModuleType
+
+
+def lazy_import(name: str) -> ModuleType:
+    """Import a module on first attribute access instead of now.
+
+    The module is found straight away, so a missing module still fails at import time, but its code only runs when
+    one of its attributes is first used. A module that has already been imported is returned as is.
+
+    Args:
+        name (str): The absolute name of the module.
+
+    Returns:
+        ModuleType: The module, loaded on first use.
+
+    Raises:
+        ModuleNotFoundError: If the module cannot be found.
+    """
+    if name in sys.modules:
+        return sys.modules[name]
+    spec = importlib.util.find_spec(name)
+    if spec is None:
+        raise ModuleNotFoundError(f"No module named '{name}'", name=name)
+    loader = importlib.util.LazyLoader(spec.loader)
+    spec.loader = loader
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    loader.exec_module(module)
+    return module
+
+
+def resolve(*modules: ModuleType) -> None:
+    """Finish loading lazily imported modules now.
+
+    LazyLoader is not thread-safe before Python 3.12, so modules that worker threads use are resolved on the GUI thread
+    before any worker can touch them.
+
+    Args:
+        *modules (ModuleType): The modules returned by lazy_import.
+    """
+    for module in modules:
+        getattr(module, '__name__')
@@ -0,0 +1,144 @@
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from enum import Enum
+from typing import Any, Callable, Optional
+
+from PySide6.QtCore import QObject, Signal
+
+logger = logging.getLogger(__name__)
+
+
+class LifecycleState(Enum):
+    """The lifecycle states of a managed application."""
+
+    STOPPED = 'stopped'
+    STARTING = 'starting'
+    RUNNING = 'running'
+    STOPPING = 'stopping'
+    FROZEN = 'frozen'
+
+
+# Exits are reported by the monitor at any time, so every state may move to STOPPED. STOPPING may move straight to
+# STARTING when an instance is restarted, and STARTING to FROZEN when a pre-launched instance is frozen.
+TRANSITIONS = {
+    LifecycleState.STOPPED: {LifecycleState.STARTING, LifecycleState.RUNNING, LifecycleState.FROZEN},
+    LifecycleState.STARTING: {LifecycleState.RUNNING, LifecycleState.FROZEN, LifecycleState.STOPPED},
+    LifecycleState.RUNNING: {LifecycleState.STOPPING, LifecycleState.FROZEN, LifecycleState.STOPPED},
+    LifecycleState.STOPPING: {LifecycleState.STOPPED, LifecycleState.STARTING, LifecycleState.FROZEN,
+                              LifecycleState.RUNNING},
+    LifecycleState.FROZEN: {LifecycleState.STARTING, LifecycleState.RUNNING, LifecycleState.STOPPED},
+}
+
+
+class Lifecycle(QObject):
+    """Track the state of a managed application and run its open/close jobs off the GUI thread.
+
+    Jobs run one at a time on a single worker thread, which is only created by the first job. Their results are handed
+    back to the GUI thread through a queued signal, so callbacks may touch Qt objects. While a job is in flight the
+    lifecycle is busy and further requests are refused, which coalesces rapid clicks into a single transition.
+
+    Args:
+        name (str): The display name of the application, used in logs.
+        parent (QObject, optional): The parent object.
+
+    Attributes:
+        before_job (callable or None): Called on the GUI thread just before each job is submitted, e.g. to undo
+            anything the job must not find in place.
+
+    Signals:
+        state_changed (LifecycleState): Emitted on the GUI thread after every state change.
+    """
+
+    state_changed = Signal(object)
+    _state_requested = Signal(object)
+    _job_finished = Signal(object, object)
+
+    def __init__(self, name: str, parent: Optional[QObject] = None):
+        super().__init__(parent)
+        self.name = name
+        self.state = LifecycleState.STOPPED
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix=f"{name} lifecycle")
+        self._future = None
+        self.before_job: Optional[Callable[[], None]] = None
+        self._state_requested.connect(self.set_state)
+        self._job_finished.connect(self._on_job_finished)
+
+    @property
+    def busy(self) -> bool:
+        """bool: Whether a job is in flight."""
+        return self._future is not None
+
+    def set_state(self, state: LifecycleState) -> bool:
+        """Move to a new state if the transition is allowed.
+
+        Must be called on the GUI thread; use request_state from a job.
+
+        Args:
+            state (LifecycleState): The new state.
+
+        Returns:
+            bool: True if the state is now the requested one.
+        """
+        if state == self.state:
+            return True
+        if state not in TRANSITIONS[self.state]:
+            logger.warning(f"{self.name}: ignoring invalid transition {self.state.value} -> {state.value}")
+            return False
+        logger.info(f"{self.name}: {self.state.value} -> {state.value}")
+        self.state = state
+        self.state_changed.emit(state)
+        return True
+
+    def request_state(self, state: LifecycleState) -> None:
+        """Request a state change from any thread.
+
+        Args:
+            state (LifecycleState): The new state.
+        """
+        self._state_requested.emit(state)
+
+    def run(self, job: Callable[[], Any], on_done: Callable[[Any], None]) -> bool:
+        """Run a job on the worker thread unless one is already in flight.
+
+        Args:
+            job (callable): The job, called with no arguments on the worker thread.
+            on_done (callable): Called with the job's result, or the exception it raised, on the GUI thread.
+
+        Returns:
+            bool: True if the job was submitted, False if the lifecycle is busy.
+        """
+        if self.busy:
+            logger.info(f"{self.name}: ignoring request while {self.state.value}")
+            return False
+        if self.before_job is not None:
+            self.before_job()
+        self._future = self._executor.submit(self._run_job, job, on_done)
+        return True
+
+    def shutdown(self) -> None:
+        """Wait for the job in flight, if any, and stop the worker thread."""
+        self._executor.shutdown(wait=True)
+
+    def _run_job(self, job: Callable[[], Any], on_done: Callable[[Any], None]) -> None:
+        """Run a job on the worker thread and post its result to the GUI thread.
+
+        Args:
+            job (callable): The job.
+            on_done (callable): The GUI thread callback.
+        """
+        try:
+            result = job()
+        except Exception as e:
+            logger.exception(f"{self.name}: job failed: {e}")
+            result = e
+        self._job_finished.emit(on_done, result)
+
+    def _on_job_finished(self, on_done: Callable[[Any], None], result: Any) -> None:
+        """Clear the busy flag and run the job's callback on the GUI thread.
+
+        Args:
+            on_done (callable): The callback.
+            result: The job's result.
+        """
+        self._future = None
+        on_done(result)
@@ -0,0 +1,136 @@
+import logging
+import logging.handlers
+import queue
+import threading
+import time
+from collections import deque
+from typing import Optional
+
+
+class RingBufferHandler(logging.handlers.MemoryHandler):
+    """Keep the most recent records its target would drop, and write them out when something goes wrong.
+
+    Records below the target's level (DEBUG, with the file at INFO) are held in a fixed-size ring instead of being
+    written, so they cost no I/O. A record at flushLevel or above, or a call to flush, hands the ring to the target,
+    giving the context that led up to a warning. Records the target accepts itself are left to it.
+
+    Args:
+        capacity (int): The number of records to keep.
+        flushLevel (int or str): The level that flushes the ring.
+        target (logging.Handler, optional): The handler the ring is flushed to.
+        flushOnClose (bool): Whether to flush the ring when the handler is closed.
+    """
+
+    def __init__(self, capacity: int, flushLevel=logging.WARNING, target: Optional[logging.Handler] = None,
+                 flushOnClose: bool = False):
+        super().__init__(capacity, logging._checkLevel(flushLevel), target, flushOnClose)
+        self.buffer = deque(maxlen=capacity)
+
+    def shouldFlush(self, record: logging.LogRecord) -> bool:
+        """Flush on severe records only, never because the ring is full.
+
+        Args:
+            record (logging.LogRecord): The record just handled.
+
+        Returns:
+            bool: True if the ring should be written out.
+        """
+        return record.levelno >= self.flushLevel
+
+    def emit(self, record: logging.LogRecord) -> None:
+        """Hold a record the target would drop, and flush the ring on a severe record.
+
+        Args:
+            record (logging.LogRecord): The record.
+        """
+        if self.target is None or record.levelno < self.target.level:
+            self.buffer.append(record)
+        if self.shouldFlush(record):
+            self.flush()
+
+
+class RateLimitFilter(logging.Filter):
+    """Let at most burst records from the same line of code through per interval.
+
+    Warnings and errors always pass. When a line logs again after some of its records were dropped, the record says
+    how many.
+
+    Args:
+        name (str): Passed to logging.Filter.
+        interval (float): The length of the window in seconds.
+        burst (int): The number of records let through per window.
+    """
+
+    def __init__(self, name: str = '', interval: float = 60.0, burst: int = 5):
+        super().__init__(name)
+        self.interval = interval
+        self.burst = burst
+        self._sites = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        """Check whether a record is within its line's budget.
+
+        Args:
+            record (logging.LogRecord): The record.
+
+        Returns:
+            bool: True if the record should be logged.
+        """
+        if record.levelno >= logging.WARNING or not super().filter(record):
+            return True
+        key = (record.pathname, record.lineno)
+        now = time.monotonic()
+        with self._lock:
+            site = self._sites.get(key)
+            if site is None or now - site[0] >= self.interval:
+                suppressed = site[2] if site is not None else 0
+                self._sites[key] = [now, 1, 0]
+                if suppressed:
+                    record.msg = f"{record.getMessage()} ({suppressed} similar messages suppressed)"
+                    record.args = None
+                return True
+            if site[1] < self.burst:
+                site[1] += 1
+                return True
+            site[2] += 1
+            return False
+
+
+def start_queue_listener(logger: Optional[logging.Logger] = None) -> logging.handlers.QueueListener:
+    """Move a logger's handlers behind a queue, so formatting and file I/O happen on a background thread.
+
+    The logger is left with a single QueueHandler, which only puts records on the queue.
+
+    Args:
+        logger (logging.Logger, optional): The logger, the root logger by default.
+
+    Returns:
+        logging.handlers.QueueListener: The started listener; stop it on exit to write out queued records.
+    """
+    logger = logger or logging.getLogger()
+    handlers = list(logger.handlers)
+    log_queue = queue.SimpleQueue()
+    for handler in handlers:
+        logger.removeHandler(handler)
+    logger.addHandler(logging.handlers.QueueHandler(log_queue))
+    listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+    listener.start()
+    return listener
+
+
+def flush_ring_buffers(listener: logging.handlers.QueueListener) -> int:
+    """Write out the records held by the RingBufferHandlers of a listener.
+
+    Args:
+        listener (logging.handlers.QueueListener): The listener.
+
+    Returns:
+        int: The number of records written.
+    """
+    flushed = 0
+    for handler in listener.handlers:
+        if isinstance(handler, RingBufferHandler):
+            flushed += len(handler.buffer)
+            handler.flush()
+    return flushed
@@ -1,18 +1,48 @@
+import errno
 import logging
+import os
+import signal
+import socket
 import subprocess
+from typing import Dict, Optional
 
-from PySide6.QtCore import QObject, QThread
+from PySide6.QtCore import QObject, QSocketNotifier, QTimer, Signal
 
 logger = logging.getLogger(__name__)
 
+# Only used when pidfd_open is unavailable and the process is not our child
+FALLBACK_POLL_INTERVAL_MS = 5000
+
 
 class SubprocessMonitor(QObject):
-    """Monitor a subprocess and report its status."""
+    """Monitor Proton Mail processes and report when they exit.
+
+    Each watched PID is opened as a pidfd and registered with a QSocketNotifier, so the monitor costs nothing until
+    the kernel marks the process as exited. Where pidfd_open is unavailable, children of the tray are reaped on SIGCHLD
+    and any other process is checked on a slow timer for as long as it is watched.
+
+    Signals:
+        process_exited (int, object): The PID that exited and its return code, or None if it was not our child.
+    """
 
-    def __init__(self):
-        super().__init__()
-        self._running = True
+    process_exited = Signal(int, object)
+
+    def __init__(self, parent: Optional[QObject] = None):
+        super().__init__(parent)
         self.proton_mail_subprocess = None
+        self._children: Dict[int, subprocess.Popen] = {}
+        self._pidfds: Dict[int, tuple] = {}
+        self._sigchld_pids = set()
+        self._polled_pids = set()
+
+        self._sigchld_notifier = None
+        self._sigchld_sockets = None
+        self._previous_wakeup_fd = -1
+        self._previous_sigchld_handler = None
+
+        self._poll_timer = QTimer(self)
+        self._poll_timer.setInterval(FALLBACK_POLL_INTERVAL_MS)
+        self._poll_timer.timeout.connect(self._poll_fallback)
 
     def set_proton_mail_subprocess(self, process: subprocess.Popen) -> None:
         """Set the Proton Mail subprocess to monitor.
@@ -22,17 +52,198 @@ class SubprocessMonitor(QObject):
         """
         self.proton_mail_subprocess = process
         logger.info(f"Proton Mail subprocess set: {process.pid}")
+        self.watch(process.pid, process)
+
+    def is_watching(self, pid: int) -> bool:
+        """Check whether a PID is currently being watched.
+
+        Args:
+            pid (int): The PID to check.
+
+        Returns:
+            bool: True if the PID is being watched.
+        """
+        return pid in self._pidfds or pid in self._sigchld_pids or pid in self._polled_pids
+
+    def watch(self, pid: int, process: Optional[subprocess.Popen] = None) -> None:
+        """Watch a process for exit.
+
+        Args:
+            pid (int): The PID to watch.
+            process (subprocess.Popen, optional): The Popen object if the process is our child, used to reap it.
+        """
+        if process is not None:
+            self._children[pid] = process
+        if self.is_watching(pid):
+            return
+
+        try:
+            pidfd = os.pidfd_open(pid)
+        except ProcessLookupError:
+            logger.info(f"Process {pid} exited before it could be watched")
+            self._report_exit(pid)
+            return
+        except (AttributeError, OSError) as e:
+            logger.debug(f"pidfd_open unavailable for {pid} ({e}), using fallback")
+            self._watch_fallback(pid)
+            return
+
+        # Notifiers are left unparented so deleteLater() is never raced by the monitor's own destruction
+        notifier = QSocketNotifier(pidfd, QSocketNotifier.Type.Read)
+        notifier.activated.connect(lambda *_, pid=pid: self._on_pidfd_ready(pid))
+        self._pidfds[pid] = (pidfd, notifier)
+        logger.info(f"Watching process {pid} via pidfd")
+
+    def unwatch(self, pid: int) -> None:
+        """Stop watching a process without reporting an exit.
+
+        Args:
+            pid (int): The PID to stop watching.
+        """
+        self._close_pidfd(pid)
+        self._sigchld_pids.discard(pid)
+        self._polled_pids.discard(pid)
+        self._children.pop(pid, None)
+        if not self._polled_pids:
+            self._poll_timer.stop()
+
+    def stop(self) -> None:
+        """Stop watching all processes and release the SIGCHLD handler."""
+        for pid in list(self._pidfds) + list(self._sigchld_pids) + list(self._polled_pids):
+            self.unwatch(pid)
+        self._uninstall_sigchld_handler()
+        logger.info("Monitor stopped")
 
-    def start(self):
-        # TODO: rewrite me
-        """Monitor the Proton Mail subprocess until it exits."""
-        while self._running:
-            if self.proton_mail_subprocess:
-                if self.proton_mail_subprocess.poll() is not None:
-                    self.proton_mail_subprocess.wait()
-            QThread.sleep(1)
-
-    def stop(self):
-        """Stop the monitor thread."""
-        self._running = False
-        logger.info("Monitor thread stopped")
+    def _watch_fallback(self, pid: int) -> None:
+        """Watch a process without a pidfd, via SIGCHLD for children or a slow timer otherwise.
+
+        Args:
+            pid (int): The PID to watch.
+        """
+        if pid in self._children and self._install_sigchld_handler():
+            self._sigchld_pids.add(pid)
+            logger.info(f"Watching child process {pid} via SIGCHLD")
+            self._reap_children()  # the child may have exited before the handler was installed
+        else:
+            self._polled_pids.add(pid)
+            self._poll_timer.start()
+            logger.info(f"Watching process {pid} via {FALLBACK_POLL_INTERVAL_MS} ms polling")
+
+    def _install_sigchld_handler(self) -> bool:
+        """Route SIGCHLD into the Qt event loop through the signal wakeup fd.
+
+        Returns:
+            bool: True if the handler is installed, False if it cannot be (e.g. not on the main thread).
+        """
+        if self._sigchld_notifier is not None:
+            return True
+        read_sock, write_sock = socket.socketpair()
+        read_sock.setblocking(False)
+        write_sock.setblocking(False)
+        try:
+            self._previous_wakeup_fd = signal.set_wakeup_fd(write_sock.fileno(), warn_on_full_buffer=False)
+            self._previous_sigchld_handler = signal.signal(signal.SIGCHLD, lambda signum, frame: None)
+        except ValueError as e:
+            logger.warning(f"Unable to install SIGCHLD handler: {e}")
+            read_sock.close()
+            write_sock.close()
+            return False
+        self._sigchld_sockets = (read_sock, write_sock)
+        self._sigchld_notifier = QSocketNotifier(read_sock.fileno(), QSocketNotifier.Type.Read)
+        self._sigchld_notifier.activated.connect(self._on_sigchld)
+        return True
+
+    def _uninstall_sigchld_handler(self) -> None:
+        """Restore the previous SIGCHLD handler and wakeup fd."""
+        if self._sigchld_notifier is None:
+            return
+        self._sigchld_notifier.setEnabled(False)
+        self._sigchld_notifier.deleteLater()
+        self._sigchld_notifier = None
+        try:
+            signal.set_wakeup_fd(self._previous_wakeup_fd)
+            signal.signal(signal.SIGCHLD, self._previous_sigchld_handler or signal.SIG_DFL)
+        except ValueError as e:
+            logger.warning(f"Unable to restore SIGCHLD handler: {e}")
+        for sock in self._sigchld_sockets:
+            sock.close()
+        self._sigchld_sockets = None
+
+    def _on_sigchld(self) -> None:
+        """Drain the wakeup socket and reap any watched children that have exited."""
+        try:
+            while self._sigchld_sockets[0].recv(4096):
+                pass
+        except BlockingIOError:
+            pass
+        self._reap_children()
+
+    def _reap_children(self) -> None:
+        """Reap watched children without blocking."""
+        for pid in list(self._sigchld_pids):
+            if self._children[pid].poll() is not None:
+                self._report_exit(pid)
+
+    def _poll_fallback(self) -> None:
+        """Check polled processes for exit."""
+        for pid in list(self._polled_pids):
+            process = self._children.get(pid)
+            if process is not None:
+                exited = process.poll() is not None
+            else:
+                try:
+                    os.kill(pid, 0)
+                    exited = False
+                except ProcessLookupError:
+                    exited = True
+                except PermissionError:
+                    exited = False
+            if exited:
+                self._report_exit(pid)
+
+    def _on_pidfd_ready(self, pid: int) -> None:
+        """Handle a pidfd becoming readable, which means the process has exited.
+
+        Args:
+            pid (int): The PID whose pidfd became readable.
+        """
+        self._close_pidfd(pid)
+        process = self._children.get(pid)
+        if process is not None:
+            process.poll()  # reap the zombie
+        self._report_exit(pid)
+
+    def _close_pidfd(self, pid: int) -> None:
+        """Disable the notifier and close the pidfd for a PID, if any.
+
+        Args:
+            pid (int): The PID whose pidfd should be closed.
+        """
+        entry = self._pidfds.pop(pid, None)
+        if entry is None:
+            return
+        pidfd, notifier = entry
+        notifier.setEnabled(False)
+        notifier.deleteLater()
+        try:
+            os.close(pidfd)
+        except OSError as e:
+            if e.errno != errno.EBADF:
+                raise
+
+    def _report_exit(self, pid: int) -> None:
+        """Stop watching an exited process and emit process_exited.
+
+        Args:
+            pid (int): The PID that exited.
+        """
+        self._sigchld_pids.discard(pid)
+        self._polled_pids.discard(pid)
+        if not self._polled_pids:
+            self._poll_timer.stop()
+        process = self._children.pop(pid, None)
+        returncode = process.returncode if process is not None else None
+        if self.proton_mail_subprocess is not None and self.proton_mail_subprocess.pid == pid:
+            self.proton_mail_subprocess = None
+        logger.info(f"Process {pid} exited with return code {returncode}")
+        self.process_exited.emit(pid, returncode)
@@ -0,0 +1,106 @@
+import json
+import logging
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+APP_NAME = 'proton-mail-tray'
+
+# The environment variable and fallback under the home directory of each XDG base directory
+XDG_DIRS = {
+    'config': ('XDG_CONFIG_HOME', '.config'),
+    'cache': ('XDG_CACHE_HOME', '.cache'),
+    'data': ('XDG_DATA_HOME', os.path.join('.local', 'share')),
+    'state': ('XDG_STATE_HOME', os.path.join('.local', 'state')),
+}
+
+
+def get_base_path() -> Path:
+    """Determine the base path of the application.
+
+    Finds the base path of the application, whether it is ran via executable or source code. Both the single-file and
+    the directory builds set sys._MEIPASS to where the bundled data is unpacked.
+
+    Returns:
+        Path: The base path of the application.
+    """
+    if getattr(sys, 'frozen', False):  # if executable
+        return Path(getattr(sys, '_MEIPASS', os.path.dirname(sys.executable)))
+    else:  # if source
+        base_path = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+        sys.path.append(base_path)
+        return Path(base_path)
+
+
+def get_xdg_home(kind: str) -> Path:
+    """Get an XDG base directory of the user.
+
+    Args:
+        kind (str): 'config', 'cache', 'data' or 'state'.
+
+    Returns:
+        Path: The directory, from its environment variable or the default under the home directory.
+    """
+    variable, fallback = XDG_DIRS[kind]
+    return Path(os.environ.get(variable) or os.path.join(os.path.expanduser('~'), fallback))
+
+
+def get_app_dir(kind: str) -> Path:
+    """Get the application's directory under an XDG base directory, creating it if needed.
+
+    Args:
+        kind (str): 'config', 'cache', 'data' or 'state'.
+
+    Returns:
+        Path: The directory.
+    """
+    path = get_xdg_home(kind) / APP_NAME
+    try:
+        path.mkdir(parents=True, exist_ok=True)
+    except OSError as e:
+        logger.error(f"Unable to create {kind} directory {path}: {e}")
+    return path
+
+
+def get_control_socket_path() -> str:
+    """Get the path of the control socket of the running tray.
+
+    Returns:
+        str: The socket in $XDG_RUNTIME_DIR, or in the temporary directory with the user ID in its name.
+    """
+    runtime_dir = os.environ.get('XDG_RUNTIME_DIR')
+    if runtime_dir and os.path.isdir(runtime_dir):
+        return os.path.join(runtime_dir, f'{APP_NAME}.sock')
+    return os.path.join(tempfile.gettempdir(), f'{APP_NAME}-{os.getuid()}.sock')
+
+
+def write_json_atomic(file_path: str, data) -> None:
+    """Write JSON to a file through a temporary file in the same directory, so readers never see a partial write.
+
+    Args:
+        file_path (str): The path to the file.
+        data: The JSON-serializable data.
+
+    Raises:
+        OSError, TypeError, ValueError: If the file could not be written or the data is not serializable. The
+            original file is left untouched.
+    """
+    directory = os.path.dirname(os.path.abspath(file_path))
+    with tempfile.NamedTemporaryFile('w', dir=directory, prefix=f'.{os.path.basename(file_path)}-',
+                                     delete=False) as f:
+        try:
+            json.dump(data, f, indent=4)
+            f.flush()
+            os.fsync(f.fileno())
+        except BaseException:
+            f.close()
+            os.unlink(f.name)
+            raise
+    try:
+        os.replace(f.name, file_path)
+    except BaseException:
+        os.unlink(f.name)
+        raise
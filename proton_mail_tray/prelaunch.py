@@ -0,0 +1,207 @@
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional
+
+import psutil
+from PySide6.QtCore import QObject, QTimer, Signal
+
+from proton_mail_tray.readiness import wait_until_ready
+from proton_mail_tray.telemetry import format_bytes
+from proton_mail_tray.windows import find_windows, has_window_control, set_windows_mapped
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PRELAUNCH_CONFIG = {
+    'enabled': False,
+    'delay_seconds': 20,
+    'idle_cpu_percent': 25.0,  # system-wide, 100 is every core busy
+    'min_available_mb': 2048,
+    'retry_seconds': 60,
+    'settle_seconds': 5,
+    'settle_timeout_seconds': 90,
+}
+
+SETTLE_POLL_SECONDS = 0.5
+
+
+class Prelauncher(QObject):
+    """Decide when to pre-launch Proton Mail in the background, and when it has settled enough to be frozen.
+
+    Once scheduled, the system is checked after delay_seconds: when its CPU use is under idle_cpu_percent and at least
+    min_available_mb of memory is available, launch_requested is emitted. Otherwise the check is repeated every
+    retry_seconds until cancel is called, e.g. because Proton Mail was opened. The checks run on a worker thread.
+
+    The pre-launched instance has to stay out of sight, so its windows are unmapped as soon as they appear while it
+    settles. That needs xdotool: without it nothing is pre-launched.
+
+    Args:
+        config (dict, optional): The 'prelaunch' section of the config.
+        parent (QObject, optional): The parent object.
+
+    Signals:
+        launch_requested: Emitted on the GUI thread when Proton Mail should be pre-launched.
+    """
+
+    launch_requested = Signal()
+    _check_finished = Signal(bool)
+
+    def __init__(self, config: Optional[dict] = None, parent: Optional[QObject] = None):
+        super().__init__(parent)
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='prelauncher')
+        self._checking = False
+        self._scheduled = False
+        self._interrupt = threading.Event()
+        self._settling = False
+        self.hidden_windows: List[str] = []
+
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.timeout.connect(self._check)
+        self._check_finished.connect(self._on_check_finished)
+        self.configure(config)
+
+    def configure(self, config: Optional[dict]) -> None:
+        """Apply the pre-launch settings. Disabling stops a scheduled pre-launch.
+
+        Args:
+            config (dict or None): The 'prelaunch' section of the config.
+        """
+        config = {**DEFAULT_PRELAUNCH_CONFIG, **(config or {})}
+        self.enabled = bool(config['enabled'])
+        self.delay_ms = int(config['delay_seconds'] * 1000)
+        self.idle_cpu_percent = float(config['idle_cpu_percent'])
+        self.min_available = int(config['min_available_mb'] * 1024 * 1024)
+        self.retry_ms = int(config['retry_seconds'] * 1000)
+        self.settle_seconds = float(config['settle_seconds'])
+        self.settle_timeout = float(config['settle_timeout_seconds'])
+        if not self.enabled:
+            self.cancel()
+
+    @property
+    def settling(self) -> bool:
+        """bool: Whether a pre-launched Proton Mail is being waited on before it is frozen."""
+        return self._settling
+
+    def schedule(self) -> None:
+        """Check whether to pre-launch after the configured delay, if enabled and its windows can be hidden."""
+        if not self.enabled:
+            return
+        if not has_window_control():
+            logger.info("Not pre-launching Proton Mail: xdotool is needed to keep its window hidden")
+            return
+        self._scheduled = True
+        self._timer.start(self.delay_ms)
+
+    def cancel(self) -> None:
+        """Stop a scheduled pre-launch."""
+        self._scheduled = False
+        self._timer.stop()
+
+    def interrupt(self) -> bool:
+        """Keep a pre-launched Proton Mail that is still settling running instead of freezing it.
+
+        Returns:
+            bool: True if an instance was settling.
+        """
+        if not self._settling:
+            return False
+        self._interrupt.set()
+        return True
+
+    def shutdown(self) -> None:
+        """Stop checking and the worker thread."""
+        self.cancel()
+        self._interrupt.set()
+        self._executor.shutdown(wait=True)
+
+    def wait_until_settled(self, pid: int) -> bool:
+        """Wait until a freshly launched Proton Mail has settled. Runs on a worker thread.
+
+        The tree has settled once its process count has not changed and its CPU use has stayed low for settle_seconds.
+        After settle_timeout_seconds it is treated as settled anyway. Windows it maps in the meantime are unmapped
+        straight away and kept in hidden_windows, to be handed to the hibernator, or mapped again with show_windows.
+        If interrupt was called they are mapped again before returning.
+
+        Args:
+            pid (int): The PID of the launched Proton Mail.
+
+        Returns:
+            bool: True if it should be frozen now, False if it exited or interrupt was called.
+        """
+        self._interrupt.clear()
+        self._settling = True
+        self.hidden_windows = []
+        start = time.monotonic()
+        try:
+            how, ready_at = wait_until_ready(pid, self._interrupt, self.settle_seconds, self.settle_timeout,
+                                             check_windows=False, poll_seconds=SETTLE_POLL_SECONDS,
+                                             on_poll=lambda: self._hide_windows(pid))
+            if how is not None:
+                self._hide_windows(pid)  # mapped since the last poll
+        finally:
+            self._settling = False
+        if how == 'settled':
+            logger.info(f"Pre-launched Proton Mail settled after {ready_at - start:.1f} s")
+        elif how == 'timeout':
+            logger.info(f"Pre-launched Proton Mail did not settle within {self.settle_timeout:.0f} s")
+        elif self._interrupt.is_set():
+            logger.info("Pre-launched Proton Mail was opened while settling, keeping it running")
+            self.show_windows()
+        return how is not None
+
+    def show_windows(self) -> None:
+        """Map the windows hidden while the last instance settled."""
+        set_windows_mapped(self.hidden_windows, True)
+        self.hidden_windows = []
+
+    def _hide_windows(self, pid: int) -> None:
+        """Unmap the windows a settling instance has mapped.
+
+        Args:
+            pid (int): The PID that owns the windows.
+        """
+        windows = find_windows(pid) or []
+        if windows:
+            set_windows_mapped(windows, False)
+            self.hidden_windows += [window for window in windows if window not in self.hidden_windows]
+
+    def _check(self) -> None:
+        """Check the system on the worker thread."""
+        if not self._checking:
+            self._checking = True
+            self._executor.submit(self._check_in_worker)
+
+    def _check_in_worker(self) -> None:
+        """Check whether the system is idle and has enough memory, and post the answer to the GUI thread."""
+        try:
+            cpu_percent = psutil.cpu_percent(interval=1)
+            available = psutil.virtual_memory().available
+        except Exception as e:
+            logger.exception(f"Failed to check whether to pre-launch Proton Mail: {e}")
+            self._check_finished.emit(False)
+            return
+        if available < self.min_available:
+            logger.info(f"Not pre-launching Proton Mail: only {format_bytes(available)} of memory available")
+            self._check_finished.emit(False)
+        elif cpu_percent > self.idle_cpu_percent:
+            logger.debug(f"Not pre-launching Proton Mail: system busy ({cpu_percent:.0f}% CPU)")
+            self._check_finished.emit(False)
+        else:
+            self._check_finished.emit(True)
+
+    def _on_check_finished(self, launch: bool) -> None:
+        """Request the launch, or check again later.
+
+        Args:
+            launch (bool): Whether the system is ready for a pre-launch.
+        """
+        self._checking = False
+        if not self.enabled or not self._scheduled:
+            return
+        if launch:
+            self._scheduled = False
+            self.launch_requested.emit()
+        else:
+            self._timer.start(self.retry_ms)
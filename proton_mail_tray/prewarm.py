@@ -0,0 +1,340 @@
+import logging
+import os
+import stat
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List, NamedTuple, Optional, Tuple
+
+import psutil
+from PySide6.QtCore import QObject, QTimer, Signal
+
+from proton_mail_tray.profiling import record
+from proton_mail_tray.telemetry import format_bytes
+from proton_mail_tray.utils import process_tree_pids
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PREWARM_CONFIG = {
+    'enabled': False,
+    'delay_seconds': 10,
+    'max_mb': 1024,
+    'max_memory_pressure': 10.0,  # PSI 'some avg10' of /proc/pressure/memory, in percent
+    'min_available_percent': 20.0,
+}
+
+# Files are advised in chunks so that memory pressure and cancellation are checked in between
+CHUNK_SIZE = 8 * 1024 * 1024
+
+FIRST_CHILD_POLL_MS = 20
+FIRST_CHILD_TIMEOUT_MS = 60000
+
+
+class PrewarmResult(NamedTuple):
+    """The outcome of a pre-warming run.
+
+    Attributes:
+        files (int): The number of files advised.
+        size (int): The number of bytes advised.
+        seconds (float): How long the run took.
+        stopped (str or None): Why the run stopped early, or None if it finished.
+    """
+
+    files: int
+    size: int
+    seconds: float
+    stopped: Optional[str]
+
+
+def read_memory_pressure(proc_root: str = '/proc') -> Optional[float]:
+    """Read the share of time some tasks stalled on memory over the last 10 seconds.
+
+    Args:
+        proc_root (str): The mount point of procfs.
+
+    Returns:
+        float or None: The 'some avg10' value of /proc/pressure/memory in percent, or None without PSI support.
+    """
+    try:
+        with open(f'{proc_root}/pressure/memory') as f:
+            for line in f:
+                if line.startswith('some '):
+                    return float(dict(field.split('=') for field in line.split()[1:])['avg10'])
+    except (OSError, ValueError, KeyError):
+        pass
+    return None
+
+
+def read_available_memory_percent(proc_root: str = '/proc') -> Optional[float]:
+    """Read the share of memory available without swapping from /proc/meminfo.
+
+    Args:
+        proc_root (str): The mount point of procfs.
+
+    Returns:
+        float or None: MemAvailable as a percentage of MemTotal, or None if it could not be read.
+    """
+    values = {}
+    try:
+        with open(f'{proc_root}/meminfo') as f:
+            for line in f:
+                key, _, value = line.partition(':')
+                if key in ('MemTotal', 'MemAvailable'):
+                    values[key] = int(value.split()[0])
+        return values['MemAvailable'] / values['MemTotal'] * 100
+    except (OSError, ValueError, KeyError, IndexError, ZeroDivisionError):
+        return None
+
+
+def largest_files(directory: str, limit: int) -> List[Tuple[str, int]]:
+    """List the largest regular files under a directory, up to a total size.
+
+    Symlinks are not followed, so a link out of the install directory is never read.
+
+    Args:
+        directory (str): The directory to walk.
+        limit (int): The maximum total size in bytes.
+
+    Returns:
+        list: (path, size) pairs, largest first.
+    """
+    files = []
+    for root, _, names in os.walk(directory):
+        for name in names:
+            path = os.path.join(root, name)
+            try:
+                info = os.lstat(path)
+            except OSError:
+                continue
+            if stat.S_ISREG(info.st_mode) and info.st_size > 0:
+                files.append((path, info.st_size))
+    files.sort(key=lambda file: file[1], reverse=True)
+
+    selected, total = [], 0
+    for path, size in files:
+        if total + size > limit:
+            continue
+        selected.append((path, size))
+        total += size
+    return selected
+
+
+def advise_files(files: List[Tuple[str, int]], should_stop: Callable[[], Optional[str]]) -> PrewarmResult:
+    """Ask the kernel to read files into the page cache with posix_fadvise(POSIX_FADV_WILLNEED).
+
+    Args:
+        files (list): (path, size) pairs.
+        should_stop (callable): Called before each chunk. Returns the reason to stop, or None to go on.
+
+    Returns:
+        PrewarmResult: What was advised.
+    """
+    start = time.perf_counter()
+    advised_files, advised = 0, 0
+    for path, size in files:
+        try:
+            fd = os.open(path, os.O_RDONLY)
+        except OSError as e:
+            logger.debug(f"Skipping {path}: {e}")
+            continue
+        try:
+            for offset in range(0, size, CHUNK_SIZE):
+                reason = should_stop()
+                if reason is not None:
+                    return PrewarmResult(advised_files, advised, time.perf_counter() - start, reason)
+                length = min(CHUNK_SIZE, size - offset)
+                os.posix_fadvise(fd, offset, length, os.POSIX_FADV_WILLNEED)
+                advised += length
+            advised_files += 1
+        except OSError as e:
+            logger.debug(f"Failed to advise {path}: {e}")
+        finally:
+            os.close(fd)
+    return PrewarmResult(advised_files, advised, time.perf_counter() - start, None)
+
+
+def lower_thread_priority() -> None:
+    """Give the calling thread the lowest CPU priority and the idle I/O class, so it only uses an otherwise idle disk.
+
+    On Linux both are set per thread, so the rest of the tray is unaffected.
+    """
+    tid = threading.get_native_id()
+    try:
+        os.setpriority(os.PRIO_PROCESS, tid, 19)
+    except OSError as e:
+        logger.debug(f"Failed to lower the pre-warming CPU priority: {e}")
+    try:
+        psutil.Process(tid).ionice(psutil.IOPRIO_CLASS_IDLE)
+    except (psutil.Error, OSError, AttributeError) as e:
+        logger.debug(f"Failed to set the pre-warming I/O class: {e}")
+
+
+class Prewarmer(QObject):
+    """Read the Proton Mail install into the page cache in the background, so the first open is not a cold start.
+
+    Once scheduled, the largest files in the directory of the Proton Mail executable are advised with
+    POSIX_FADV_WILLNEED on a worker thread with the idle I/O class. The run stops early when memory pressure rises
+    above max_memory_pressure or available memory drops below min_available_percent, since evicting other pages to
+    cache Proton Mail would only move the slowness elsewhere.
+
+    Args:
+        config (dict, optional): The 'prewarm' section of the config.
+        parent (QObject, optional): The parent object.
+
+    Signals:
+        finished (PrewarmResult): Emitted on the GUI thread when a run ends.
+    """
+
+    finished = Signal(object)
+
+    def __init__(self, config: Optional[dict] = None, parent: Optional[QObject] = None):
+        super().__init__(parent)
+        self.prewarmed = False
+        self._path = None
+        self._cancel = threading.Event()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='prewarmer')
+        self._future = None
+
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.timeout.connect(self._start)
+        self.finished.connect(self._on_finished)
+        self.configure(config)
+
+    def configure(self, config: Optional[dict]) -> None:
+        """Apply the pre-warming settings.
+
+        Args:
+            config (dict or None): The 'prewarm' section of the config.
+        """
+        config = {**DEFAULT_PREWARM_CONFIG, **(config or {})}
+        self.enabled = bool(config['enabled'])
+        self.delay_ms = int(config['delay_seconds'] * 1000)
+        self.max_size = int(config['max_mb'] * 1024 * 1024)
+        self.max_memory_pressure = float(config['max_memory_pressure'])
+        self.min_available_percent = float(config['min_available_percent'])
+        if not self.enabled:
+            self.cancel()
+
+    def schedule(self, proton_mail_path: Optional[str]) -> None:
+        """Pre-warm the install of a Proton Mail executable after the configured delay, if enabled.
+
+        Args:
+            proton_mail_path (str or None): The path of the Proton Mail executable.
+        """
+        if not self.enabled or not proton_mail_path or self._future is not None:
+            return
+        self._path = proton_mail_path
+        self._timer.start(self.delay_ms)
+
+    def cancel(self) -> None:
+        """Stop a scheduled or running pre-warm, e.g. because Proton Mail is starting and reads the files itself."""
+        self._timer.stop()
+        if self._future is not None:
+            self._cancel.set()
+
+    def shutdown(self) -> None:
+        """Stop pre-warming and the worker thread."""
+        self.cancel()
+        self._executor.shutdown(wait=True)
+
+    def _start(self) -> None:
+        """Start a run on the worker thread."""
+        directory = os.path.dirname(os.path.realpath(self._path))
+        self._cancel.clear()
+        self._future = self._executor.submit(self._prewarm_in_worker, directory)
+
+    def _prewarm_in_worker(self, directory: str) -> None:
+        """Advise the largest files of the install and post the result to the GUI thread.
+
+        Args:
+            directory (str): The install directory.
+        """
+        lower_thread_priority()
+        try:
+            files = largest_files(directory, self.max_size)
+            result = advise_files(files, self._should_stop)
+        except Exception as e:
+            logger.exception(f"Failed to pre-warm {directory}: {e}")
+            result = PrewarmResult(0, 0, 0.0, str(e))
+        self.finished.emit(result)
+
+    def _should_stop(self) -> Optional[str]:
+        """Check whether a run should stop.
+
+        Returns:
+            str or None: The reason to stop, or None to go on.
+        """
+        if self._cancel.is_set():
+            return 'cancelled'
+        pressure = read_memory_pressure()
+        if pressure is not None and pressure > self.max_memory_pressure:
+            return f'memory pressure {pressure:.1f}%'
+        available = read_available_memory_percent()
+        if available is not None and available < self.min_available_percent:
+            return f'{available:.0f}% memory available'
+        return None
+
+    def _on_finished(self, result: PrewarmResult) -> None:
+        """Record a finished run.
+
+        Args:
+            result (PrewarmResult): The result of the run.
+        """
+        self._future = None
+        self.prewarmed = self.prewarmed or result.size > 0
+        message = (f"Pre-warmed {result.files} files ({format_bytes(result.size)}) of Proton Mail in "
+                   f"{result.seconds:.1f} s")
+        logger.info(message if result.stopped is None else f"{message}, stopped early: {result.stopped}")
+
+
+class LaunchTimer(QObject):
+    """Measure how long a launched Proton Mail takes to start its first child process.
+
+    Electron only forks its helper processes once the main binary and its libraries are loaded, so the time to the
+    first child shows how much a cold page cache costs. It is logged and recorded as 'first_child.prewarmed' or
+    'first_child.cold'.
+
+    Args:
+        parent (QObject, optional): The parent object.
+    """
+
+    def __init__(self, parent: Optional[QObject] = None):
+        super().__init__(parent)
+        self._pid = None
+        self._started_at = None
+        self._label = None
+        self._timer = QTimer(self)
+        self._timer.setInterval(FIRST_CHILD_POLL_MS)
+        self._timer.timeout.connect(self._poll)
+
+    def start(self, pid: int, started_at: float, prewarmed: bool) -> None:
+        """Start watching a launched process.
+
+        Args:
+            pid (int): The PID of the launched process.
+            started_at (float): The time.perf_counter() value when the launch started.
+            prewarmed (bool): Whether the install was pre-warmed.
+        """
+        self._pid = pid
+        self._started_at = started_at
+        self._label = 'prewarmed' if prewarmed else 'cold'
+        self._timer.start()
+
+    def stop(self) -> None:
+        """Stop watching."""
+        self._timer.stop()
+        self._pid = None
+
+    def _poll(self) -> None:
+        """Check whether the launched process has a child yet."""
+        elapsed = time.perf_counter() - self._started_at
+        pids = process_tree_pids(self._pid)
+        if not pids:
+            self.stop()
+        elif len(pids) > 1:
+            record(f'first_child.{self._label}', elapsed)
+            logger.info(f"Proton Mail started its first child process after {elapsed * 1000:.0f} ms ({self._label})")
+            self.stop()
+        elif elapsed * 1000 > FIRST_CHILD_TIMEOUT_MS:
+            self.stop()
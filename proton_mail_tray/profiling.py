@@ -0,0 +1,269 @@
+import functools
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Callable, Dict, Optional
+
+from proton_mail_tray.lazy import lazy_import
+from proton_mail_tray.paths import write_json_atomic
+
+# Only needed for on-demand captures
+cProfile = lazy_import('cProfile')
+tracemalloc = lazy_import('tracemalloc')
+
+logger = logging.getLogger(__name__)
+
+# Percentiles are computed over the most recent samples of each span
+RESERVOIR_SIZE = 1024
+
+PROFILE_KINDS = ('cprofile', 'tracemalloc')
+
+
+class Histogram:
+    """Timings of one span: running totals, plus recent samples for percentiles.
+
+    Args:
+        size (int): The number of recent samples kept.
+    """
+
+    def __init__(self, size: int = RESERVOIR_SIZE):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.samples = deque(maxlen=size)
+
+    def add(self, seconds: float) -> None:
+        """Record a timing.
+
+        Args:
+            seconds (float): The duration in seconds.
+        """
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+        self.samples.append(seconds)
+
+    def snapshot(self) -> dict:
+        """Summarize the timings.
+
+        Returns:
+            dict: The count, and the mean, p50, p99 and max in milliseconds.
+        """
+        ordered = sorted(self.samples)
+        return {
+            'count': self.count,
+            'mean_ms': round(self.total / self.count * 1000, 3) if self.count else 0.0,
+            'p50_ms': round(ordered[len(ordered) // 2] * 1000, 3) if ordered else 0.0,
+            'p99_ms': round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))] * 1000, 3) if ordered else 0.0,
+            'max_ms': round(self.max * 1000, 3),
+        }
+
+    def to_dict(self) -> dict:
+        """Serialize the totals and samples, e.g. to persist them.
+
+        Returns:
+            dict: The count, total, max and samples, in seconds.
+        """
+        return {'count': self.count, 'total': self.total, 'max': self.max, 'samples': list(self.samples)}
+
+    def merge(self, data: dict) -> None:
+        """Add serialized timings from to_dict, keeping the most recent samples.
+
+        Args:
+            data (dict): The serialized histogram.
+        """
+        self.count += int(data.get('count', 0))
+        self.total += float(data.get('total', 0.0))
+        self.max = max(self.max, float(data.get('max', 0.0)))
+        recent = list(self.samples)
+        self.samples.clear()
+        self.samples.extend(float(sample) for sample in data.get('samples', []))
+        self.samples.extend(recent)
+
+
+_histograms: Dict[str, Histogram] = {}
+_lock = threading.Lock()
+
+
+def record(name: str, seconds: float) -> None:
+    """Add a timing to the histogram of a span. Safe to call from any thread.
+
+    Args:
+        name (str): The span name.
+        seconds (float): The duration in seconds.
+    """
+    with _lock:
+        histogram = _histograms.get(name)
+        if histogram is None:
+            histogram = _histograms[name] = Histogram()
+        histogram.add(seconds)
+
+
+@contextmanager
+def span(name: str):
+    """Time a block of code into the histogram of a span.
+
+    A span costs two perf_counter calls and an uncontended lock, so spans stay enabled in production.
+
+    Args:
+        name (str): The span name.
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(name, time.perf_counter() - start)
+
+
+def timed(name: str) -> Callable:
+    """Decorate a function so each call is timed as a span.
+
+    Args:
+        name (str): The span name.
+
+    Returns:
+        callable: The decorator.
+    """
+    def decorator(function: Callable) -> Callable:
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                record(name, time.perf_counter() - start)
+        return wrapper
+    return decorator
+
+
+def get_stats() -> Dict[str, dict]:
+    """Summarize every span recorded so far.
+
+    Returns:
+        dict: The summary of each span, keyed by name.
+    """
+    with _lock:
+        return {name: histogram.snapshot() for name, histogram in sorted(_histograms.items())}
+
+
+def reset_stats() -> None:
+    """Forget every recorded span."""
+    with _lock:
+        _histograms.clear()
+
+
+def save_spans(file_path: str, prefix: str) -> None:
+    """Persist the histograms of the spans starting with a prefix, so they survive a restart.
+
+    Args:
+        file_path (str): The path to the JSON file.
+        prefix (str): The prefix of the span names.
+    """
+    with _lock:
+        data = {name: histogram.to_dict() for name, histogram in _histograms.items() if name.startswith(prefix)}
+    write_json_atomic(file_path, data)
+
+
+def load_spans(file_path: str, prefix: str) -> int:
+    """Add the histograms persisted by save_spans to the spans recorded so far.
+
+    Args:
+        file_path (str): The path to the JSON file.
+        prefix (str): The prefix of the span names to load.
+
+    Returns:
+        int: The number of spans loaded.
+    """
+    try:
+        with open(file_path) as f:
+            data = json.load(f)
+    except FileNotFoundError:
+        return 0
+    except (OSError, ValueError) as e:
+        logger.warning(f"Ignoring unreadable timing history {file_path}: {e}")
+        return 0
+    loaded = 0
+    with _lock:
+        for name, serialized in data.items():
+            if not name.startswith(prefix) or not isinstance(serialized, dict):
+                continue
+            try:
+                _histograms.setdefault(name, Histogram()).merge(serialized)
+                loaded += 1
+            except (TypeError, ValueError) as e:
+                logger.warning(f"Ignoring timing history of {name}: {e}")
+    return loaded
+
+
+def dump_stats(file_path: str) -> Dict[str, dict]:
+    """Write the span summaries to a JSON file.
+
+    Args:
+        file_path (str): The path to the file.
+
+    Returns:
+        dict: The summaries written.
+    """
+    stats = get_stats()
+    write_json_atomic(file_path, stats)
+    logger.info(f"Timing stats for {len(stats)} spans written to {file_path}")
+    return stats
+
+
+class ProfileCapture:
+    """Capture a cProfile or tracemalloc profile between start and stop.
+
+    cProfile only profiles the thread that called start, which should be the GUI thread. tracemalloc traces every
+    thread.
+
+    Args:
+        kind (str): 'cprofile' or 'tracemalloc'.
+        output_dir (str): The directory the profile is written to.
+    """
+
+    def __init__(self, kind: str, output_dir: str):
+        if kind not in PROFILE_KINDS:
+            raise ValueError(f"Unknown profile kind '{kind}', expected one of {', '.join(PROFILE_KINDS)}")
+        self.kind = kind
+        extension = 'prof' if kind == 'cprofile' else 'txt'
+        self.output_path = os.path.join(output_dir, f"{kind}-{time.strftime('%Y%m%d-%H%M%S')}.{extension}")
+        self._profiler: Optional['cProfile.Profile'] = None
+        self._started_tracemalloc = False
+
+    def start(self) -> None:
+        """Start capturing."""
+        logger.info(f"Starting {self.kind} capture")
+        if self.kind == 'cprofile':
+            self._profiler = cProfile.Profile()
+            self._profiler.enable()
+        elif not tracemalloc.is_tracing():
+            tracemalloc.start(10)
+            self._started_tracemalloc = True
+
+    def stop(self, top: int = 50) -> str:
+        """Stop capturing and write the profile.
+
+        Args:
+            top (int): The number of allocation sites written for tracemalloc.
+
+        Returns:
+            str: The path to the profile.
+        """
+        if self.kind == 'cprofile':
+            self._profiler.disable()
+            self._profiler.dump_stats(self.output_path)
+        else:
+            snapshot = tracemalloc.take_snapshot()
+            current, peak = tracemalloc.get_traced_memory()
+            if self._started_tracemalloc:
+                tracemalloc.stop()
+            with open(self.output_path, 'w') as f:
+                f.write(f"Traced memory: current {current / 1024:.0f} KiB, peak {peak / 1024:.0f} KiB\n\n")
+                for statistic in snapshot.statistics('lineno')[:top]:
+                    f.write(f"{statistic}\n")
+        logger.info(f"{self.kind} capture written to {self.output_path}")
+        return self.output_path
@@ -0,0 +1,173 @@
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Optional, Tuple
+
+from PySide6.QtCore import QObject, Signal
+
+from proton_mail_tray.profiling import record
+from proton_mail_tray.telemetry import TreeSampler
+from proton_mail_tray.windows import find_windows, has_window_control
+
+logger = logging.getLogger(__name__)
+
+POLL_SECONDS = 0.25
+
+# A tree counts as settled once its process count is stable and it uses less than this much CPU, where 100 is one
+# full core
+SETTLED_CPU_PERCENT = 5.0
+
+DEFAULT_SETTLE_SECONDS = 2.0
+DEFAULT_TIMEOUT_SECONDS = 120.0
+
+
+def wait_until_ready(pid: int, stop: threading.Event, settle_seconds: float = DEFAULT_SETTLE_SECONDS,
+                     timeout: float = DEFAULT_TIMEOUT_SECONDS, check_windows: bool = True,
+                     poll_seconds: float = POLL_SECONDS,
+                     on_poll: Optional[Callable[[], None]] = None) -> Tuple[Optional[str], float]:
+    """Wait until an application has started up. Blocks, so run it on a worker thread.
+
+    The application is ready as soon as it maps a window, when windows can be inspected, or once its process tree
+    has settled: the process count has not changed and CPU use has stayed under SETTLED_CPU_PERCENT for
+    settle_seconds. A settled tree counts as ready from the start of the quiet period, not from when it was noticed.
+
+    Args:
+        pid (int): The PID at the root of the tree.
+        stop (threading.Event): Set to stop waiting.
+        settle_seconds (float): How long the tree has to be quiet.
+        timeout (float): How long to wait at most.
+        check_windows (bool): Whether a mapped window counts as ready.
+        poll_seconds (float): How often to check.
+        on_poll (callable, optional): Called after every check that finds the process still running.
+
+    Returns:
+        tuple: How readiness was detected ('window', 'settled' or 'timeout', or None if the process exited or stop
+            was set) and the time.monotonic() value when it became ready.
+    """
+    check_windows = check_windows and has_window_control()
+    sampler = TreeSampler(include_pss=False)
+    start = time.monotonic()
+    quiet_since = None
+    processes = None
+    while not stop.wait(poll_seconds):
+        sample = sampler.sample(pid)
+        if sample is None:
+            return None, time.monotonic()
+        if on_poll is not None:
+            on_poll()
+        now = time.monotonic()
+        if check_windows and find_windows(pid):
+            return 'window', now
+
+        quiet = (sample.processes == processes and sample.cpu_percent is not None
+                 and sample.cpu_percent < SETTLED_CPU_PERCENT)
+        processes = sample.processes
+        if not quiet:
+            quiet_since = None
+        elif quiet_since is None:
+            quiet_since = now - poll_seconds  # quiet since the previous sample
+        if quiet_since is not None and now - quiet_since >= settle_seconds:
+            return 'settled', quiet_since
+        if now - start >= timeout:
+            return 'timeout', now
+    return None, time.monotonic()
+
+
+class ReadinessDetector(QObject):
+    """Detect when a launched or resumed Proton Mail is ready to use, and record how long it took.
+
+    Each watch waits on a worker thread with wait_until_ready. The time from the click to ready is recorded as the
+    'ready.<kind>' span, e.g. 'ready.cold' for a launch and 'ready.resume' for a thaw. Watching a new PID replaces the
+    previous watch.
+
+    Args:
+        settle_seconds (float): How long the process tree has to be quiet to count as ready.
+        timeout (float): How long to wait at most.
+        parent (QObject, optional): The parent object.
+
+    Signals:
+        ready (int, str, float): The PID, how readiness was detected, and the seconds from the click.
+    """
+
+    ready = Signal(int, str, float)
+    _detected = Signal(int, int, object, float)
+
+    def __init__(self, settle_seconds: float = DEFAULT_SETTLE_SECONDS, timeout: float = DEFAULT_TIMEOUT_SECONDS,
+                 parent: Optional[QObject] = None):
+        super().__init__(parent)
+        self.settle_seconds = settle_seconds
+        self.timeout = timeout
+        self.pid = None
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='readiness')
+        self._stop = threading.Event()
+        self._generation = 0
+        self._kind = None
+        self._started_at = None
+        self._detected.connect(self._on_detected)
+
+    @property
+    def waiting(self) -> bool:
+        """bool: Whether a watched PID is not ready yet."""
+        return self.pid is not None
+
+    def watch(self, pid: int, started_at: float, kind: str) -> None:
+        """Start waiting for a PID to become ready.
+
+        Args:
+            pid (int): The PID of Proton Mail.
+            started_at (float): The time.monotonic() value of the click.
+            kind (str): What is being waited for, used in the span name: 'cold' or 'resume'.
+        """
+        self.cancel()
+        self._stop = threading.Event()
+        self._generation += 1
+        self.pid = pid
+        self._kind = kind
+        self._started_at = started_at
+        self._executor.submit(self._wait_in_worker, self._generation, pid, self._stop)
+
+    def cancel(self) -> None:
+        """Stop waiting, e.g. because Proton Mail was closed."""
+        self._stop.set()
+        self.pid = None
+
+    def shutdown(self) -> None:
+        """Stop waiting and the worker thread."""
+        self.cancel()
+        self._executor.shutdown(wait=True)
+
+    def _wait_in_worker(self, generation: int, pid: int, stop: threading.Event) -> None:
+        """Wait for readiness and post the result to the GUI thread.
+
+        Args:
+            generation (int): The watch this wait belongs to.
+            pid (int): The PID to wait for.
+            stop (threading.Event): The stop event of this watch.
+        """
+        try:
+            how, ready_at = wait_until_ready(pid, stop, self.settle_seconds, self.timeout)
+        except Exception as e:
+            logger.exception(f"Failed to detect when Proton Mail is ready: {e}")
+            how, ready_at = None, time.monotonic()
+        self._detected.emit(generation, pid, how, ready_at)
+
+    def _on_detected(self, generation: int, pid: int, how: Optional[str], ready_at: float) -> None:
+        """Record the latency of a watch that is still current.
+
+        Args:
+            generation (int): The watch the result belongs to.
+            pid (int): The PID.
+            how (str or None): How readiness was detected, or None if the wait was stopped.
+            ready_at (float): When it became ready.
+        """
+        if generation != self._generation or self.pid != pid:
+            return
+        self.pid = None
+        if how is None:
+            return
+        elapsed = max(ready_at - self._started_at, 0.0)
+        if how != 'timeout':
+            record(f'ready.{self._kind}', elapsed)
+        logger.info(f"Proton Mail ready {elapsed * 1000:.0f} ms after the click ({self._kind}, detected by {how})")
+        self.ready.emit(pid, how, elapsed)
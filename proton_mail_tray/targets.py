@@ -0,0 +1,109 @@
+import logging
+from dataclasses import dataclass, field, replace
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Process names are truncated to 15 characters in /proc/<pid>/comm
+COMM_LENGTH = 15
+
+PROTON_MAIL = 'proton-mail'
+
+DEFAULT_TARGETS = {
+    PROTON_MAIL: {
+        'name': 'Proton Mail',
+        'process_name': 'Proton Mail Beta',
+        'paths': ["/usr/lib/proton-mail/Proton Mail Beta", "/opt/proton-mail/Proton Mail Beta"],
+        'aliases': ['proton-mail', 'me.proton.Mail'],
+        'enabled': True,
+    },
+    'proton-pass': {
+        'name': 'Proton Pass',
+        'process_name': 'Proton Pass',
+        'paths': ["/usr/lib/proton-pass/Proton Pass", "/opt/proton-pass/Proton Pass"],
+        'aliases': ['proton-pass', 'me.proton.Pass'],
+        'enabled': False,
+    },
+    'proton-vpn': {
+        'name': 'Proton VPN',
+        'process_name': 'protonvpn-app',
+        'paths': ["/usr/bin/protonvpn-app"],
+        'aliases': ['com.protonvpn.www'],
+        'enabled': False,
+    },
+    'proton-drive': {
+        'name': 'Proton Drive',
+        'process_name': 'Proton Drive',
+        'paths': ["/usr/lib/proton-drive/Proton Drive", "/opt/proton-drive/Proton Drive"],
+        'aliases': ['proton-drive'],
+        'enabled': False,
+    },
+}
+
+
+@dataclass(frozen=True)
+class Target:
+    """An application the tray can find, open and close.
+
+    Attributes:
+        key (str): The identifier used in the config file.
+        name (str): The display name.
+        process_name (str): The executable name as it appears in the process table.
+        paths (list): Standard install locations searched when no path is configured.
+        aliases (list): Other names of the application, as a command, .desktop file or Flatpak app ID, used to
+            discover it elsewhere.
+        path (str or None): The resolved path to the executable.
+        enabled (bool): Whether the target is shown in the tray menu.
+    """
+
+    key: str
+    name: str
+    process_name: str
+    paths: List[str] = field(default_factory=list)
+    aliases: List[str] = field(default_factory=list)
+    path: Optional[str] = None
+    enabled: bool = True
+
+    @property
+    def comm(self) -> str:
+        """str: The process name as truncated by the kernel."""
+        return self.process_name[:COMM_LENGTH]
+
+    def with_path(self, path: Optional[str]) -> 'Target':
+        """Return a copy of the target with a resolved path.
+
+        Args:
+            path (str or None): The path to the executable.
+
+        Returns:
+            Target: The updated target.
+        """
+        return replace(self, path=path)
+
+
+def load_targets(config: dict) -> Dict[str, Target]:
+    """Build the target registry from the defaults and the 'targets' section of the config.
+
+    Entries in the config override the matching default field by field, and unknown keys add new targets.
+
+    Args:
+        config (dict): The configuration.
+
+    Returns:
+        dict: The targets, keyed by target key.
+    """
+    overrides = config.get('targets', {})
+    targets = {}
+    for key in list(DEFAULT_TARGETS) + [key for key in overrides if key not in DEFAULT_TARGETS]:
+        entry = {**DEFAULT_TARGETS.get(key, {}), **overrides.get(key, {})}
+        if 'process_name' not in entry:
+            logger.warning(f"Ignoring target '{key}' without a process_name")
+            continue
+        targets[key] = Target(key=key,
+                              name=entry.get('name', key),
+                              process_name=entry['process_name'],
+                              paths=list(entry.get('paths', [])),
+                              aliases=list(entry.get('aliases', [])),
+                              path=entry.get('path'),
+                              enabled=entry.get('enabled', True))
+    return targets
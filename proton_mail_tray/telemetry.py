@@ -0,0 +1,270 @@
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, NamedTuple, Optional
+
+from PySide6.QtCore import QObject, QTimer, Signal
+
+from proton_mail_tray.utils import process_tree_pids
+
+logger = logging.getLogger(__name__)
+
+CLOCK_TICKS = os.sysconf('SC_CLK_TCK')
+PAGE_SIZE = os.sysconf('SC_PAGE_SIZE')
+
+MIN_INTERVAL_MS = 1000
+MAX_INTERVAL_MS = 8000
+
+
+class TreeSample(NamedTuple):
+    """Aggregate resource usage of a process tree.
+
+    Attributes:
+        pid (int): The PID at the root of the tree.
+        timestamp (float): When the sample was taken, from time.monotonic().
+        processes (int): The number of processes in the tree.
+        threads (int): The total number of threads.
+        rss (int): The total resident set size in bytes.
+        pss (int or None): The total proportional set size in bytes, or None if it could not be read.
+        cpu_percent (float or None): CPU use since the previous sample, where 100 is one full core, or None on the
+            first sample.
+    """
+
+    pid: int
+    timestamp: float
+    processes: int
+    threads: int
+    rss: int
+    pss: Optional[int]
+    cpu_percent: Optional[float]
+
+
+def read_proc_usage(pid: int, proc_root: str = '/proc') -> Optional[tuple]:
+    """Read the CPU time, thread count and RSS of a process from /proc/<pid>/stat.
+
+    Args:
+        pid (int): The PID to read.
+        proc_root (str): The mount point of procfs.
+
+    Returns:
+        tuple or None: (cpu_ticks, threads, rss_bytes), or None if the process does not exist.
+    """
+    try:
+        with open(f'{proc_root}/{pid}/stat', 'rb') as f:
+            data = f.read()
+    except OSError:
+        return None
+    fields = data[data.rfind(b')') + 2:].split()
+    return int(fields[11]) + int(fields[12]), int(fields[17]), int(fields[21]) * PAGE_SIZE
+
+
+def read_pss(pid: int, proc_root: str = '/proc') -> Optional[int]:
+    """Read the proportional set size of a process from /proc/<pid>/smaps_rollup.
+
+    Args:
+        pid (int): The PID to read.
+        proc_root (str): The mount point of procfs.
+
+    Returns:
+        int or None: The PSS in bytes, or None if it could not be read.
+    """
+    try:
+        with open(f'{proc_root}/{pid}/smaps_rollup', 'rb') as f:
+            for line in f:
+                if line.startswith(b'Pss:'):
+                    return int(line.split()[1]) * 1024
+    except (OSError, ValueError, IndexError):
+        pass
+    return None
+
+
+def format_bytes(size: Optional[int]) -> str:
+    """Format a size in bytes for display.
+
+    Args:
+        size (int or None): The size in bytes.
+
+    Returns:
+        str: The size in MB or GB, or 'n/a'.
+    """
+    if size is None:
+        return 'n/a'
+    if size >= 1024 ** 3:
+        return f"{size / 1024 ** 3:.2f} GB"
+    return f"{size / 1024 ** 2:.0f} MB"
+
+
+class TreeSampler:
+    """Sample the aggregate resource usage of a process tree.
+
+    Every process costs one read of /proc/<pid>/stat, plus one of /proc/<pid>/smaps_rollup when PSS is requested. CPU
+    use is the CPU time consumed by the tree between two samples, so a sampler keeps the previous totals per PID.
+
+    Args:
+        include_pss (bool): Whether to read PSS, which is more accurate than RSS for Electron but costs more.
+    """
+
+    def __init__(self, include_pss: bool = True):
+        self.include_pss = include_pss
+        self._previous_ticks: Dict[int, int] = {}
+        self._previous_time = None
+        self._previous_root = None
+
+    def sample(self, pid: int) -> Optional[TreeSample]:
+        """Sample the tree rooted at a PID.
+
+        Args:
+            pid (int): The PID at the root of the tree.
+
+        Returns:
+            TreeSample or None: The sample, or None if the process does not exist.
+        """
+        now = time.monotonic()
+        ticks = {}
+        threads = rss = 0
+        pss = 0 if self.include_pss else None
+        for tree_pid in process_tree_pids(pid):
+            usage = read_proc_usage(tree_pid)
+            if usage is None:
+                continue
+            ticks[tree_pid] = usage[0]
+            threads += usage[1]
+            rss += usage[2]
+            if pss is not None:
+                process_pss = read_pss(tree_pid)
+                pss = None if process_pss is None else pss + process_pss
+        if not ticks:
+            return None
+
+        cpu_percent = None
+        if self._previous_root == pid and now > self._previous_time:
+            # Processes that appeared since the previous sample count from zero
+            used = sum(total - self._previous_ticks.get(tree_pid, 0) for tree_pid, total in ticks.items())
+            cpu_percent = max(used, 0) / CLOCK_TICKS / (now - self._previous_time) * 100
+        self._previous_ticks = ticks
+        self._previous_time = now
+        self._previous_root = pid
+        return TreeSample(pid, now, len(ticks), threads, rss, pss, cpu_percent)
+
+
+class StatsSampler(QObject):
+    """Sample Proton Mail's process tree on a worker thread while someone is looking at the stats.
+
+    Sampling starts when the tray menu opens and stops when it closes. The interval starts at MIN_INTERVAL_MS and
+    doubles up to MAX_INTERVAL_MS while the readings are stable, dropping back as soon as they change.
+
+    Args:
+        parent (QObject, optional): The parent object.
+
+    Signals:
+        sampled (object): Emitted on the GUI thread with a TreeSample, or None if the process is not running.
+    """
+
+    sampled = Signal(object)
+    _sample_ready = Signal(object)
+
+    def __init__(self, parent: Optional[QObject] = None):
+        super().__init__(parent)
+        self.pid = None
+        self.last_sample = None
+        self._sampler = TreeSampler()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='stats sampler')
+        self._in_flight = False
+        self._running = False
+        self._interval_ms = MIN_INTERVAL_MS
+
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.timeout.connect(self._sample)
+        self._sample_ready.connect(self._on_sample_ready)
+
+    @property
+    def active(self) -> bool:
+        """bool: Whether periodic sampling is running."""
+        return self._running
+
+    def set_pid(self, pid: Optional[int]) -> None:
+        """Set the PID at the root of the tree to sample.
+
+        Args:
+            pid (int or None): The PID, or None if Proton Mail is not running.
+        """
+        if pid != self.pid:
+            self.pid = pid
+            self.last_sample = None
+
+    def start(self) -> None:
+        """Take a sample now and keep sampling until stopped."""
+        self._interval_ms = MIN_INTERVAL_MS
+        self._running = True
+        self._sample()
+
+    def stop(self) -> None:
+        """Stop sampling."""
+        self._running = False
+        self._timer.stop()
+
+    def shutdown(self) -> None:
+        """Stop sampling and the worker thread."""
+        self.stop()
+        self._executor.shutdown(wait=True)
+
+    def _sample(self) -> None:
+        """Sample the tree on the worker thread."""
+        if self._in_flight:
+            return
+        if self.pid is None:
+            self._on_sample_ready(None)
+            return
+        self._in_flight = True
+        self._executor.submit(self._sample_in_worker, self.pid)
+
+    def _sample_in_worker(self, pid: int) -> None:
+        """Take a sample and post it to the GUI thread.
+
+        Args:
+            pid (int): The PID at the root of the tree.
+        """
+        try:
+            sample = self._sampler.sample(pid)
+        except Exception as e:
+            logger.exception(f"Failed to sample process tree of {pid}: {e}")
+            sample = None
+        self._sample_ready.emit(sample)
+
+    def _on_sample_ready(self, sample: Optional[TreeSample]) -> None:
+        """Publish a sample, adapt the interval and schedule the next one.
+
+        Args:
+            sample (TreeSample or None): The sample.
+        """
+        self._in_flight = False
+        if sample is not None and sample.pid != self.pid:
+            return  # stale sample for a previous instance
+        if self._is_stable(sample):
+            self._interval_ms = min(self._interval_ms * 2, MAX_INTERVAL_MS)
+        else:
+            self._interval_ms = MIN_INTERVAL_MS
+        self.last_sample = sample
+        self.sampled.emit(sample)
+        if self._running:
+            self._timer.start(self._interval_ms)
+
+    def _is_stable(self, sample: Optional[TreeSample]) -> bool:
+        """Check whether a sample is close to the previous one.
+
+        Args:
+            sample (TreeSample or None): The new sample.
+
+        Returns:
+            bool: True if memory moved less than 2% and CPU less than 5 points.
+        """
+        previous = self.last_sample
+        if sample is None or previous is None:
+            return sample is None and previous is None
+        if abs(sample.rss - previous.rss) > 0.02 * max(previous.rss, 1):
+            return False
+        if sample.cpu_percent is None or previous.cpu_percent is None:
+            return False
+        return abs(sample.cpu_percent - previous.cpu_percent) < 5
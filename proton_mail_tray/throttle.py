@@ -0,0 +1,315 @@
+import logging
+import signal
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+import psutil
+from PySide6.QtCore import QObject, QTimer, Signal
+
+from proton_mail_tray.monitor import SubprocessMonitor
+from proton_mail_tray.telemetry import TreeSample, TreeSampler
+from proton_mail_tray.utils import process_tree_pids, signal_process_tree
+from proton_mail_tray.windows import find_windows
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_THROTTLE_CONFIG = {
+    'enabled': False,
+    'cpu_percent': 30.0,  # 100 is one full core
+    'sustained_seconds': 60,
+    'escalate_after_seconds': 120,
+    'check_interval_seconds': 10,
+    'when': 'hidden',  # 'hidden' or 'always'
+    'nice': 10,
+    'duty_cycle_percent': 25,  # share of each period Proton Mail may run
+    'duty_cycle_period_seconds': 1.0,
+    'restart': True,
+}
+
+THROTTLE_WHEN = ('hidden', 'always')
+
+# The remedies in the order they are tried, each one when the previous one has not helped for escalate_after_seconds
+REMEDIES = ('renice', 'duty cycle', 'restart')
+
+
+class CpuThrottler(QObject):
+    """Rein in a backgrounded Proton Mail whose process tree keeps using CPU.
+
+    While a PID is set, the tree's CPU use is sampled on a worker thread every check interval. Once it has stayed over
+    cpu_percent for sustained_seconds while the app is backgrounded (its windows are hidden, or always), the remedies
+    are applied one after the other, moving on when the previous one has not helped for escalate_after_seconds:
+
+    1. renice: the tree's nice value is raised, so it yields to everything else.
+    2. duty cycle: the tree is stopped with SIGSTOP for part of every period and continued with SIGCONT for the rest.
+    3. restart: restart_requested is emitted, if restart is enabled.
+
+    The remedies are lifted as soon as the CPU use drops (allowing for the duty cycle) or a window is shown. Each one
+    is logged with the CPU it reclaimed, measured on the next sample.
+
+    Args:
+        monitor (SubprocessMonitor): The monitor reporting Proton Mail exits.
+        config (dict, optional): The 'throttle' section of the config.
+        parent (QObject, optional): The parent object.
+
+    Signals:
+        restart_requested (int, object): The PID to restart and the TreeSample that triggered it.
+    """
+
+    restart_requested = Signal(int, object)
+    _sample_ready = Signal(object, object)
+
+    def __init__(self, monitor: SubprocessMonitor, config: Optional[dict] = None, parent: Optional[QObject] = None):
+        super().__init__(parent)
+        self.pid = None
+        self.level = 0
+        self._sampler = TreeSampler(include_pss=False)
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='cpu throttler')
+        self._over_since = None
+        self._level_since = None
+        self._before = None
+        self._restart_pending = False
+        self._original_nice = None
+        self._stopped = False
+        self._warned_windows = False
+
+        self._timer = QTimer(self)
+        self._timer.timeout.connect(self._check)
+        self._duty_timer = QTimer(self)
+        self._duty_timer.setSingleShot(True)
+        self._duty_timer.timeout.connect(self._on_duty_cycle)
+        self._sample_ready.connect(self._on_sample_ready)
+        monitor.process_exited.connect(self._on_process_exited)
+        self.configure(config)
+
+    def configure(self, config: Optional[dict]) -> None:
+        """Apply the throttling settings, starting or stopping the checks if enabled changed.
+
+        Args:
+            config (dict or None): The 'throttle' section of the config.
+        """
+        config = {**DEFAULT_THROTTLE_CONFIG, **(config or {})}
+        self.enabled = bool(config['enabled'])
+        self.cpu_percent = float(config['cpu_percent'])
+        self.sustained_seconds = float(config['sustained_seconds'])
+        self.escalate_after_seconds = float(config['escalate_after_seconds'])
+        self.nice = int(config['nice'])
+        self.duty_cycle_percent = min(max(float(config['duty_cycle_percent']), 1.0), 99.0)
+        self.duty_cycle_period_ms = int(config['duty_cycle_period_seconds'] * 1000)
+        self.restart = bool(config['restart'])
+        self.when = config['when']
+        if self.when not in THROTTLE_WHEN:
+            logger.warning(f"Unknown throttle when '{self.when}', using 'hidden'")
+            self.when = 'hidden'
+
+        self._timer.setInterval(int(config['check_interval_seconds'] * 1000))
+        if self.pid is not None and self.enabled:
+            self._timer.start()
+        else:
+            self._timer.stop()
+            self.release()
+            self._over_since = None
+
+    def set_pid(self, pid: Optional[int]) -> None:
+        """Set the PID of the running Proton Mail, or None to stop checking. Lifts the remedies of the previous PID.
+
+        Args:
+            pid (int or None): The PID of Proton Mail.
+        """
+        if pid == self.pid:
+            return
+        self.release()
+        self.pid = pid
+        self._over_since = None
+        self._before = None
+        self._restart_pending = False
+        if pid is not None and self.enabled:
+            self._timer.start()
+        else:
+            self._timer.stop()
+
+    def restart_finished(self, new_pid: Optional[int]) -> None:
+        """Record that a requested restart has completed, and watch the new instance.
+
+        Args:
+            new_pid (int or None): The PID of the restarted Proton Mail, or None if it failed to start.
+        """
+        before = self._before
+        self.set_pid(new_pid)
+        self._before = before if new_pid is not None else None
+
+    def release(self, reason: Optional[str] = None) -> None:
+        """Lift the remedies: continue a stopped tree and restore its nice value.
+
+        Run before every open or close job, so the job never finds the tree stopped by the duty cycle.
+
+        Args:
+            reason (str, optional): Why, for the log.
+        """
+        if self.level == 0:
+            return
+        self._duty_timer.stop()
+        if self._stopped:
+            signal_process_tree(self.pid, signal.SIGCONT)
+            self._stopped = False
+        if self._original_nice is not None:
+            self._renice(self._original_nice)
+            self._original_nice = None
+        if reason:
+            logger.info(f"Lifting CPU throttling of Proton Mail: {reason}")
+        self.level = 0
+        self._level_since = None
+
+    def shutdown(self) -> None:
+        """Lift the remedies and stop checking and the worker thread."""
+        self._timer.stop()
+        self.release()
+        self._executor.shutdown(wait=True)
+
+    def _on_process_exited(self, pid: int, returncode: Optional[int]) -> None:
+        """Stop checking an instance that has exited.
+
+        Args:
+            pid (int): The PID that exited.
+            returncode (int or None): The return code.
+        """
+        if pid == self.pid and not self._restart_pending:
+            self._stopped = False
+            self.set_pid(None)
+
+    def _check(self) -> None:
+        """Sample the tree on the worker thread."""
+        if self.pid is not None:
+            self._executor.submit(self._sample_in_worker, self.pid)
+
+    def _sample_in_worker(self, pid: int) -> None:
+        """Take a sample and post it to the GUI thread.
+
+        The visible windows are only looked up when they matter: over the threshold or throttled, with when set to
+        'hidden'.
+
+        Args:
+            pid (int): The PID at the root of the tree.
+        """
+        visible_windows = None
+        try:
+            sample = self._sampler.sample(pid)
+            if (sample is not None and sample.cpu_percent is not None and self.when == 'hidden'
+                    and (self.level or sample.cpu_percent > self.cpu_percent)):
+                visible_windows = find_windows(pid)
+        except Exception as e:
+            logger.exception(f"Throttler failed to sample process tree of {pid}: {e}")
+            sample = None
+        self._sample_ready.emit(sample, visible_windows)
+
+    def _on_sample_ready(self, sample: Optional[TreeSample], visible_windows: Optional[list]) -> None:
+        """Track how long the tree has been busy while backgrounded, and escalate or lift the remedies.
+
+        Args:
+            sample (TreeSample or None): The sample.
+            visible_windows (list or None): The visible windows of Proton Mail, or None if they were not looked up.
+        """
+        if (sample is None or sample.pid != self.pid or self._restart_pending or sample.cpu_percent is None):
+            return
+        cpu = sample.cpu_percent
+        if self._before is not None:
+            remedy, before = self._before
+            logger.info(f"Throttled Proton Mail ({remedy}): CPU {before:.0f}% -> {cpu:.0f}%, reclaimed "
+                        f"{max(before - cpu, 0.0):.0f}% of a core")
+            self._before = None
+
+        # The CPU use the tree asks for, which the duty cycle hides
+        demand = cpu * 100 / self.duty_cycle_percent if self.level == 2 else cpu
+        if demand <= self.cpu_percent:
+            if self._over_since is not None and self.level == 0:
+                logger.info(f"Proton Mail CPU back under {self.cpu_percent:.0f}%: {cpu:.0f}%")
+            self.release(f"CPU back under {self.cpu_percent:.0f}% ({demand:.0f}%)")
+            self._over_since = None
+            return
+        if not self._is_backgrounded(visible_windows):
+            self.release("Proton Mail is in use")
+            self._over_since = None
+            return
+
+        now = time.monotonic()
+        if self._over_since is None:
+            logger.info(f"Proton Mail in the background using {cpu:.0f}% CPU, over the {self.cpu_percent:.0f}% "
+                        f"threshold")
+            self._over_since = now
+        if self.level == 0:
+            due = now - self._over_since >= self.sustained_seconds
+        else:
+            due = now - self._level_since >= self.escalate_after_seconds
+        if due:
+            self._escalate(sample)
+
+    def _is_backgrounded(self, visible_windows: Optional[list]) -> bool:
+        """Check whether the app counts as backgrounded.
+
+        Args:
+            visible_windows (list or None): The visible windows of Proton Mail, or None if unknown.
+
+        Returns:
+            bool: True if Proton Mail may be throttled.
+        """
+        if self.when == 'always':
+            return True
+        if visible_windows is None:
+            if not self._warned_windows:
+                logger.info("Not throttling Proton Mail: its windows cannot be inspected (xdotool is missing), "
+                            "set throttle.when to 'always' to throttle anyway")
+                self._warned_windows = True
+            return False
+        return not visible_windows
+
+    def _escalate(self, sample: TreeSample) -> None:
+        """Apply the next remedy.
+
+        Args:
+            sample (TreeSample): The sample that triggered it.
+        """
+        if self.level == (len(REMEDIES) if self.restart else len(REMEDIES) - 1):
+            return  # out of remedies, keep the last one
+        self.level += 1
+        self._level_since = time.monotonic()
+        remedy = REMEDIES[self.level - 1]
+        self._before = (remedy, sample.cpu_percent)
+        logger.warning(f"Proton Mail has used {sample.cpu_percent:.0f}% CPU in the background for "
+                       f"{(self._level_since - self._over_since):.0f} s, throttling it: {remedy}")
+        if remedy == 'renice':
+            try:
+                self._original_nice = psutil.Process(self.pid).nice()
+            except psutil.Error:
+                self._original_nice = None
+            self._renice(self.nice)
+        elif remedy == 'duty cycle':
+            self._on_duty_cycle()
+        else:
+            self.release()
+            self._restart_pending = True
+            self.restart_requested.emit(sample.pid, sample)
+
+    def _renice(self, nice: int) -> None:
+        """Set the nice value of every process in the tree.
+
+        Lowering it again is not permitted without privileges, in which case the tree keeps the raised value.
+
+        Args:
+            nice (int): The nice value.
+        """
+        for tree_pid in process_tree_pids(self.pid):
+            try:
+                psutil.Process(tree_pid).nice(nice)
+            except psutil.NoSuchProcess:
+                pass
+            except psutil.AccessDenied:
+                logger.debug(f"Not permitted to set the nice value of {tree_pid} to {nice}")
+
+    def _on_duty_cycle(self) -> None:
+        """Stop or continue the tree, and schedule the next switch."""
+        if self.level != 2 or self.pid is None:
+            return
+        self._stopped = not self._stopped
+        signal_process_tree(self.pid, signal.SIGSTOP if self._stopped else signal.SIGCONT)
+        running_ms = self.duty_cycle_period_ms * self.duty_cycle_percent / 100
+        self._duty_timer.start(int(self.duty_cycle_period_ms - running_ms if self._stopped else running_ms))
@@ -1,74 +1,405 @@
 import logging
 import os
-from typing import Optional
+import time
+from typing import Dict, Iterable, List, NamedTuple, Optional
 
 import psutil
-from psutil import AccessDenied, NoSuchProcess, TimeoutExpired
+from psutil import AccessDenied, NoSuchProcess
+
+from proton_mail_tray.profiling import timed
+from proton_mail_tray.targets import PROTON_MAIL, Target, load_targets
 
 logger = logging.getLogger(__name__)
 
+PROTON_MAIL_TARGET = load_targets({})[PROTON_MAIL]
+
+# /proc/<pid>/task/<tid>/children needs CONFIG_PROC_CHILDREN
+HAS_PROC_CHILDREN = os.path.exists(f'/proc/self/task/{os.getpid()}/children')
+
+
+def read_proc_stat(pid: int, proc_root: str = '/proc') -> Optional[tuple]:
+    """Read the state, parent PID and start time of a process from /proc/<pid>/stat.
+
+    Args:
+        pid (int): The PID to read.
+        proc_root (str): The mount point of procfs.
+
+    Returns:
+        tuple or None: (state, ppid, start_time) with start_time in clock ticks since boot, or None if the process
+            does not exist.
+    """
+    try:
+        with open(f'{proc_root}/{pid}/stat', 'rb') as f:
+            data = f.read()
+    except OSError:
+        return None
+    # The comm field may contain spaces and parentheses, so the remaining fields start after the last ')'
+    fields = data[data.rfind(b')') + 2:].split()
+    return fields[0].decode(), int(fields[1]), int(fields[19])
+
+
+def process_tree_pids(pid: int, proc_root: str = '/proc') -> List[int]:
+    """List a process and all of its descendants.
+
+    The tree is walked through /proc/<pid>/task/<tid>/children, which avoids reading the whole process table. Kernels
+    without that file fall back to psutil.
+
+    Args:
+        pid (int): The PID at the root of the tree.
+        proc_root (str): The mount point of procfs.
+
+    Returns:
+        list: The PIDs in the tree, root first, or an empty list if the root does not exist.
+    """
+    if proc_root == '/proc' and not HAS_PROC_CHILDREN:
+        try:
+            return [pid] + [child.pid for child in psutil.Process(pid).children(recursive=True)]
+        except (NoSuchProcess, AccessDenied):
+            return []
+
+    tree = []
+    pending = [pid]
+    while pending:
+        current = pending.pop()
+        try:
+            tids = os.listdir(f'{proc_root}/{current}/task')
+        except OSError:  # exited while walking
+            continue
+        tree.append(current)
+        for tid in tids:
+            try:
+                with open(f'{proc_root}/{current}/task/{tid}/children', 'rb') as f:
+                    pending.extend(int(child) for child in f.read().split())
+            except OSError:
+                continue
+    return tree
+
+
+@timed('scan_processes')
+def scan_processes(targets: Iterable[Target], proc_root: str = '/proc') -> Dict[str, Optional[int]]:
+    """Find the main process of every target in a single pass over the process table.
+
+    Each process costs one read of /proc/<pid>/comm and a dictionary lookup, however many targets there are. Electron
+    apps run many processes under the same name, so the match whose parent is not also a match is returned.
+
+    Args:
+        targets (iterable of Target): The targets to find.
+        proc_root (str): The mount point of procfs.
+
+    Returns:
+        dict: The PID of each target, or None if it is not running, keyed by target key.
+    """
+    keys_by_comm = {}
+    for target in targets:
+        keys_by_comm.setdefault(target.comm.encode(), []).append(target.key)
+    matches = {key: [] for keys in keys_by_comm.values() for key in keys}
+
+    with os.scandir(proc_root) as entries:
+        for entry in entries:
+            if not entry.name.isdigit():
+                continue
+            try:
+                with open(f'{proc_root}/{entry.name}/comm', 'rb') as f:
+                    comm = f.read().rstrip(b'\n')
+            except OSError:  # exited mid-scan or access denied
+                continue
+            for key in keys_by_comm.get(comm, ()):
+                matches[key].append(int(entry.name))
+
+    return {key: _main_pid(pids, proc_root) for key, pids in matches.items()}
+
+
+def _main_pid(pids: List[int], proc_root: str = '/proc') -> Optional[int]:
+    """Pick the main process out of processes sharing a name.
+
+    Args:
+        pids (list): The PIDs with a matching name.
+        proc_root (str): The mount point of procfs.
+
+    Returns:
+        int or None: The lowest PID whose parent is not in the list, or None if the list is empty.
+    """
+    if len(pids) <= 1:
+        return pids[0] if pids else None
+    candidates = set(pids)
+    for pid in sorted(pids):
+        stat = read_proc_stat(pid, proc_root)
+        if stat is not None and stat[1] not in candidates:
+            return pid
+    return min(pids)
+
+
+class ProcessCache:
+    """Remember where each target was last found so it can be revalidated without a full process scan.
+
+    An entry is the PID together with its create time. A reused PID belongs to a process with a different create time,
+    so it fails validation and the next lookup falls back to a scan.
+    """
+
+    def __init__(self):
+        self.entries: Dict[str, tuple] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def lookup(self, key: str = PROTON_MAIL) -> Optional[int]:
+        """Return the cached PID of a target if it still belongs to the same live process.
+
+        Args:
+            key (str): The target key.
+
+        Returns:
+            int or None: The cached PID, or None if there is no valid entry.
+        """
+        entry = self.entries.get(key)
+        if entry is not None:
+            pid, create_time = entry
+            stat = read_proc_stat(pid)
+            if stat is not None and stat[0] != 'Z' and stat[2] == create_time:
+                self.hits += 1
+                return pid
+            logger.debug(f"Cached PID {pid} for {key} is no longer valid")
+            del self.entries[key]
+        self.misses += 1
+        return None
+
+    def store(self, key: str, pid: int) -> None:
+        """Cache the PID of a target along with its create time.
+
+        Args:
+            key (str): The target key.
+            pid (int): The PID to cache.
+        """
+        stat = read_proc_stat(pid)
+        if stat is None:
+            self.entries.pop(key, None)
+            return
+        self.entries[key] = (pid, stat[2])
+
+    def invalidate(self, pid: Optional[int] = None) -> None:
+        """Drop cached entries.
+
+        Args:
+            pid (int, optional): Only drop entries for this PID.
+        """
+        if pid is None:
+            self.entries.clear()
+            return
+        for key in [key for key, entry in self.entries.items() if entry[0] == pid]:
+            del self.entries[key]
+
+    def stats(self) -> dict:
+        """Get the cache hit and miss counters.
+
+        Returns:
+            dict: The number of hits and misses.
+        """
+        return {'hits': self.hits, 'misses': self.misses}
 
-def find_proton_mail_path() -> Optional[str]:
-    """Find the path to Proton Mail Beta.
+
+process_cache = ProcessCache()
+
+
+@timed('find_processes')
+def find_processes(targets: Iterable[Target]) -> Dict[str, Optional[int]]:
+    """Find the running process of each target.
+
+    Cached PIDs are revalidated first, and the targets that miss are resolved together in one scan.
+
+    Args:
+        targets (iterable of Target): The targets to find.
 
     Returns:
-        str or None: The path to Proton Mail Beta, or None if it could not be found.
+        dict: The PID of each target, or None if it is not running, keyed by target key.
     """
-    possible_paths = [
-        "/usr/lib/proton-mail/Proton Mail Beta",
-        "/opt/proton-mail/Proton Mail Beta",
-    ]
+    pids = {}
+    missing = []
+    for target in targets:
+        pids[target.key] = process_cache.lookup(target.key)
+        if pids[target.key] is None:
+            missing.append(target)
 
-    logger.info("Searching for Proton Mail Beta...")
-    for path in possible_paths:
-        logger.info(f"Checking path: {path}")
-        if os.path.exists(path):
-            logger.info(f"Found Proton Mail Beta at: {path}")
-            return path
+    if missing:
+        logger.debug(f"Scanning processes for: {', '.join(target.name for target in missing)}")
+        for key, pid in scan_processes(missing).items():
+            pids[key] = pid
+            if pid is not None:
+                process_cache.store(key, pid)
+    return pids
 
-    logger.info("Proton Mail Beta not found in standard locations.")
-    return None
 
+def is_target_running(target: Target) -> Optional[int]:
+    """Check if a target is running and return its PID.
 
-def is_proton_mail_running() -> Optional[int]:
+    Args:
+        target (Target): The target to check.
+
+    Returns:
+        int or None: The PID of the target, or None if it is not running.
+    """
+    pid = find_processes([target])[target.key]
+    if pid is None:
+        logger.debug(f"{target.name} is not running")
+    else:
+        logger.debug(f"{target.name} is running with PID: {pid}")
+    return pid
+
+
+def is_proton_mail_running(include_frozen: bool = True) -> Optional[int]:
     """Check if Proton Mail is running and return its PID.
 
+    Args:
+        include_frozen (bool): Whether a frozen (hibernated) Proton Mail counts as running.
+
     Returns:
         int or None: The PID of Proton Mail, or None if it is not running.
     """
-    logger.info("Checking if Proton Mail is running")
-    try:
-        for proc in psutil.process_iter(['pid', 'name']):
-            process_name = proc.info['name']
-            pid = proc.info['pid']
-            if process_name.startswith('Proton Mail Bet'):  # Truncated name due to 15-character limit
-                logger.info(f"Process name: {process_name}, process pid: {pid}")
-                logger.info(f"Proton Mail is running with PID: {pid}")
-                return pid
-    except psutil.NoSuchProcess:
-        logger.warning(f"Process {proc.info['name']} does not exist")
-    except psutil.AccessDenied as e:
-        logger.warning(f"Access denied while checking process {proc.info['name']}: {e}")
-    logger.info("Proton Mail is not running")
-    return None
+    pid = is_target_running(PROTON_MAIL_TARGET)
+    if pid is not None and not include_frozen and is_process_frozen(pid):
+        logger.info(f"Proton Mail is frozen with PID: {pid}")
+        return None
+    return pid
+
+
+def is_process_frozen(pid: int) -> bool:
+    """Check if a process is stopped by a signal.
+
+    Args:
+        pid (int): The PID to check.
 
+    Returns:
+        bool: True if the process is stopped.
+    """
+    stat = read_proc_stat(pid)
+    return stat is not None and stat[0] == 'T'
+
+
+def signal_process_tree(pid: int, sig: int, parent_first: bool = True) -> List[int]:
+    """Send a signal to a process and all of its descendants.
+
+    Args:
+        pid (int): The PID at the root of the tree.
+        sig (int): The signal to send.
+        parent_first (bool): Signal the root before its descendants, otherwise after.
 
-def terminate_process(process: psutil.Process) -> None:
+    Returns:
+        list: The PIDs that were signalled.
+    """
+    tree = []
+    for tree_pid in process_tree_pids(pid):
+        try:
+            tree.append(psutil.Process(tree_pid))
+        except NoSuchProcess:
+            pass
+    if not tree:
+        logger.warning(f"Unable to collect process tree of {pid}")
+        return []
+    if not parent_first:
+        tree.reverse()
+
+    signalled = []
+    for process in tree:
+        try:
+            process.send_signal(sig)
+            signalled.append(process.pid)
+        except NoSuchProcess:
+            pass
+        except AccessDenied as e:
+            logger.warning(f"Access denied while signalling process {process.pid}: {e}")
+    return signalled
+
+
+class TerminationReport(NamedTuple):
+    """The outcome of terminating a process tree.
+
+    Attributes:
+        outcomes (dict): How each PID ended: 'terminated', 'killed', 'gone', 'access denied' or 'survived'.
+        elapsed (float): The total shutdown time in seconds.
+    """
+
+    outcomes: Dict[int, str]
+    elapsed: float
+
+
+def terminate_process(process: psutil.Process, timeout: float = 5) -> TerminationReport:
     """Terminate the given process and its children.
 
+    The whole tree is collected first and sent SIGTERM at once, then waited on together, so the timeouts do not add
+    up. Anything still alive at the deadline is sent SIGKILL.
+
     Args:
         process (psutil.Process): The process to terminate.
+        timeout (float): The overall deadline in seconds before remaining processes are killed.
+
+    Returns:
+        TerminationReport: The outcome for each process and the total shutdown time.
     """
-    try:
-        logger.info(f"Terminating process {process.pid}")
-        process.terminate()
-        process.wait(timeout=5)  # Wait for the process to terminate
-    except NoSuchProcess:
-        logger.exception(f"Process {process.pid} does not exist")
-    except AccessDenied:
-        logger.exception(f"Access denied while terminating process {process.pid}")
-    except TimeoutExpired:
-        logger.exception(f"Process {process.pid} did not terminate in time, force killing")
-        process.kill()
-    except Exception as e:
-        logger.exception(f"Failed to terminate process {process.pid}: {e}")
+    start = time.perf_counter()
+    outcomes = {}
+    tree = [process]
+    for pid in process_tree_pids(process.pid)[1:]:
+        try:
+            tree.append(psutil.Process(pid))
+        except NoSuchProcess:
+            pass
+    logger.info(f"Terminating process {process.pid} and {len(tree) - 1} descendants")
+
+    signalled = []
+    for proc in tree:
+        try:
+            proc.terminate()
+            signalled.append(proc)
+        except NoSuchProcess:
+            outcomes[proc.pid] = 'gone'
+        except AccessDenied:
+            logger.exception(f"Access denied while terminating process {proc.pid}")
+            outcomes[proc.pid] = 'access denied'
+
+    gone, alive = _wait_procs(signalled, timeout)
+    outcomes.update((proc.pid, 'terminated') for proc in gone)
+    if alive:
+        logger.warning(f"Processes {[proc.pid for proc in alive]} did not terminate in time, force killing")
+        for proc in alive:
+            try:
+                proc.kill()
+            except NoSuchProcess:
+                pass
+            except AccessDenied:
+                logger.exception(f"Access denied while killing process {proc.pid}")
+        killed, survivors = _wait_procs(alive, 1)
+        outcomes.update((proc.pid, 'killed') for proc in killed)
+        outcomes.update((proc.pid, 'survived') for proc in survivors)
+
+    elapsed = time.perf_counter() - start
+    logger.info(f"Terminated process tree of {process.pid} in {elapsed * 1000:.0f} ms: {outcomes}")
+    return TerminationReport(outcomes, elapsed)
+
+
+def _wait_procs(processes: List[psutil.Process], timeout: float) -> tuple:
+    """Wait for processes to exit, counting zombies as exited.
+
+    Descendants are reparented to init or a subreaper when their parent dies, and stay zombies until it reaps them,
+    so psutil.wait_procs alone would wait out the whole timeout for them.
+
+    Args:
+        processes (list): The processes to wait for.
+        timeout (float): The deadline in seconds.
+
+    Returns:
+        tuple: The lists of exited and still running processes.
+    """
+    deadline = time.monotonic() + timeout
+    gone, alive = [], list(processes)
+    while alive:
+        exited, alive = psutil.wait_procs(alive, timeout=max(min(0.02, deadline - time.monotonic()), 0))
+        gone.extend(exited)
+        for proc in list(alive):
+            try:
+                zombie = proc.status() == psutil.STATUS_ZOMBIE
+            except NoSuchProcess:
+                zombie = True
+            if zombie:
+                alive.remove(proc)
+                gone.append(proc)
+        if time.monotonic() >= deadline:
+            break
+    return gone, alive
@@ -0,0 +1,200 @@
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+from PySide6.QtCore import QObject, QTimer, Signal
+
+from proton_mail_tray.monitor import SubprocessMonitor
+from proton_mail_tray.telemetry import TreeSample, TreeSampler, format_bytes
+from proton_mail_tray.windows import find_windows
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_WATCHDOG_CONFIG = {
+    'enabled': False,
+    'memory_limit_mb': 3072,
+    'sustained_minutes': 10,
+    'check_interval_seconds': 60,
+    'restart_when': 'idle',  # 'immediately', 'idle' or 'hidden'
+    'idle_cpu_percent': 2.0,
+}
+
+RESTART_WHEN = ('immediately', 'idle', 'hidden')
+
+
+class MemoryWatchdog(QObject):
+    """Request a restart of Proton Mail when its process tree stays over a memory limit.
+
+    While a PID is set, the tree's memory (PSS where available, otherwise RSS) is sampled on a worker thread every
+    check interval. Once it has stayed over the limit for the sustained window, restart_requested is emitted, either
+    straight away or once the app is idle or has no visible windows. The watchdog follows the monitor, so an exit
+    clears its state.
+
+    Args:
+        monitor (SubprocessMonitor): The monitor reporting Proton Mail exits.
+        config (dict, optional): The 'watchdog' section of the config.
+        parent (QObject, optional): The parent object.
+
+    Signals:
+        restart_requested (int, object): The PID to restart and the TreeSample that triggered it.
+    """
+
+    restart_requested = Signal(int, object)
+    _sample_ready = Signal(object, object)
+
+    def __init__(self, monitor: SubprocessMonitor, config: Optional[dict] = None, parent: Optional[QObject] = None):
+        super().__init__(parent)
+        self.pid = None
+        self._sampler = TreeSampler()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='memory watchdog')
+        self._over_since = None
+        self._restart_pending = False
+        self._before_restart = None
+
+        self._timer = QTimer(self)
+        self._timer.timeout.connect(self._check)
+        self._sample_ready.connect(self._on_sample_ready)
+        monitor.process_exited.connect(self._on_process_exited)
+        self.configure(config)
+
+    def configure(self, config: Optional[dict]) -> None:
+        """Apply the watchdog settings, starting or stopping the checks if enabled changed.
+
+        Time already spent over the limit still counts towards the new sustained window.
+
+        Args:
+            config (dict or None): The 'watchdog' section of the config.
+        """
+        config = {**DEFAULT_WATCHDOG_CONFIG, **(config or {})}
+        self.enabled = bool(config['enabled'])
+        self.memory_limit = int(config['memory_limit_mb'] * 1024 * 1024)
+        self.sustained_seconds = float(config['sustained_minutes']) * 60
+        self.idle_cpu_percent = float(config['idle_cpu_percent'])
+        self.restart_when = config['restart_when']
+        if self.restart_when not in RESTART_WHEN:
+            logger.warning(f"Unknown watchdog restart_when '{self.restart_when}', using 'idle'")
+            self.restart_when = 'idle'
+
+        self._timer.setInterval(int(config['check_interval_seconds'] * 1000))
+        if self.pid is not None and self.enabled:
+            self._timer.start()
+        else:
+            self._timer.stop()
+            self._over_since = None
+
+    def set_pid(self, pid: Optional[int]) -> None:
+        """Set the PID of the running Proton Mail, or None to stop checking.
+
+        Args:
+            pid (int or None): The PID of Proton Mail.
+        """
+        if pid == self.pid:
+            return
+        self.pid = pid
+        self._over_since = None
+        self._restart_pending = False
+        if pid is not None and self.enabled:
+            self._timer.start()
+        else:
+            self._timer.stop()
+
+    def restart_finished(self, new_pid: Optional[int]) -> None:
+        """Record that a requested restart has completed, and watch the new instance.
+
+        Args:
+            new_pid (int or None): The PID of the restarted Proton Mail, or None if it failed to start.
+        """
+        self._restart_pending = False
+        self.set_pid(new_pid)
+
+    def shutdown(self) -> None:
+        """Stop checking and the worker thread."""
+        self._timer.stop()
+        self._executor.shutdown(wait=True)
+
+    def _on_process_exited(self, pid: int, returncode: Optional[int]) -> None:
+        """Stop checking an instance that has exited.
+
+        Args:
+            pid (int): The PID that exited.
+            returncode (int or None): The return code.
+        """
+        if pid == self.pid and not self._restart_pending:
+            self.set_pid(None)
+
+    def _check(self) -> None:
+        """Sample the tree on the worker thread."""
+        if self.pid is not None:
+            self._executor.submit(self._sample_in_worker, self.pid)
+
+    def _sample_in_worker(self, pid: int) -> None:
+        """Take a sample and post it to the GUI thread.
+
+        The visible windows are only looked up when they matter: over the limit with restart_when set to 'hidden'.
+
+        Args:
+            pid (int): The PID at the root of the tree.
+        """
+        visible_windows = None
+        try:
+            sample = self._sampler.sample(pid)
+            if (sample is not None and self.restart_when == 'hidden'
+                    and (sample.pss or sample.rss) > self.memory_limit):
+                visible_windows = find_windows(pid)
+        except Exception as e:
+            logger.exception(f"Watchdog failed to sample process tree of {pid}: {e}")
+            sample = None
+        self._sample_ready.emit(sample, visible_windows)
+
+    def _on_sample_ready(self, sample: Optional[TreeSample], visible_windows: Optional[list]) -> None:
+        """Track how long the tree has been over the limit and request a restart when due.
+
+        Args:
+            sample (TreeSample or None): The sample.
+            visible_windows (list or None): The visible windows of Proton Mail, or None if they were not looked up.
+        """
+        if sample is None or sample.pid != self.pid or self._restart_pending:
+            return
+        memory = sample.pss or sample.rss
+
+        if self._before_restart is not None:
+            logger.info(f"Watchdog restart: memory before {format_bytes(self._before_restart)}, "
+                        f"after {format_bytes(memory)}")
+            self._before_restart = None
+
+        if memory <= self.memory_limit:
+            if self._over_since is not None:
+                logger.info(f"Proton Mail memory back under the limit: {format_bytes(memory)}")
+            self._over_since = None
+            return
+
+        now = time.monotonic()
+        if self._over_since is None:
+            logger.info(f"Proton Mail memory over the limit: {format_bytes(memory)} > {format_bytes(self.memory_limit)}")
+            self._over_since = now
+        if now - self._over_since < self.sustained_seconds or not self._can_restart(sample, visible_windows):
+            return
+
+        logger.warning(f"Proton Mail has used {format_bytes(memory)} for {(now - self._over_since) / 60:.0f} "
+                       f"minutes, restarting")
+        self._restart_pending = True
+        self._before_restart = memory
+        self.restart_requested.emit(sample.pid, sample)
+
+    def _can_restart(self, sample: TreeSample, visible_windows: Optional[list]) -> bool:
+        """Check whether the restart_when condition is met.
+
+        Args:
+            sample (TreeSample): The latest sample.
+            visible_windows (list or None): The visible windows of Proton Mail, or None if unknown.
+
+        Returns:
+            bool: True if Proton Mail may be restarted now.
+        """
+        if self.restart_when == 'immediately':
+            return True
+        if self.restart_when == 'hidden' and visible_windows is not None:
+            return not visible_windows
+        # Without window control, 'hidden' falls back to waiting for the app to be idle
+        return sample.cpu_percent is not None and sample.cpu_percent < self.idle_cpu_percent
@@ -0,0 +1,60 @@
+import logging
+import shutil
+import subprocess
+from typing import List, Optional
+
+logger = logging.getLogger(__name__)
+
+XDOTOOL = shutil.which('xdotool')
+
+
+def has_window_control() -> bool:
+    """Check whether X11 windows can be inspected and controlled.
+
+    Returns:
+        bool: True if xdotool is available.
+    """
+    return XDOTOOL is not None
+
+
+def _xdotool(*args: str) -> Optional[str]:
+    """Run xdotool and return its output.
+
+    Returns:
+        str or None: The standard output, or None if xdotool is unavailable or failed to run.
+    """
+    if XDOTOOL is None:
+        return None
+    try:
+        return subprocess.run([XDOTOOL, *args], capture_output=True, text=True, timeout=2).stdout
+    except (OSError, subprocess.TimeoutExpired) as e:
+        logger.warning(f"xdotool {args[0]} failed: {e}")
+        return None
+
+
+def find_windows(pid: int, only_visible: bool = True) -> Optional[List[str]]:
+    """Find the X11 windows owned by a process.
+
+    Electron sets _NET_WM_PID to the main process, so the root of the tree is enough.
+
+    Args:
+        pid (int): The PID that owns the windows.
+        only_visible (bool): Only return mapped windows.
+
+    Returns:
+        list or None: The window IDs, or None if windows cannot be inspected.
+    """
+    args = ['search', '--onlyvisible', '--pid', str(pid)] if only_visible else ['search', '--pid', str(pid)]
+    output = _xdotool(*args)
+    return None if output is None else output.split()
+
+
+def set_windows_mapped(windows: List[str], mapped: bool) -> None:
+    """Map or unmap X11 windows.
+
+    Args:
+        windows (list): The window IDs.
+        mapped (bool): True to show the windows, False to hide them.
+    """
+    for window in windows:
+        _xdotool('windowmap' if mapped else 'windowunmap', window)
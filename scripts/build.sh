@@ -1,17 +1,50 @@
 #!/bin/bash
 
 ### USAGE
-# From Proton-Mail-Tray/ run `./scripts/build.sh` to build the executable
+# From Proton-Mail-Tray/ run `./scripts/build.sh` to build the single-file executable dist/ProtonMailTray, or
+# `./scripts/build.sh --onedir` for the fast-start build dist/ProtonMailTray/. The single file unpacks the whole bundle
+# (mostly Qt) into a new temporary directory on every launch; the directory build ships it already unpacked, so it
+# starts without writing anything. Run dist/ProtonMailTray/ProtonMailTray and keep the directory together.
+
+set -e
+
+MODE="--onefile"
+if [ "$1" == "--onedir" ]; then
+    MODE="--onedir"
+elif [ -n "$1" ]; then
+    echo "Usage: $0 [--onedir]" >&2
+    exit 1
+fi
+
+# Modules the tray never imports, kept out even if a dependency pulls them in
+EXCLUDES=(tkinter PySide6.QtQml PySide6.QtQuick PySide6.QtOpenGL PySide6.QtSql PySide6.QtTest PySide6.QtPdf
+          PySide6.QtSvg PySide6.QtWebEngineCore PySide6.QtMultimedia)
+EXCLUDE_ARGS=()
+for module in "${EXCLUDES[@]}"; do
+    EXCLUDE_ARGS+=(--exclude-module "$module")
+done
 
 # Clean previous builds
 rm -rf build dist
 
 # Package with PyInstaller
-pyinstaller --onefile \
+pyinstaller $MODE \
             --windowed \
             --name "ProtonMailTray" \
             --add-data "resources/icon/proton-mail.png:resources/icon" \
-            --add-data "logs:logs" \
             --add-data "configs/config.json:configs" \
             --add-data "configs/logging_config.json:configs" \
-            --additional-hooks-dir "scripts/hook-proton_mail_tray.py" proton_mail_tray/app.py
+            "${EXCLUDE_ARGS[@]}" \
+            --additional-hooks-dir "scripts" proton_mail_tray/cli.py
+
+# Strip the Qt plugins and translations a tray icon with a menu never loads. The icon is a PNG, which Qt reads without
+# an image format plugin. Only the unpacked build can be trimmed after the fact.
+if [ "$MODE" == "--onedir" ]; then
+    QT_DIR="dist/ProtonMailTray/_internal/PySide6/Qt"
+    rm -rf "$QT_DIR/translations"
+    for plugin in imageformats vectorimageformats generic egldeviceintegrations networkinformation tls sqldrivers \
+                  qmltooling printsupport designer wayland-graphics-integration-server; do
+        rm -rf "$QT_DIR/plugins/$plugin"
+    done
+    du -sh dist/ProtonMailTray
+fi
@@ -1,3 +1,4 @@
 from PyInstaller.utils.hooks import collect_submodules
 
-hiddenimports = collect_submodules('proton_mail_tray')
+# Submodules and standard library modules that are only imported lazily, so the analysis cannot see them
+hiddenimports = collect_submodules('proton_mail_tray') + ['cProfile', 'tracemalloc']
@@ -0,0 +1,204 @@
+import os
+import sys
+import tempfile
+import time
+import unittest
+from unittest.mock import patch
+
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+import psutil
+from PySide6.QtCore import QCoreApplication, QEventLoop, QTimer
+
+base_path = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(base_path)
+
+from proton_mail_tray.app import ProtonMailTray
+from proton_mail_tray.lifecycle import LifecycleState
+from proton_mail_tray.targets import load_targets
+from proton_mail_tray.utils import process_cache
+
+STUB_SCRIPT = "#!/bin/sh\ntrap 'exit 0' TERM\nwhile :; do sleep 0.1; done\n"
+
+
+def process_events_until(predicate, timeout_ms: int = 5000) -> bool:
+    """Run the event loop until the predicate holds or the timeout expires."""
+    deadline = time.monotonic() + timeout_ms / 1000
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        loop = QEventLoop()
+        timer = QTimer()
+        timer.timeout.connect(loop.quit)
+        timer.start(10)
+        loop.exec()
+        timer.stop()
+    return predicate()
+
+
+class TestProtonMailTray(unittest.TestCase):
+    """Test the ProtonMailTray application with a stub Proton Mail executable."""
+
+    @classmethod
+    def setUpClass(cls):
+        if QCoreApplication.instance() is not None:
+            raise unittest.SkipTest("A Qt application already exists in this process")
+        cls.tmp_dir = tempfile.TemporaryDirectory()
+        cls.stub_path = os.path.join(cls.tmp_dir.name, 'Proton Mail Beta')
+        with open(cls.stub_path, 'w') as f:
+            f.write(STUB_SCRIPT)
+        os.chmod(cls.stub_path, 0o755)
+        paths = {'icon_path': os.path.join(base_path, 'resources', 'icon', 'proton-mail.png'),
+                 'proton_mail_path': cls.stub_path}
+        targets = {key: target.with_path(cls.stub_path) for key, target in load_targets({}).items()}
+        cls.app = ProtonMailTray([], path_dict=paths, targets=targets)
+        process_events_until(lambda: cls.app.ready and not cls.app.lifecycle.busy)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.app.lifecycle.shutdown()
+        cls.app.monitor.stop()
+        cls.tmp_dir.cleanup()
+
+    def tearDown(self):
+        process_events_until(lambda: not self.app.lifecycle.busy)
+        pid = self.app.pids.get('proton-mail')
+        if pid and psutil.pid_exists(pid):
+            if self.app.lifecycle.state == LifecycleState.FROZEN:
+                self.app.hibernator.terminate(pid)  # resumes the whole tree, so no stopped child is orphaned
+            else:
+                psutil.Process(pid).kill()
+            process_events_until(lambda: self.app.lifecycle.state == LifecycleState.STOPPED)
+        process_cache.invalidate()
+
+    def test_toggle_open_and_close(self):
+        """Test that clicks open and close Proton Mail through the lifecycle states."""
+        states = []
+        self.app.lifecycle.state_changed.connect(states.append)
+
+        self.app._on_tray_icon_activated()
+        self.assertTrue(process_events_until(lambda: self.app.lifecycle.state == LifecycleState.RUNNING))
+        pid = self.app.pids['proton-mail']
+        self.assertTrue(psutil.pid_exists(pid))
+        self.assertIn("Proton Mail: starting…", self.app.tray_icon.toolTip())
+        self.assertEqual(self.app.icon_state, 'starting')
+        self.assertTrue(process_events_until(lambda: not self.app.readiness.waiting, timeout_ms=10000))
+        self.assertIn("Proton Mail: running", self.app.tray_icon.toolTip())
+        self.assertEqual(self.app.icon_state, 'running')
+        self.assertEqual(self.app.tray_icon.icon().cacheKey(), self.app.icons.icon('running').cacheKey())
+
+        self.app._on_tray_icon_activated()
+        self.assertTrue(process_events_until(lambda: self.app.lifecycle.state == LifecycleState.STOPPED))
+        self.assertFalse(psutil.pid_exists(pid))
+
+        self.app.lifecycle.state_changed.disconnect(states.append)
+        self.assertEqual(states, [LifecycleState.STARTING, LifecycleState.RUNNING,
+                                  LifecycleState.STOPPING, LifecycleState.STOPPED])
+
+    def test_rapid_clicks_launch_once(self):
+        """Test that clicks during a transition are coalesced into a single launch."""
+        for _ in range(5):
+            self.app._on_tray_icon_activated()
+        self.assertTrue(process_events_until(lambda: self.app.lifecycle.state == LifecycleState.RUNNING))
+
+        stubs = [process for process in psutil.process_iter(['name']) if process.info['name'] == 'Proton Mail Bet']
+        self.assertEqual(len(stubs), 1)
+
+    def test_external_exit(self):
+        """Test that Proton Mail exiting on its own moves the lifecycle to stopped."""
+        self.app._on_tray_icon_activated()
+        self.assertTrue(process_events_until(lambda: self.app.lifecycle.state == LifecycleState.RUNNING))
+
+        psutil.Process(self.app.pids['proton-mail']).terminate()
+
+        self.assertTrue(process_events_until(lambda: self.app.lifecycle.state == LifecycleState.STOPPED))
+        self.assertIsNone(self.app.pids['proton-mail'])
+
+    def test_prelaunch_then_resume(self):
+        """Test that a pre-launched Proton Mail is frozen once settled and that the first click resumes it with the
+        priorities of the normal launch profile."""
+        self.app.prelauncher.configure({'settle_seconds': 0.2, 'settle_timeout_seconds': 1})
+        self.addCleanup(self.app.prelauncher.configure, None)
+        self.app.config['launch'] = {'prelaunch_profile': 'background'}
+        self.addCleanup(self.app.config.pop, 'launch')
+
+        self.app._on_prelaunch()
+        self.assertTrue(process_events_until(lambda: self.app.lifecycle.state == LifecycleState.FROZEN))
+        pid = self.app.pids['proton-mail']
+        self.assertTrue(self.app.hibernator.is_frozen(pid))
+        self.assertEqual(psutil.Process(pid).ionice().ioclass, psutil.IOPRIO_CLASS_IDLE)
+
+        self.app._on_tray_icon_activated()
+        self.assertTrue(process_events_until(lambda: self.app.lifecycle.state == LifecycleState.RUNNING))
+        self.assertEqual(self.app.pids['proton-mail'], pid)
+        self.assertFalse(self.app.hibernator.is_frozen(pid))
+        self.assertEqual(psutil.Process(pid).ionice().ioclass, psutil.IOPRIO_CLASS_BE)
+        with open(f'/proc/{pid}/oom_score_adj') as f:
+            self.assertEqual(f.read().strip(), '0')
+
+    def test_background_restart_stays_hidden(self):
+        """Test that restarting a Proton Mail without visible windows brings it back hidden and frozen."""
+        self.app.prelauncher.configure({'settle_seconds': 0.2, 'settle_timeout_seconds': 1})
+        self.addCleanup(self.app.prelauncher.configure, None)
+        self.app.lifecycle.run(self.app._toggle_proton_mail,
+                               lambda result: self.app._on_toggle_finished('proton-mail', result))
+        self.assertTrue(process_events_until(lambda: self.app.lifecycle.state == LifecycleState.RUNNING))
+        pid = self.app.pids['proton-mail']
+        finished = []
+
+        with patch('proton_mail_tray.windows.find_windows', return_value=[]), \
+                patch('proton_mail_tray.prelaunch.find_windows', return_value=['0x1']), \
+                patch('proton_mail_tray.prelaunch.set_windows_mapped') as set_windows_mapped:
+            self.app._restart_proton_mail(pid, finished.append)
+            self.assertTrue(process_events_until(lambda: finished))
+
+        self.assertEqual(self.app.lifecycle.state, LifecycleState.FROZEN)
+        self.assertNotEqual(self.app.pids['proton-mail'], pid)
+        self.assertTrue(self.app.hibernator.is_frozen(self.app.pids['proton-mail']))
+        self.assertEqual(finished, [None])
+        set_windows_mapped.assert_any_call(['0x1'], False)
+        self.assertNotIn((['0x1'], True), [call.args for call in set_windows_mapped.call_args_list])
+
+    def test_menu_built_on_first_show(self):
+        """Test that the context menu is only filled in when it is first shown, and only once."""
+        self.assertTrue(self.app.menu.isEmpty())
+
+        self.app.menu.aboutToShow.emit()
+        count = len(self.app.menu.actions())
+        self.app._build_menu()
+
+        self.assertEqual(len(self.app.menu.actions()), count)
+        self.assertIn('proton-mail', self.app.target_actions)
+        self.assertEqual(self.app.target_actions['proton-mail'].text(), "Open Proton Mail")
+        self.app.menu.aboutToHide.emit()
+
+    def test_control_commands(self):
+        """Test that the toggle and status commands report the lifecycle of Proton Mail."""
+        self.assertEqual(self.app._on_toggle_command(), {'accepted': True, 'state': 'stopped'})
+        self.assertTrue(process_events_until(lambda: self.app.lifecycle.state == LifecycleState.RUNNING))
+
+        status = self.app._on_status_command()
+
+        self.assertEqual(status['targets']['proton-mail']['state'], 'running')
+        self.assertEqual(status['targets']['proton-mail']['pid'], self.app.pids['proton-mail'])
+
+    def test_timing_stats_and_profile(self):
+        """Test that clicks are timed and a profile capture finishes on its own."""
+        with tempfile.TemporaryDirectory() as state_path:
+            self.app.path_dict['state_path'] = state_path
+            self.addCleanup(self.app.path_dict.pop, 'state_path')
+
+            reply = self.app._on_profile_command('tracemalloc', 0.05)
+            self.app._on_tray_icon_activated()
+            self.assertTrue(process_events_until(lambda: self.app.lifecycle.state == LifecycleState.RUNNING))
+            self.assertTrue(process_events_until(lambda: self.app.profile_capture is None))
+            self.assertTrue(os.path.exists(reply['path']))
+
+            stats = self.app._on_stats_command()
+            self.assertGreaterEqual(stats['spans']['click']['count'], 1)
+            self.assertGreaterEqual(stats['spans']['open_proton_mail']['count'], 1)
+            self.assertTrue(os.path.exists(stats['path']))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -2,12 +2,15 @@ import argparse
 import json
 import os
 import sys
+import tempfile
 import unittest
 from pathlib import Path
 from unittest.mock import patch
 
-from proton_mail_tray.config import (get_base_path, get_proton_mail_path,
-                                     load_config, save_config)
+from proton_mail_tray.config import (ConfigManager, get_config_path,
+                                     get_proton_mail_path, get_targets,
+                                     load_config, save_config, validate_config)
+from proton_mail_tray.paths import get_base_path
 
 
 class TestGetBasePath(unittest.TestCase):
@@ -20,6 +23,14 @@ class TestGetBasePath(unittest.TestCase):
 
         self.assertEqual(expected, actual)
 
+    def test_get_base_path_frozen(self):
+        """Test that an executable finds its data where the bundle was unpacked."""
+        with patch.object(sys, 'frozen', True, create=True), \
+                patch.object(sys, '_MEIPASS', '/opt/ProtonMailTray/_internal', create=True):
+            actual = get_base_path()
+
+        self.assertEqual(Path('/opt/ProtonMailTray/_internal'), actual)
+
 
 class TestSaveConfig(unittest.TestCase):
     """Test the save_config function."""
@@ -84,11 +95,121 @@ class TestLoadConfig(unittest.TestCase):
         self.assertEqual(expected, actual)
 
 
+class TestConfigManager(unittest.TestCase):
+    """Test the ConfigManager class."""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp_dir.cleanup)
+        self.file = os.path.join(self.tmp_dir.name, 'config.json')
+
+    def test_load_is_cached_until_file_changes(self):
+        """Test that the file is only parsed again once it has changed."""
+        manager = ConfigManager(self.file)
+        with open(self.file, 'w') as f:
+            json.dump({'proton_mail_path': '/first'}, f)
+
+        with patch('proton_mail_tray.config.json.load', wraps=json.load) as mock_json_load:
+            self.assertEqual(manager.load(), {'proton_mail_path': '/first'})
+            self.assertEqual(manager.load(), {'proton_mail_path': '/first'})
+            self.assertEqual(mock_json_load.call_count, 1)
+
+            with open(self.file, 'w') as f:
+                json.dump({'proton_mail_path': '/second/path'}, f)
+            self.assertEqual(manager.load(), {'proton_mail_path': '/second/path'})
+            self.assertEqual(mock_json_load.call_count, 2)
+
+    def test_load_returns_copy(self):
+        """Test that changing a loaded configuration does not change the cache."""
+        manager = ConfigManager(self.file)
+        manager.save({'hibernation': {'enabled': False}})
+
+        manager.load()['hibernation']['enabled'] = True
+
+        self.assertEqual(manager.load(), {'hibernation': {'enabled': False}})
+
+    def test_save_skips_unchanged(self):
+        """Test that saving an unchanged configuration does not write the file."""
+        manager = ConfigManager(self.file)
+
+        self.assertTrue(manager.save({'key': 'value'}))
+        mtime = os.stat(self.file).st_mtime_ns
+        self.assertFalse(manager.save({'key': 'value'}))
+        self.assertFalse(manager.update({'key': 'value'}))
+        self.assertEqual(os.stat(self.file).st_mtime_ns, mtime)
+        self.assertTrue(manager.update({'other': 1}))
+        self.assertEqual(load_config(self.file), {'key': 'value', 'other': 1})
+
+    def test_save_is_atomic(self):
+        """Test that saving replaces the file and leaves no temporary files behind."""
+        manager = ConfigManager(self.file)
+        manager.save({'key': 'value'})
+        inode = os.stat(self.file).st_ino
+
+        manager.save({'key': 'other'})
+
+        self.assertNotEqual(os.stat(self.file).st_ino, inode)
+        self.assertEqual(os.listdir(self.tmp_dir.name), ['config.json'])
+
+    def test_save_failure_keeps_file(self):
+        """Test that a failed save leaves the previous file in place."""
+        manager = ConfigManager(self.file)
+        manager.save({'key': 'value'})
+
+        self.assertFalse(manager.save({'key': object()}))
+
+        self.assertEqual(manager.load(), {'key': 'value'})
+        self.assertEqual(os.listdir(self.tmp_dir.name), ['config.json'])
+
+
+class TestValidateConfig(unittest.TestCase):
+    """Test the validate_config function."""
+
+    def test_invalid_settings_dropped(self):
+        """Test that settings of the wrong type are dropped and everything else is kept."""
+        config = {
+            'proton_mail_path': 42,
+            'hibernation': {'enabled': 'yes', 'terminate_after_minutes': 15},
+            'watchdog': {'memory_limit_mb': True, 'idle_cpu_percent': 1.5},
+            'targets': {'proton-pass': {'enabled': True, 'path': None}, 'custom': {'paths': 'not a list'}},
+            'unknown': 'kept',
+        }
+
+        self.assertEqual(validate_config(config), {
+            'hibernation': {'terminate_after_minutes': 15},
+            'watchdog': {'idle_cpu_percent': 1.5},
+            'targets': {'proton-pass': {'enabled': True, 'path': None}, 'custom': {}},
+            'unknown': 'kept',
+        })
+
+    def test_not_an_object(self):
+        """Test that a configuration that is not an object is ignored."""
+        self.assertEqual(validate_config(['proton_mail_path']), {})
+        self.assertEqual(validate_config({'hibernation': 'on'}), {'hibernation': {}})
+
+
+class TestGetConfigPath(unittest.TestCase):
+    """Test the get_config_path function."""
+
+    def test_xdg_config_home_seeded_from_legacy(self):
+        """Test that the config lives under XDG_CONFIG_HOME and is copied from the bundled config on first use."""
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            legacy = os.path.join(tmp_dir, 'legacy.json')
+            with open(legacy, 'w') as f:
+                json.dump({'proton_mail_path': '/legacy/path'}, f)
+
+            with patch.dict(os.environ, {'XDG_CONFIG_HOME': os.path.join(tmp_dir, 'xdg')}):
+                config_path = get_config_path(legacy)
+
+            self.assertEqual(config_path, Path(tmp_dir) / 'xdg' / 'proton-mail-tray' / 'config.json')
+            self.assertEqual(load_config(str(config_path)), {'proton_mail_path': '/legacy/path'})
+
+
 class TestGetProtonMailPath(unittest.TestCase):
 
     @patch('proton_mail_tray.config.load_config')
     @patch('proton_mail_tray.config.save_config')
-    @patch('proton_mail_tray.config.find_proton_mail_path')
+    @patch('proton_mail_tray.config.discover_proton_mail_path')
     def test_path_from_cli(self, mock_find, mock_save, mock_load):
         """Test getting the Proton Mail path from the CLI."""
         mock_load.return_value = {}
@@ -103,8 +224,22 @@ class TestGetProtonMailPath(unittest.TestCase):
 
     @patch('proton_mail_tray.config.load_config')
     @patch('proton_mail_tray.config.save_config')
-    @patch('proton_mail_tray.config.find_proton_mail_path')
-    def test_path_from_config(self, mock_find, mock_save, mock_load):
+    @patch('proton_mail_tray.config.discover_proton_mail_path')
+    def test_path_from_cli_unchanged(self, mock_find, mock_save, mock_load):
+        """Test that a CLI path already in the configuration is not saved again."""
+        mock_load.return_value = {'proton_mail_path': '/path/from/cli'}
+        args = argparse.Namespace(proton_mail_path='/path/from/cli')
+
+        result = get_proton_mail_path(args, 'config_file_path')
+
+        self.assertEqual(result, '/path/from/cli')
+        mock_save.assert_not_called()
+
+    @patch('proton_mail_tray.config.is_executable', return_value=True)
+    @patch('proton_mail_tray.config.load_config')
+    @patch('proton_mail_tray.config.save_config')
+    @patch('proton_mail_tray.config.discover_proton_mail_path')
+    def test_path_from_config(self, mock_find, mock_save, mock_load, mock_executable):
         """Test getting the Proton Mail path from the configuration file."""
         mock_load.return_value = {'proton_mail_path': '/path/from/config'}
         args = argparse.Namespace(proton_mail_path=None)
@@ -118,7 +253,7 @@ class TestGetProtonMailPath(unittest.TestCase):
 
     @patch('proton_mail_tray.config.load_config')
     @patch('proton_mail_tray.config.save_config')
-    @patch('proton_mail_tray.config.find_proton_mail_path')
+    @patch('proton_mail_tray.config.discover_proton_mail_path')
     def test_path_not_found_in_config_or_cli(self, mock_find, mock_save, mock_load):
         """Test finding the Proton Mail path."""
         mock_load.return_value = {}
@@ -129,11 +264,27 @@ class TestGetProtonMailPath(unittest.TestCase):
         result = get_proton_mail_path(args, file_path)
 
         self.assertEqual(result, '/path/found/automatically')
-        mock_save.assert_called_once_with(file_path, {'proton_mail_path': '/path/found/automatically'})
+        mock_save.assert_not_called()  # kept in the discovery cache, not as a user override
+
+    @patch('proton_mail_tray.config.load_config')
+    @patch('proton_mail_tray.config.save_config')
+    @patch('proton_mail_tray.config.discover_proton_mail_path')
+    def test_stale_path_in_config(self, mock_find, mock_save, mock_load):
+        """Test that a configured path that is no longer an executable file falls back to discovery."""
+        mock_load.return_value = {'proton_mail_path': '/path/that/was/removed'}
+        mock_find.return_value = '/path/found/automatically'
+        args = argparse.Namespace(proton_mail_path=None)
+
+        with self.assertLogs('proton_mail_tray.config', 'WARNING'):
+            result = get_proton_mail_path(args, 'config_file_path')
+
+        self.assertEqual(result, '/path/found/automatically')
+        mock_find.assert_called_once_with()
+        mock_save.assert_not_called()
 
     @patch('proton_mail_tray.config.load_config')
     @patch('proton_mail_tray.config.save_config')
-    @patch('proton_mail_tray.config.find_proton_mail_path')
+    @patch('proton_mail_tray.config.discover_proton_mail_path')
     def test_path_not_found_at_all(self, mock_find, mock_save, mock_load):
         """Test when the Proton Mail path is not found at all."""
         mock_load.return_value = {}
@@ -147,5 +298,30 @@ class TestGetProtonMailPath(unittest.TestCase):
         mock_save.assert_not_called()
 
 
+class TestGetTargets(unittest.TestCase):
+    """Test the get_targets function."""
+
+    @patch('proton_mail_tray.config.discover_target_path')
+    def test_targets_from_config(self, mock_find):
+        """Test that config entries override the defaults and add new targets."""
+        mock_find.return_value = '/found/Proton Pass'
+        config = {'targets': {'proton-pass': {'enabled': True},
+                              'proton-vpn': {'path': '/custom/protonvpn-app'},
+                              'custom': {'name': 'Custom', 'process_name': 'custom-app', 'path': '/usr/bin/custom-app'},
+                              'broken': {'name': 'Broken'}}}
+
+        targets = get_targets(config, '/path/to/Proton Mail Beta')
+
+        self.assertEqual(targets['proton-mail'].path, '/path/to/Proton Mail Beta')
+        self.assertEqual(targets['proton-pass'].path, '/found/Proton Pass')
+        self.assertTrue(targets['proton-pass'].enabled)
+        self.assertEqual(targets['proton-vpn'].path, '/custom/protonvpn-app')
+        self.assertFalse(targets['proton-vpn'].enabled)
+        self.assertIsNone(targets['proton-drive'].path)
+        self.assertEqual(targets['custom'].comm, 'custom-app')
+        self.assertNotIn('broken', targets)
+        mock_find.assert_called_once()
+
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,79 @@
+import json
+import os
+import sys
+import tempfile
+import time
+import unittest
+
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+from PySide6.QtCore import QCoreApplication, QEventLoop, QTimer
+from PySide6.QtWidgets import QApplication
+
+base_path = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(base_path)
+
+from proton_mail_tray.config import ConfigManager
+from proton_mail_tray.config_watcher import ConfigWatcher
+
+
+def process_events_until(predicate, timeout_ms: int = 5000) -> bool:
+    """Run the event loop until the predicate holds or the timeout expires."""
+    deadline = time.monotonic() + timeout_ms / 1000
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        loop = QEventLoop()
+        timer = QTimer()
+        timer.timeout.connect(loop.quit)
+        timer.start(10)
+        loop.exec()
+        timer.stop()
+    return predicate()
+
+
+class TestConfigWatcher(unittest.TestCase):
+    """Test the ConfigWatcher class."""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.app = QCoreApplication.instance() or QApplication([])
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp_dir.cleanup)
+        self.manager = ConfigManager(os.path.join(self.tmp_dir.name, 'config.json'))
+        self.manager.save({'watchdog': {'memory_limit_mb': 1024}})
+        self.watcher = ConfigWatcher(self.manager)
+        self.changes = []
+        self.watcher.changed.connect(self.changes.append)
+
+    def test_reload_on_save(self):
+        """Test that an atomic save is picked up, repeatedly."""
+        self.manager.update({'watchdog': {'memory_limit_mb': 2048}})
+        self.assertTrue(process_events_until(lambda: len(self.changes) == 1))
+        self.assertEqual(self.changes[0]['watchdog'], {'memory_limit_mb': 2048})
+
+        self.manager.update({'watchdog': {'memory_limit_mb': 4096}})
+        self.assertTrue(process_events_until(lambda: len(self.changes) == 2))
+        self.assertEqual(self.watcher.config['watchdog'], {'memory_limit_mb': 4096})
+
+    def test_reload_on_edit_in_place(self):
+        """Test that a file written in place is picked up."""
+        time.sleep(0.01)  # make sure the mtime moves
+        with open(self.manager.file_path, 'w') as f:
+            json.dump({'proton_mail_path': '/new/path'}, f)
+
+        self.assertTrue(process_events_until(lambda: self.changes == [{'proton_mail_path': '/new/path'}]))
+
+    def test_unchanged_config_not_emitted(self):
+        """Test that rewriting the same configuration does not emit changed."""
+        with open(self.manager.file_path, 'w') as f:
+            json.dump({'watchdog': {'memory_limit_mb': 1024}}, f)
+
+        process_events_until(lambda: False, timeout_ms=500)
+        self.assertEqual(self.changes, [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,172 @@
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import unittest
+
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+from PySide6.QtCore import QCoreApplication, QEventLoop, QTimer
+from PySide6.QtWidgets import QApplication
+
+base_path = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(base_path)
+
+from proton_mail_tray.control import parse_request, send_command
+from proton_mail_tray.control_server import ControlServer
+
+
+def process_events_until(predicate, timeout_ms: int = 5000) -> bool:
+    """Run the event loop until the predicate holds or the timeout expires."""
+    deadline = time.monotonic() + timeout_ms / 1000
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        loop = QEventLoop()
+        timer = QTimer()
+        timer.timeout.connect(loop.quit)
+        timer.start(10)
+        loop.exec()
+        timer.stop()
+    return predicate()
+
+
+class TestSendCommand(unittest.TestCase):
+    """Test the send_command and parse_request functions."""
+
+    def setUp(self):
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        self.socket_path = os.path.join(tmp_dir.name, 'control.sock')
+
+    def test_no_server(self):
+        """Test that no reply is returned when nothing is listening."""
+        self.assertIsNone(send_command(self.socket_path, 'status'))
+
+    def test_stale_socket(self):
+        """Test that a socket file without a server behind it counts as not running."""
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.bind(self.socket_path)
+
+        self.assertIsNone(send_command(self.socket_path, 'status'))
+
+    def test_round_trip(self):
+        """Test that the request is a line of JSON and the reply is parsed."""
+        requests = []
+        server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        server.bind(self.socket_path)
+        server.listen(1)
+
+        def serve():
+            connection, _ = server.accept()
+            with connection:
+                requests.append(connection.recv(4096))
+                connection.sendall(b'{"ok": true, "state": "running"}\n')
+
+        thread = threading.Thread(target=serve)
+        thread.start()
+        reply = send_command(self.socket_path, 'status')
+        thread.join()
+        server.close()
+
+        self.assertEqual(requests, [b'{"command": "status"}\n'])
+        self.assertEqual(reply, {'ok': True, 'state': 'running'})
+
+    def test_parse_request(self):
+        """Test that malformed requests are rejected."""
+        self.assertEqual(parse_request(b'{"command": "profile", "seconds": 5}'), {'command': 'profile', 'seconds': 5})
+        self.assertIsNone(parse_request(b'toggle'))
+        self.assertIsNone(parse_request(b'["toggle"]'))
+        self.assertIsNone(parse_request(b'{"command": 1}'))
+
+
+class TestControlServer(unittest.TestCase):
+    """Test the ControlServer class."""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.app = QCoreApplication.instance() or QApplication([])
+
+    def setUp(self):
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        self.socket_path = os.path.join(tmp_dir.name, 'control.sock')
+        self.server = ControlServer(self.socket_path)
+        self.addCleanup(self.server.close)
+
+    def send(self, command: str):
+        """Send a command from a thread while the event loop serves it."""
+        replies = []
+        thread = threading.Thread(target=lambda: replies.append(send_command(self.socket_path, command)))
+        thread.start()
+        process_events_until(lambda: not thread.is_alive())
+        thread.join()
+        return replies[0]
+
+    def test_commands(self):
+        """Test that registered commands are answered and unknown ones rejected."""
+        self.server.register('status', lambda: {'state': 'running'})
+        self.assertTrue(self.server.listen())
+
+        self.assertEqual(self.send('status'), {'ok': True, 'state': 'running'})
+        self.assertEqual(self.send('ping'), {'ok': True})
+        self.assertEqual(self.send('bogus'), {'ok': False, 'error': 'unknown command: bogus'})
+
+    def test_failing_handler(self):
+        """Test that a handler raising an exception is reported to the client."""
+        self.server.register('toggle', lambda: 1 / 0)
+        self.server.listen()
+
+        self.assertEqual(self.send('toggle'), {'ok': False, 'error': 'division by zero'})
+
+    def test_single_instance(self):
+        """Test that the server does not take over a socket another instance answers on."""
+        live = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        live.bind(self.socket_path)
+        live.listen(1)
+
+        def serve():
+            connection, _ = live.accept()
+            with connection:
+                connection.recv(4096)
+                connection.sendall(b'{"ok": true}\n')
+
+        thread = threading.Thread(target=serve)
+        thread.start()
+        listening = self.server.listen()
+        thread.join()
+        live.close()
+
+        self.assertFalse(listening)
+        self.assertFalse(self.server.listening)
+
+    def test_stale_socket_replaced(self):
+        """Test that a socket left behind by a crashed instance is taken over."""
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.bind(self.socket_path)
+
+        self.assertTrue(self.server.listen())
+        self.assertEqual(self.send('ping'), {'ok': True})
+
+
+class TestCli(unittest.TestCase):
+    """Test the command line client."""
+
+    def test_command_without_tray_skips_qt(self):
+        """Test that a command with no tray running fails fast without importing Qt."""
+        with tempfile.TemporaryDirectory() as runtime_dir:
+            code = ("import sys; from proton_mail_tray import cli; code = cli.main(['--status']); "
+                    "print(any(name.startswith('PySide6') for name in sys.modules)); sys.exit(code)")
+            result = subprocess.run([sys.executable, '-c', code], cwd=base_path, capture_output=True, text=True,
+                                    env={**os.environ, 'XDG_RUNTIME_DIR': runtime_dir})
+
+        self.assertEqual(result.returncode, 1)
+        self.assertEqual(result.stdout.strip(), 'False')
+        self.assertIn("not running", result.stderr)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,146 @@
+import json
+import os
+import sys
+import tempfile
+import unittest
+from unittest.mock import patch
+
+base_path = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(base_path)
+
+from proton_mail_tray import discovery
+from proton_mail_tray.discovery import (Candidate, DiscoveryCache,
+                                        discover_target_path, find_candidates,
+                                        rank_candidates, read_desktop_exec)
+from proton_mail_tray.targets import Target
+
+TARGET = Target('proton-mail', 'Proton Mail', 'Proton Mail Beta', paths=[], aliases=['proton-mail', 'me.proton.Mail'])
+
+
+class DiscoveryTestCase(unittest.TestCase):
+    """Base class that points every search location into a temporary directory."""
+
+    def setUp(self):
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        self.root = tmp_dir.name
+        for name in ('bin', 'opt', 'snap', 'flatpak/bin', 'share/applications', 'home', 'cache'):
+            os.makedirs(os.path.join(self.root, name))
+        for patcher in (patch.dict(os.environ, {'PATH': self.path('bin'), 'XDG_DATA_HOME': self.path('home'),
+                                                'XDG_DATA_DIRS': self.path('share')}),
+                        patch.object(discovery, 'OPT_DIR', self.path('opt')),
+                        patch.object(discovery, 'SNAP_BIN_DIR', self.path('snap')),
+                        patch.object(discovery, 'FLATPAK_EXPORT_DIRS', [self.path('flatpak')])):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def path(self, *parts) -> str:
+        return os.path.join(self.root, *parts)
+
+    def make_executable(self, *parts) -> str:
+        path = self.path(*parts)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w') as f:
+            f.write('#!/bin/sh\n')
+        os.chmod(path, 0o755)
+        return path
+
+    def make_desktop_entry(self, name: str, command: str) -> None:
+        with open(self.path('share', 'applications', f'{name}.desktop'), 'w') as f:
+            f.write(f"[Desktop Entry]\nType=Application\nName=Proton Mail\nExec={command}\n")
+
+
+class TestFindCandidates(DiscoveryTestCase):
+    """Test the find_candidates function."""
+
+    def test_nothing_installed(self):
+        """Test that no candidates are found on an empty system."""
+        self.assertEqual(find_candidates(TARGET), [])
+
+    def test_desktop_entry_resolves_symlink(self):
+        """Test that a .desktop entry pointing at a symlink yields the real executable."""
+        binary = self.make_executable('opt', 'proton-mail', 'Proton Mail Beta')
+        os.symlink(binary, self.path('bin', 'proton-mail'))
+        self.make_desktop_entry('proton-mail', 'proton-mail %U')
+
+        self.assertEqual(find_candidates(TARGET), [Candidate(binary, 'desktop')])
+
+    def test_ranking(self):
+        """Test that native installs named after the process beat wrappers and sandboxed launchers."""
+        native = self.make_executable('opt', 'proton-mail', 'Proton Mail Beta')
+        wrapper = self.make_executable('bin', 'proton-mail')
+        flatpak = self.make_executable('flatpak', 'bin', 'me.proton.Mail')
+        snap = self.make_executable('snap', 'proton-mail')
+        self.make_desktop_entry('me.proton.Mail', '/usr/bin/flatpak run --branch=stable --command=proton-mail '
+                                                  'me.proton.Mail @@u %U @@')
+
+        candidates = find_candidates(TARGET)
+
+        self.assertEqual(candidates, [Candidate(native, 'opt'), Candidate(wrapper, 'path'),
+                                      Candidate(flatpak, 'flatpak'), Candidate(snap, 'snap')])
+
+    def test_rank_candidates_deduplicates(self):
+        """Test that the same path found twice keeps its first source."""
+        candidates = [Candidate('/a/Proton Mail Beta', 'desktop'), Candidate('/a/Proton Mail Beta', 'path')]
+
+        self.assertEqual(rank_candidates(TARGET, candidates), [Candidate('/a/Proton Mail Beta', 'desktop')])
+
+    def test_read_desktop_exec(self):
+        """Test that field codes are stripped and quoting is respected."""
+        self.make_desktop_entry('proton-mail', '"/opt/Proton Mail/Proton Mail Beta" --hidden %U')
+
+        self.assertEqual(read_desktop_exec(self.path('share', 'applications', 'proton-mail.desktop')),
+                         ['/opt/Proton Mail/Proton Mail Beta', '--hidden'])
+
+
+class TestDiscoverTargetPath(DiscoveryTestCase):
+    """Test the discover_target_path function and its cache."""
+
+    def setUp(self):
+        super().setUp()
+        self.cache_file = self.path('cache', 'discovery.json')
+
+    def test_cached_until_binary_changes(self):
+        """Test that a cached path skips the search until the binary is replaced."""
+        binary = self.make_executable('opt', 'proton-mail', 'Proton Mail Beta')
+        self.assertEqual(discover_target_path(TARGET, DiscoveryCache(self.cache_file)), binary)
+
+        with patch('proton_mail_tray.discovery.find_candidates') as mock_find:
+            self.assertEqual(discover_target_path(TARGET, DiscoveryCache(self.cache_file)), binary)
+            mock_find.assert_not_called()
+
+        # An upgrade replaces the file, changing its inode
+        os.unlink(binary)
+        self.make_executable('opt', 'proton-mail', 'Proton Mail Beta')
+        with patch('proton_mail_tray.discovery.find_candidates', return_value=[]) as mock_find:
+            self.assertIsNone(discover_target_path(TARGET, DiscoveryCache(self.cache_file)))
+            mock_find.assert_called_once()
+
+    def test_cache_file_contents(self):
+        """Test that the cache records the path with its source, mtime and inode."""
+        binary = self.make_executable('opt', 'proton-mail', 'Proton Mail Beta')
+
+        discover_target_path(TARGET, DiscoveryCache(self.cache_file))
+
+        with open(self.cache_file) as f:
+            entry = json.load(f)['proton-mail']
+        self.assertEqual(entry['path'], binary)
+        self.assertEqual(entry['source'], 'opt')
+        self.assertEqual(entry['inode'], os.stat(binary).st_ino)
+
+    def test_not_found_not_cached(self):
+        """Test that a failed search is not cached."""
+        self.assertIsNone(discover_target_path(TARGET, DiscoveryCache(self.cache_file)))
+        self.assertFalse(os.path.exists(self.cache_file))
+
+    def test_corrupt_cache(self):
+        """Test that an unreadable cache falls back to a search."""
+        binary = self.make_executable('opt', 'proton-mail', 'Proton Mail Beta')
+        with open(self.cache_file, 'w') as f:
+            f.write('invalid')
+
+        self.assertEqual(discover_target_path(TARGET, DiscoveryCache(self.cache_file)), binary)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,66 @@
+import gc
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import unittest
+
+import psutil
+
+base_path = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(base_path)
+
+from proton_mail_tray.control import send_command
+from proton_mail_tray.footprint import trim_memory
+
+# Steady-state memory of the tray in low-footprint mode under the offscreen platform, about 64 MB RSS and 57 MB USS on
+# a developer machine, most of it Qt's libraries and the interpreter
+RSS_BUDGET_MB = 96
+USS_BUDGET_MB = 85
+
+SETTLE_SECONDS = 2
+
+
+class TestFootprint(unittest.TestCase):
+    """Test the memory footprint of the tray process."""
+
+    def test_trim_memory(self):
+        """Test that trimming freezes the objects that survive a collection."""
+        self.addCleanup(gc.unfreeze)
+
+        with self.assertLogs('proton_mail_tray.footprint', 'INFO'):
+            trim_memory()
+
+        self.assertGreater(gc.get_freeze_count(), 0)
+
+    def test_steady_state_budget(self):
+        """Test that the idle tray, started offscreen in low-footprint mode, stays within the memory budget."""
+        with tempfile.TemporaryDirectory() as xdg:
+            env = {**os.environ, 'PYTHONPATH': base_path, 'QT_QPA_PLATFORM': 'offscreen'}
+            for variable in ('XDG_CONFIG_HOME', 'XDG_CACHE_HOME', 'XDG_STATE_HOME', 'XDG_RUNTIME_DIR'):
+                env[variable] = os.path.join(xdg, variable.lower())
+                os.makedirs(env[variable])
+            socket_path = os.path.join(env['XDG_RUNTIME_DIR'], 'proton-mail-tray.sock')
+
+            process = subprocess.Popen([sys.executable, '-m', 'proton_mail_tray.cli', '--low-footprint',
+                                        '--proton-mail-path', '/bin/true'],
+                                       cwd=base_path, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+            self.addCleanup(process.wait)
+            self.addCleanup(process.kill)
+            deadline = time.monotonic() + 30
+            while send_command(socket_path, 'ping', timeout=1) is None:
+                self.assertIsNone(process.poll(), "The tray exited during startup")
+                self.assertLess(time.monotonic(), deadline, "The tray did not start")
+                time.sleep(0.02)
+            time.sleep(SETTLE_SECONDS)
+
+            memory = psutil.Process(process.pid).memory_full_info()
+            send_command(socket_path, 'quit')
+
+        self.assertLess(memory.rss / 1024 ** 2, RSS_BUDGET_MB)
+        self.assertLess(memory.uss / 1024 ** 2, USS_BUDGET_MB)
+
+
+if __name__ == '__main__':
+    unittest.main()
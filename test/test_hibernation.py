@@ -0,0 +1,130 @@
+import os
+import subprocess
+import sys
+import time
+import unittest
+from unittest.mock import patch
+
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+import psutil
+from PySide6.QtCore import QCoreApplication, QEventLoop, QTimer
+from PySide6.QtWidgets import QApplication
+
+base_path = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(base_path)
+
+from proton_mail_tray.hibernation import Hibernator
+from proton_mail_tray.utils import is_process_frozen
+
+
+def wait_for_stopped(pid: int, stopped: bool, timeout: float = 2.0) -> bool:
+    """Wait until a process reaches the requested stopped state."""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if is_process_frozen(pid) == stopped:
+            return True
+        time.sleep(0.01)
+    return False
+
+
+class TestHibernator(unittest.TestCase):
+    """Test the Hibernator class."""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.app = QCoreApplication.instance() or QApplication([])
+
+    def setUp(self):
+        self.process = subprocess.Popen(['sh', '-c', 'sleep 30 & sleep 30; wait'])
+        deadline = time.monotonic() + 2
+        while len(psutil.Process(self.process.pid).children()) < 2 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.children = psutil.Process(self.process.pid).children()
+        self.hibernator = Hibernator({'enabled': True, 'terminate_after_minutes': 30})
+        xdotool_patch = patch('proton_mail_tray.windows.XDOTOOL', None)
+        xdotool_patch.start()
+        self.addCleanup(xdotool_patch.stop)
+
+    def tearDown(self):
+        for process in self.children:
+            try:
+                process.kill()
+            except psutil.NoSuchProcess:
+                pass
+        if self.process.poll() is None:
+            self.process.kill()
+        self.process.wait()
+
+    def test_freeze_and_thaw_tree(self):
+        """Test that the whole tree is stopped on freeze and resumed on thaw."""
+        self.assertTrue(self.hibernator.freeze(self.process.pid))
+
+        for pid in [self.process.pid] + [child.pid for child in self.children]:
+            self.assertTrue(wait_for_stopped(pid, True))
+        self.assertEqual(self.hibernator.frozen_pid, self.process.pid)
+
+        self.assertTrue(self.hibernator.thaw(self.process.pid))
+
+        for pid in [self.process.pid] + [child.pid for child in self.children]:
+            self.assertTrue(wait_for_stopped(pid, False))
+        self.assertIsNone(self.hibernator.frozen_pid)
+
+    @patch('proton_mail_tray.hibernation.set_windows_mapped')
+    def test_thaw_maps_windows_hidden_before_freeze(self, set_windows_mapped):
+        """Test that windows unmapped before the freeze, e.g. while pre-launching, are mapped again on thaw."""
+        self.assertTrue(self.hibernator.freeze(self.process.pid, expire=False, hidden_windows=['0x1']))
+
+        self.assertTrue(self.hibernator.thaw(self.process.pid))
+
+        set_windows_mapped.assert_called_with(['0x1'], True)
+
+    def test_terminate_after_idle_period(self):
+        """Test that a frozen tree expires after the idle period and can then be terminated."""
+        self.hibernator.terminate_after_ms = 10
+        expired = []
+        self.hibernator.expired.connect(expired.append)
+
+        self.hibernator.freeze(self.process.pid)
+        loop = QEventLoop()
+        timer = QTimer()
+        timer.timeout.connect(loop.quit)
+        self.hibernator.expired.connect(loop.quit)
+        timer.start(5000)
+        loop.exec()
+        timer.stop()
+
+        self.assertEqual(expired, [self.process.pid])
+        self.hibernator.terminate(self.process.pid)
+        self.assertFalse(psutil.pid_exists(self.process.pid))
+        self.assertIsNone(self.hibernator.frozen_pid)
+
+    def test_exited_root_leaves_nothing_frozen(self):
+        """Test that the rest of the tree is resumed and terminated when a frozen root is killed."""
+        self.assertTrue(self.hibernator.freeze(self.process.pid))
+        self.process.kill()
+        self.process.wait()
+
+        with self.assertLogs('proton_mail_tray.hibernation', 'WARNING'):
+            self.hibernator.forget(self.process.pid, exited=True)
+
+        deadline = time.monotonic() + 2
+        for child in self.children:
+            while time.monotonic() < deadline:
+                try:
+                    if child.status() == psutil.STATUS_ZOMBIE:
+                        break
+                except psutil.NoSuchProcess:
+                    break
+                time.sleep(0.01)
+            self.assertFalse(child.is_running() and child.status() != psutil.STATUS_ZOMBIE)
+        self.assertIsNone(self.hibernator.frozen_pid)
+
+    def test_freeze_missing_process(self):
+        """Test that freezing a process that does not exist fails cleanly."""
+        self.assertFalse(self.hibernator.freeze(2 ** 22 + 1))
+        self.assertIsNone(self.hibernator.frozen_pid)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,198 @@
+import io
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import unittest
+from unittest import mock
+
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+from PySide6.QtCore import QCoreApplication, QEventLoop, QTimer
+from PySide6.QtWidgets import QApplication
+
+base_path = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(base_path)
+
+from proton_mail_tray import cli
+from proton_mail_tray.history import (HEADER, RECORD, HistoryFile, HistoryRecord, HistoryRecorder, parse_time,
+                                      sparkline, write_csv, write_json)
+
+
+def make_records(count: int, start: float = 1_700_000_000) -> list:
+    return [HistoryRecord(start + i * 60, (100 + i) * 2 ** 20, float(i), 3) for i in range(count)]
+
+
+class TestHistoryFile(unittest.TestCase):
+    """Test the HistoryFile class."""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp_dir.cleanup)
+        self.path = os.path.join(self.tmp_dir.name, 'history.bin')
+
+    def test_wrap_around(self):
+        """Test that the file keeps the newest records in order and never grows."""
+        history = HistoryFile(self.path, 5)
+        records = make_records(12)
+        for record in records:
+            history.append(record)
+
+        self.assertEqual(len(history), 5)
+        self.assertEqual(history.count, 12)
+        self.assertEqual(history.records(), records[-5:])
+        self.assertEqual(history.tail(2), records[-2:])
+        self.assertEqual(os.path.getsize(self.path), HEADER.size + 5 * RECORD.size)
+        history.close()
+
+    def test_time_range_and_reopen(self):
+        """Test that records survive reopening, read-only too, and can be filtered by time."""
+        records = make_records(10)
+        history = HistoryFile(self.path, 20)
+        for record in records:
+            history.append(record)
+        history.close()
+
+        reader = HistoryFile(self.path)
+        self.assertTrue(reader.read_only)
+        self.assertEqual(reader.capacity, 20)
+        self.assertEqual(reader.records(since=records[3].timestamp, until=records[6].timestamp), records[3:7])
+        reader.close()
+
+        history = HistoryFile(self.path, 20)
+        history.append(make_records(1, records[-1].timestamp + 60)[0])
+        self.assertEqual(len(history), 11)
+        history.close()
+
+    def test_resize_keeps_newest(self):
+        """Test that a new capacity keeps the newest records that fit."""
+        records = make_records(8)
+        history = HistoryFile(self.path, 10)
+        for record in records:
+            history.append(record)
+        history.close()
+
+        with self.assertLogs('proton_mail_tray.history', 'INFO'):
+            history = HistoryFile(self.path, 3)
+        self.assertEqual(history.records(), records[-3:])
+        self.assertEqual(os.path.getsize(self.path), HEADER.size + 3 * RECORD.size)
+        history.close()
+
+    def test_invalid_file(self):
+        """Test that a file that is not a history file is refused for reading and replaced for writing."""
+        with open(self.path, 'wb') as f:
+            f.write(b'not a history file')
+
+        with self.assertRaises(ValueError):
+            HistoryFile(self.path)
+        with self.assertLogs('proton_mail_tray.history', 'WARNING'):
+            history = HistoryFile(self.path, 4)
+        self.assertEqual(history.records(), [])
+        history.close()
+
+
+class TestExport(unittest.TestCase):
+    """Test exporting and drawing the history."""
+
+    def test_write_csv_and_json(self):
+        """Test that records are written with one row or object each."""
+        records = make_records(3)
+
+        stream = io.StringIO()
+        write_csv(records, stream)
+        lines = stream.getvalue().splitlines()
+        self.assertEqual(lines[0], 'time,rss_bytes,cpu_percent,processes')
+        self.assertEqual(lines[2].split(',')[1:], [str(101 * 2 ** 20), '1.0', '3'])
+
+        stream = io.StringIO()
+        write_json(records, stream)
+        exported = json.loads(stream.getvalue())
+        self.assertEqual(len(exported), 3)
+        self.assertEqual(exported[2]['rss_bytes'], 102 * 2 ** 20)
+        self.assertEqual(exported[2]['timestamp'], records[2].timestamp)
+
+    def test_parse_time(self):
+        """Test that durations count back from now and dates are parsed as ISO 8601."""
+        self.assertEqual(parse_time('24h', now=100_000), 100_000 - 86400)
+        self.assertEqual(parse_time('30m', now=100_000), 100_000 - 1800)
+        self.assertEqual(parse_time('2024-01-02T03:04:05+00:00'), 1704164645)
+        with self.assertRaises(ValueError):
+            parse_time('yesterday')
+
+    def test_sparkline(self):
+        """Test that values are scaled to the blocks and squeezed to the width."""
+        self.assertEqual(sparkline([0, 7, 14]), '▁▅█')
+        self.assertEqual(sparkline([5, 5]), '▁▁')
+        self.assertEqual(sparkline([]), '')
+        self.assertEqual(len(sparkline(list(range(100)), width=10)), 10)
+
+    def test_cli_export(self):
+        """Test that --export-history prints the history in the state directory without a running tray."""
+        with tempfile.TemporaryDirectory() as state_dir, mock.patch.dict(os.environ, {'XDG_STATE_HOME': state_dir}):
+            self.assertEqual(cli.main(['--export-history', 'csv']), 1)
+
+            history = HistoryFile(os.path.join(state_dir, 'proton-mail-tray', 'history.bin'), 10)
+            for record in make_records(4, start=time.time() - 3 * 3600):
+                history.append(record)
+            history.close()
+
+            with mock.patch('sys.stdout', new=io.StringIO()) as stdout:
+                self.assertEqual(cli.main(['--export-history', 'json', '--since', '4h']), 0)
+            self.assertEqual(len(json.loads(stdout.getvalue())), 4)
+
+    def test_cli_time_range_needs_export(self):
+        """Test that --since and --until are refused without --export-history."""
+        for argv in (['--since', '4h'], ['--status', '--until', '1h']):
+            with self.subTest(argv=argv), mock.patch('sys.stderr', new=io.StringIO()) as stderr:
+                with self.assertRaises(SystemExit) as cm:
+                    cli.main(argv)
+                self.assertEqual(cm.exception.code, 2)
+                self.assertIn('--export-history', stderr.getvalue())
+
+
+class TestHistoryRecorder(unittest.TestCase):
+    """Test the HistoryRecorder class."""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.app = QCoreApplication.instance() or QApplication([])
+
+    def run_until(self, predicate, timeout: float = 5) -> bool:
+        deadline = time.monotonic() + timeout
+        while not predicate() and time.monotonic() < deadline:
+            loop = QEventLoop()
+            timer = QTimer()
+            timer.timeout.connect(loop.quit)
+            timer.start(10)
+            loop.exec()
+            timer.stop()
+        return predicate()
+
+    def test_records_while_running(self):
+        """Test that a running process is recorded every interval and nothing is written once it is gone."""
+        process = subprocess.Popen(['sleep', '30'])
+        self.addCleanup(process.wait)
+        self.addCleanup(process.kill)
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, 'history.bin')
+            recorder = HistoryRecorder(path, {'interval_seconds': 0.05, 'days': 0.0001})
+            self.assertEqual(recorder.capacity, 173)
+
+            recorder.set_pid(process.pid)
+            self.assertTrue(self.run_until(lambda: recorder.history is not None and len(recorder.history) >= 3))
+            record = recorder.recent(60)[-1]
+            self.assertEqual(record.processes, 1)
+            self.assertGreater(record.rss, 0)
+
+            recorder.set_pid(None)
+            count = recorder.history.count
+            self.run_until(lambda: False, timeout=0.2)
+            self.assertLessEqual(recorder.history.count, count + 1)  # a sample may have been in flight
+            recorder.shutdown()
+            self.assertEqual(os.path.getsize(path), HEADER.size + 173 * RECORD.size)
+
+
+if __name__ == '__main__':
+    unittest.main()
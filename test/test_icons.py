@@ -0,0 +1,78 @@
+import os
+import sys
+import tempfile
+import unittest
+
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+from PySide6.QtCore import QSize
+from PySide6.QtGui import QColor
+from PySide6.QtWidgets import QApplication
+
+base_path = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(base_path)
+
+from proton_mail_tray.icons import STATE_BADGES, StateIcons
+
+ICON_PATH = os.path.join(base_path, 'resources', 'icon', 'proton-mail.png')
+
+
+class TestStateIcons(unittest.TestCase):
+    """Test the StateIcons class."""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.app = QApplication.instance() or QApplication([])
+
+    def test_pixmap_per_size_and_ratio(self):
+        """Test that pixmaps are rendered at the device pixel size and keep the device-independent size."""
+        icons = StateIcons(ICON_PATH)
+
+        pixmap = icons.pixmap('running', 22, 2.0)
+
+        self.assertEqual(pixmap.size(), QSize(44, 44))
+        self.assertEqual(pixmap.devicePixelRatio(), 2.0)
+        self.assertEqual(icons.pixmap('running', 22, 1.0).size(), QSize(22, 22))
+
+    def test_cached(self):
+        """Test that every state is rendered once per size and ratio, and the icons are reused."""
+        icons = StateIcons(ICON_PATH, sizes=(16, 32), device_pixel_ratios=(1.0, 2.0))
+
+        for state in STATE_BADGES:
+            icons.icon(state)
+        self.assertEqual(icons.renders, len(STATE_BADGES) * 4)
+        self.assertEqual(len(icons._scaled), 3)  # 16, 32 and 64 device pixels, shared by the states
+
+        running = icons.icon('running')
+        icons.pixmap('running', 32, 2.0)
+        self.assertEqual(icons.renders, len(STATE_BADGES) * 4)
+        self.assertEqual(icons.icon('running').cacheKey(), running.cacheKey())
+        self.assertIn(QSize(32, 32), running.availableSizes())
+
+    def test_badges(self):
+        """Test that each state has its badge in the bottom right corner, and the stopped icon has none."""
+        icons = StateIcons(ICON_PATH)
+        base = icons.pixmap('stopped', 64).toImage()
+
+        for state, colour in STATE_BADGES.items():
+            image = icons.pixmap(state, 64).toImage()
+            corner = image.pixelColor(50, 50)
+            if colour is None:
+                self.assertEqual(corner, base.pixelColor(50, 50))
+            else:
+                self.assertEqual(corner.rgb(), QColor(colour).rgb(), state)
+
+    def test_missing_icon(self):
+        """Test that a missing base icon still gives the state badge."""
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            with self.assertLogs('proton_mail_tray.icons', 'WARNING'):
+                icons = StateIcons(os.path.join(tmp_dir, 'missing.png'))
+
+        image = icons.pixmap('error', 32).toImage()
+
+        self.assertEqual(image.pixelColor(0, 0).alpha(), 0)
+        self.assertEqual(image.pixelColor(25, 25).rgb(), STATE_BADGES['error'].rgb())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,124 @@
+import os
+import resource
+import stat
+import sys
+import tempfile
+import unittest
+
+import psutil
+
+base_path = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(base_path)
+
+from proton_mail_tray.config import validate_config
+from proton_mail_tray.launch import (LaunchProfile, create_cgroup,
+                                     find_cgroup_parent, get_profile, launch,
+                                     load_profiles, restore_priorities)
+
+
+class TestLaunch(unittest.TestCase):
+    """Test the launch profiles."""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp_dir.cleanup)
+        self.root = self.tmp_dir.name
+
+    def write_stub(self) -> str:
+        path = os.path.join(self.root, 'proton-mail')
+        with open(path, 'w') as f:
+            f.write("#!/bin/sh\nexec sleep 30\n")
+        os.chmod(path, os.stat(path).st_mode | stat.S_IXUSR)
+        return path
+
+    def test_load_profiles(self):
+        """Test that config entries override the built-in profiles field by field and add new ones."""
+        profiles = load_profiles({'launch': {'profiles': {
+            'background': {'nice': 15},
+            'small': {'cpu_affinity': [0], 'ionice': 'sometimes', 'rlimits': {'nofile': 256, 'bogus': 1}},
+        }}})
+
+        self.assertEqual(profiles['background'].nice, 15)
+        self.assertEqual(profiles['background'].ionice, 'idle')
+        self.assertEqual(profiles['small'], LaunchProfile('small', cpu_affinity=[0], rlimits={'nofile': 256}))
+        self.assertEqual(get_profile(profiles, 'missing'), profiles['interactive'])
+
+    def test_validate_profiles(self):
+        """Test that profile settings of the wrong type are dropped."""
+        config = validate_config({'launch': {'profile': 'background', 'profiles': {'small': {'nice': 'low'}}}})
+
+        self.assertEqual(config, {'launch': {'profile': 'background', 'profiles': {'small': {}}}})
+
+    def test_launch_applies_profile(self):
+        """Test that a launched stub runs with the profile's priorities, limits and flags."""
+        cpu = psutil.Process().cpu_affinity()[0]
+        profile = LaunchProfile('background', nice=10, ionice='idle', cpu_affinity=[cpu], oom_score_adj=500,
+                                rlimits={'nofile': 256}, electron_flags=['--renderer-process-limit=2'])
+
+        with self.assertLogs('proton_mail_tray.launch', 'INFO') as logs:
+            process = launch(self.write_stub(), profile)
+        self.addCleanup(process.wait)
+        self.addCleanup(process.kill)
+
+        child = psutil.Process(process.pid)
+        self.assertEqual(child.nice(), 10)
+        self.assertEqual(child.ionice().ioclass, psutil.IOPRIO_CLASS_IDLE)
+        self.assertEqual(child.cpu_affinity(), [cpu])
+        self.assertEqual(child.rlimit(resource.RLIMIT_NOFILE)[0], 256)
+        with open(f'/proc/{process.pid}/oom_score_adj') as f:
+            self.assertEqual(f.read().strip(), '500')
+        self.assertIn("with profile 'background': nice 10, ionice idle", logs.output[0])
+
+    def test_restore_priorities(self):
+        """Test that a background launch can be moved to the priorities of the interactive profile."""
+        process = launch(self.write_stub(), LaunchProfile('background', nice=10, ionice='idle', oom_score_adj=500))
+        self.addCleanup(process.wait)
+        self.addCleanup(process.kill)
+
+        results = restore_priorities(process.pid, LaunchProfile('interactive'))
+
+        child = psutil.Process(process.pid)
+        self.assertEqual(child.ionice().ioclass, psutil.IOPRIO_CLASS_BE)
+        with open(f'/proc/{process.pid}/oom_score_adj') as f:
+            self.assertEqual(f.read().strip(), '0')
+        if results['nice'] == 'ok':  # lowering it again needs privileges
+            self.assertEqual(child.nice(), 0)
+
+    def test_launch_flags(self):
+        """Test that the profile's flags are passed to the executable."""
+        path = os.path.join(self.root, 'args')
+        stub = os.path.join(self.root, 'proton-mail')
+        with open(stub, 'w') as f:
+            f.write(f"#!/bin/sh\necho \"$@\" > '{path}'\n")
+        os.chmod(stub, 0o755)
+
+        launch(stub, LaunchProfile('small', electron_flags=['--renderer-process-limit=1', '--no-sandbox'])).wait()
+
+        with open(path) as f:
+            self.assertEqual(f.read().strip(), '--renderer-process-limit=1 --no-sandbox')
+
+    def test_cgroup(self):
+        """Test that a profile cgroup is created under the parent of our own cgroup when memory is delegated."""
+        proc_root = os.path.join(self.root, 'proc')
+        cgroup_root = os.path.join(self.root, 'cgroup')
+        parent = os.path.join(cgroup_root, 'user.slice', 'app.slice')
+        os.makedirs(os.path.join(proc_root, 'self'))
+        os.makedirs(os.path.join(parent, 'tray.scope'))
+        with open(os.path.join(proc_root, 'self', 'cgroup'), 'w') as f:
+            f.write("0::/user.slice/app.slice/tray.scope\n")
+        with open(os.path.join(parent, 'cgroup.subtree_control'), 'w') as f:
+            f.write("cpu io pids\n")
+
+        self.assertIsNone(find_cgroup_parent(proc_root, cgroup_root))
+
+        with open(os.path.join(parent, 'cgroup.subtree_control'), 'w') as f:
+            f.write("cpu io memory pids\n")
+        self.assertEqual(find_cgroup_parent(proc_root, cgroup_root), parent)
+
+        cgroup = create_cgroup('background', 512 * 1024 * 1024, parent)
+        with open(os.path.join(cgroup, 'memory.high')) as f:
+            self.assertEqual(f.read(), str(512 * 1024 * 1024))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,141 @@
+import logging
+import os
+import sys
+import tempfile
+import threading
+import unittest
+from unittest.mock import patch
+
+base_path = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(base_path)
+
+from proton_mail_tray.log import (RateLimitFilter, RingBufferHandler,
+                                  flush_ring_buffers, start_queue_listener)
+
+
+class ListHandler(logging.Handler):
+    """Collect the messages and threads of handled records."""
+
+    def __init__(self, level=logging.NOTSET):
+        super().__init__(level)
+        self.messages = []
+        self.threads = set()
+
+    def emit(self, record):
+        self.messages.append(record.getMessage())
+        self.threads.add(threading.get_ident())
+
+
+def make_record(message: str, level: int = logging.DEBUG, lineno: int = 1) -> logging.LogRecord:
+    return logging.LogRecord('test', level, __file__, lineno, message, None, None)
+
+
+class TestRingBufferHandler(unittest.TestCase):
+    """Test the RingBufferHandler class."""
+
+    def setUp(self):
+        self.target = ListHandler(logging.INFO)
+        self.ring = RingBufferHandler(3, logging.WARNING, self.target)
+
+    def test_debug_held_until_warning(self):
+        """Test that debug records are only written when a warning arrives."""
+        for i in range(2):
+            self.ring.handle(make_record(f"debug {i}"))
+        self.ring.handle(make_record("info", logging.INFO))
+        self.assertEqual(self.target.messages, [])
+
+        self.ring.handle(make_record("warning", logging.WARNING))
+
+        self.assertEqual(self.target.messages, ["debug 0", "debug 1"])
+        self.assertEqual(len(self.ring.buffer), 0)
+
+    def test_oldest_records_dropped(self):
+        """Test that the ring keeps only the most recent records and never flushes because it is full."""
+        for i in range(5):
+            self.ring.handle(make_record(f"debug {i}"))
+        self.assertEqual(self.target.messages, [])
+
+        self.ring.flush()
+
+        self.assertEqual(self.target.messages, ["debug 2", "debug 3", "debug 4"])
+
+
+class TestRateLimitFilter(unittest.TestCase):
+    """Test the RateLimitFilter class."""
+
+    @patch('proton_mail_tray.log.time.monotonic')
+    def test_burst_per_interval(self, mock_monotonic):
+        """Test that a line is limited to its burst per interval and reports what it dropped."""
+        mock_monotonic.return_value = 100.0
+        rate_limit = RateLimitFilter(interval=10, burst=2)
+
+        passed = [rate_limit.filter(make_record(f"scan {i}")) for i in range(5)]
+        self.assertEqual(passed, [True, True, False, False, False])
+        self.assertTrue(rate_limit.filter(make_record("other line", lineno=2)))
+        self.assertTrue(rate_limit.filter(make_record("warning", logging.WARNING)))
+
+        mock_monotonic.return_value = 111.0
+        record = make_record("scan 5")
+        self.assertTrue(rate_limit.filter(record))
+        self.assertEqual(record.getMessage(), "scan 5 (3 similar messages suppressed)")
+
+
+class TestQueueListener(unittest.TestCase):
+    """Test the start_queue_listener and flush_ring_buffers functions."""
+
+    def setUp(self):
+        self.logger = logging.getLogger('test_log.queue')
+        self.logger.propagate = False
+        self.logger.setLevel(logging.DEBUG)
+        self.file = ListHandler(logging.INFO)
+        self.logger.addHandler(RingBufferHandler(10, logging.WARNING, self.file))
+        self.logger.addHandler(self.file)
+
+    def tearDown(self):
+        for handler in list(self.logger.handlers):
+            self.logger.removeHandler(handler)
+
+    def test_handlers_run_off_thread(self):
+        """Test that handlers run on the listener thread and the ring can be flushed on request."""
+        listener = start_queue_listener(self.logger)
+
+        self.logger.debug("debug")
+        self.logger.info("info")
+        listener.stop()  # waits for the queue to drain
+
+        self.assertEqual(self.file.messages, ["info"])
+        self.assertNotIn(threading.get_ident(), self.file.threads)
+        self.assertEqual(len(self.logger.handlers), 1)
+        self.assertEqual(flush_ring_buffers(listener), 1)
+        self.assertEqual(self.file.messages, ["info", "debug"])
+
+
+class TestSetupLogger(unittest.TestCase):
+    """Test the setup_logger function with the bundled logging configuration."""
+
+    def test_setup_logger(self):
+        """Test that logs are written to the given directory through a queue."""
+        from proton_mail_tray.app import setup_logger
+
+        root = logging.getLogger()
+        handlers, level = list(root.handlers), root.level
+        with tempfile.TemporaryDirectory() as log_dir:
+            try:
+                listener = setup_logger(os.path.join(base_path, 'configs', 'logging_config.json'), log_dir)
+                logging.getLogger('proton_mail_tray.test').info("hello")
+                listener.stop()
+                for handler in listener.handlers:
+                    handler.close()
+            finally:
+                for handler in list(root.handlers):
+                    root.removeHandler(handler)
+                for handler in handlers:
+                    root.addHandler(handler)
+                root.setLevel(level)
+
+            with open(os.path.join(log_dir, 'proton_mail_tray.log')) as f:
+                self.assertIn("hello", f.read())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,95 @@
+import errno
+import os
+import subprocess
+import sys
+import unittest
+from unittest.mock import patch
+
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+from PySide6.QtCore import QCoreApplication, QEventLoop, QTimer
+from PySide6.QtWidgets import QApplication
+
+base_path = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(base_path)
+
+from proton_mail_tray.monitor import SubprocessMonitor
+
+
+def wait_for_exit(monitor: SubprocessMonitor, timeout_ms: int = 5000) -> list:
+    """Run the event loop until the monitor reports an exit or the timeout expires."""
+    exits = []
+    loop = QEventLoop()
+
+    def on_exit(pid, returncode):
+        exits.append((pid, returncode))
+        loop.quit()
+
+    timer = QTimer()
+    timer.setSingleShot(True)
+    timer.timeout.connect(loop.quit)
+    monitor.process_exited.connect(on_exit)
+    timer.start(timeout_ms)
+    loop.exec()
+    timer.stop()
+    monitor.process_exited.disconnect(on_exit)
+    return exits
+
+
+class TestSubprocessMonitor(unittest.TestCase):
+    """Test the SubprocessMonitor class."""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.app = QCoreApplication.instance() or QApplication([])
+
+    def setUp(self):
+        self.monitor = SubprocessMonitor()
+        self.process = subprocess.Popen(['sleep', '30'])
+
+    def tearDown(self):
+        self.monitor.stop()
+        if self.process.poll() is None:
+            self.process.kill()
+        self.process.wait()
+
+    def test_child_exit_via_pidfd(self):
+        """Test that a child exit is reported with its return code."""
+        self.monitor.set_proton_mail_subprocess(self.process)
+        self.process.terminate()
+
+        exits = wait_for_exit(self.monitor)
+
+        self.assertEqual(exits, [(self.process.pid, -15)])
+        self.assertIsNone(self.monitor.proton_mail_subprocess)
+        self.assertFalse(self.monitor.is_watching(self.process.pid))
+
+    def test_external_exit_via_pidfd(self):
+        """Test that an exit is reported for a process the tray did not start."""
+        self.monitor.watch(self.process.pid)
+        self.process.terminate()
+
+        exits = wait_for_exit(self.monitor)
+
+        self.assertEqual(exits, [(self.process.pid, None)])
+
+    def test_child_exit_via_sigchld(self):
+        """Test the SIGCHLD fallback when pidfd_open is not supported."""
+        with patch('proton_mail_tray.monitor.os.pidfd_open', side_effect=OSError(errno.ENOSYS, 'ENOSYS')):
+            self.monitor.set_proton_mail_subprocess(self.process)
+        self.process.terminate()
+
+        exits = wait_for_exit(self.monitor)
+
+        self.assertEqual(exits, [(self.process.pid, -15)])
+
+    def test_no_wakeups_while_idle(self):
+        """Test that watching with a pidfd does not start the fallback timer."""
+        self.monitor.watch(self.process.pid, self.process)
+
+        self.assertTrue(self.monitor.is_watching(self.process.pid))
+        self.assertFalse(self.monitor._poll_timer.isActive())
+
+
+if __name__ == '__main__':
+    unittest.main()
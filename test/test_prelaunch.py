@@ -0,0 +1,149 @@
+import os
+import subprocess
+import sys
+import threading
+import time
+import unittest
+from unittest.mock import patch
+
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+from PySide6.QtCore import QCoreApplication, QEventLoop, QTimer
+from PySide6.QtWidgets import QApplication
+
+base_path = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(base_path)
+
+from proton_mail_tray.prelaunch import Prelauncher
+
+
+class TestPrelauncher(unittest.TestCase):
+    """Test the Prelauncher class."""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.app = QCoreApplication.instance() or QApplication([])
+
+    def make_prelauncher(self, **config) -> Prelauncher:
+        prelauncher = Prelauncher({'enabled': True, 'delay_seconds': 0, 'retry_seconds': 0.05, **config})
+        self.addCleanup(prelauncher.shutdown)
+        self.launches = []
+        prelauncher.launch_requested.connect(lambda: self.launches.append(True))
+        return prelauncher
+
+    def run_until(self, predicate, timeout: float = 5) -> bool:
+        deadline = time.monotonic() + timeout
+        while not predicate() and time.monotonic() < deadline:
+            loop = QEventLoop()
+            timer = QTimer()
+            timer.timeout.connect(loop.quit)
+            timer.start(10)
+            loop.exec()
+            timer.stop()
+        return predicate()
+
+    def start_idle_process(self) -> subprocess.Popen:
+        process = subprocess.Popen(['sleep', '30'])
+        self.addCleanup(process.wait)
+        self.addCleanup(process.kill)
+        return process
+
+    @patch('proton_mail_tray.prelaunch.has_window_control', return_value=True)
+    @patch('proton_mail_tray.prelaunch.psutil.cpu_percent', return_value=5.0)
+    def test_launch_when_idle(self, cpu_percent, window_control):
+        """Test that a launch is requested once the system is idle with enough memory."""
+        prelauncher = self.make_prelauncher(min_available_mb=1)
+
+        prelauncher.schedule()
+
+        self.assertTrue(self.run_until(lambda: self.launches))
+
+    @patch('proton_mail_tray.prelaunch.has_window_control', return_value=True)
+    @patch('proton_mail_tray.prelaunch.psutil.cpu_percent', return_value=5.0)
+    def test_memory_floor(self, cpu_percent, window_control):
+        """Test that nothing is launched below the memory floor, and that the check is retried until cancelled."""
+        prelauncher = self.make_prelauncher(min_available_mb=1024 ** 3)
+
+        prelauncher.schedule()
+
+        self.assertTrue(self.run_until(lambda: cpu_percent.call_count >= 2))
+        prelauncher.cancel()
+        self.assertFalse(self.launches)
+
+    def test_disabled(self):
+        """Test that nothing is scheduled unless pre-launching is enabled."""
+        prelauncher = Prelauncher()
+        self.addCleanup(prelauncher.shutdown)
+
+        prelauncher.schedule()
+
+        self.assertFalse(prelauncher._timer.isActive())
+
+    @patch('proton_mail_tray.prelaunch.has_window_control', return_value=False)
+    def test_not_scheduled_without_window_control(self, window_control):
+        """Test that nothing is pre-launched when its windows could not be kept hidden."""
+        prelauncher = self.make_prelauncher()
+
+        with self.assertLogs('proton_mail_tray.prelaunch', 'INFO'):
+            prelauncher.schedule()
+
+        self.assertFalse(prelauncher._timer.isActive())
+
+    @patch('proton_mail_tray.prelaunch.set_windows_mapped')
+    @patch('proton_mail_tray.prelaunch.find_windows')
+    def test_windows_hidden_while_settling(self, find_windows, set_windows_mapped):
+        """Test that windows are unmapped as soon as they appear, and mapped again when interrupted."""
+        prelauncher = self.make_prelauncher(settle_seconds=30)
+        process = self.start_idle_process()
+        windows = []
+        find_windows.side_effect = lambda pid: list(windows)
+
+        results = []
+        thread = threading.Thread(target=lambda: results.append(prelauncher.wait_until_settled(process.pid)))
+        thread.start()
+        windows.append('0x1')
+        deadline = time.monotonic() + 5
+        while not set_windows_mapped.called and time.monotonic() < deadline:
+            time.sleep(0.01)
+        set_windows_mapped.assert_called_with(['0x1'], False)
+        self.assertEqual(prelauncher.hidden_windows, ['0x1'])
+
+        prelauncher.interrupt()
+        thread.join(5)
+        self.assertEqual(results, [False])
+        set_windows_mapped.assert_called_with(['0x1'], True)
+        self.assertEqual(prelauncher.hidden_windows, [])
+
+    def test_wait_until_settled(self):
+        """Test that an idle process settles after settle_seconds, and an exited one does not."""
+        prelauncher = self.make_prelauncher(settle_seconds=0.5)
+        process = self.start_idle_process()
+
+        start = time.monotonic()
+        self.assertTrue(prelauncher.wait_until_settled(process.pid))
+        self.assertGreaterEqual(time.monotonic() - start, 0.5)
+
+        process.kill()
+        process.wait()
+        self.assertFalse(prelauncher.wait_until_settled(process.pid))
+
+    def test_interrupt_while_settling(self):
+        """Test that a click while settling keeps the process running."""
+        prelauncher = self.make_prelauncher(settle_seconds=30)
+        process = self.start_idle_process()
+        self.assertFalse(prelauncher.interrupt())
+
+        results = []
+        thread = threading.Thread(target=lambda: results.append(prelauncher.wait_until_settled(process.pid)))
+        thread.start()
+        deadline = time.monotonic() + 5
+        while not prelauncher.settling and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+        self.assertTrue(prelauncher.interrupt())
+        thread.join(5)
+        self.assertEqual(results, [False])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,119 @@
+import os
+import sys
+import tempfile
+import time
+import unittest
+
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+from PySide6.QtCore import QCoreApplication, QEventLoop, QTimer
+from PySide6.QtWidgets import QApplication
+
+base_path = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(base_path)
+
+from proton_mail_tray.prewarm import (CHUNK_SIZE, Prewarmer, advise_files,
+                                      largest_files,
+                                      read_available_memory_percent,
+                                      read_memory_pressure)
+
+
+def write_file(path: str, size: int) -> str:
+    with open(path, 'wb') as f:
+        f.truncate(size)
+    return path
+
+
+class TestPrewarmHelpers(unittest.TestCase):
+    """Test the pre-warming helpers."""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp_dir.cleanup)
+        self.root = self.tmp_dir.name
+
+    def test_largest_files_within_limit(self):
+        """Test that the largest files are chosen first, skipping those that no longer fit, and symlinks."""
+        os.makedirs(os.path.join(self.root, 'resources'))
+        big = write_file(os.path.join(self.root, 'Proton Mail Beta'), 600)
+        asar = write_file(os.path.join(self.root, 'resources', 'app.asar'), 500)
+        small = write_file(os.path.join(self.root, 'resources', 'locale.pak'), 100)
+        os.symlink(big, os.path.join(self.root, 'link'))
+
+        self.assertEqual(largest_files(self.root, 1000), [(big, 600), (small, 100)])
+        self.assertEqual(largest_files(self.root, 10000), [(big, 600), (asar, 500), (small, 100)])
+
+    def test_advise_files(self):
+        """Test that every chunk is advised until should_stop gives a reason."""
+        first = write_file(os.path.join(self.root, 'first'), CHUNK_SIZE + 1)
+        second = write_file(os.path.join(self.root, 'second'), 10)
+        files = [(first, CHUNK_SIZE + 1), (second, 10)]
+
+        result = advise_files(files, lambda: None)
+        self.assertEqual((result.files, result.size, result.stopped), (2, CHUNK_SIZE + 11, None))
+
+        reasons = iter([None, 'memory pressure'])
+        result = advise_files(files, lambda: next(reasons))
+        self.assertEqual((result.files, result.size, result.stopped), (0, CHUNK_SIZE, 'memory pressure'))
+
+    def test_read_memory(self):
+        """Test reading memory pressure and available memory from procfs."""
+        os.makedirs(os.path.join(self.root, 'pressure'))
+        with open(os.path.join(self.root, 'pressure', 'memory'), 'w') as f:
+            f.write("some avg10=12.50 avg60=3.00 avg300=1.00 total=100\n"
+                    "full avg10=1.00 avg60=0.00 avg300=0.00 total=10\n")
+        with open(os.path.join(self.root, 'meminfo'), 'w') as f:
+            f.write("MemTotal:       16000000 kB\nMemFree:         1000000 kB\nMemAvailable:    4000000 kB\n")
+
+        self.assertEqual(read_memory_pressure(self.root), 12.5)
+        self.assertEqual(read_available_memory_percent(self.root), 25.0)
+        self.assertIsNone(read_memory_pressure(os.path.join(self.root, 'missing')))
+
+
+class TestPrewarmer(unittest.TestCase):
+    """Test the Prewarmer class."""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.app = QCoreApplication.instance() or QApplication([])
+
+    def run_until(self, predicate, timeout: float = 5) -> bool:
+        deadline = time.monotonic() + timeout
+        while not predicate() and time.monotonic() < deadline:
+            loop = QEventLoop()
+            timer = QTimer()
+            timer.timeout.connect(loop.quit)
+            timer.start(10)
+            loop.exec()
+            timer.stop()
+        return predicate()
+
+    def test_prewarm_install(self):
+        """Test that a scheduled run advises the install directory of the executable."""
+        with tempfile.TemporaryDirectory() as install:
+            executable = write_file(os.path.join(install, 'Proton Mail Beta'), 4096)
+            write_file(os.path.join(install, 'app.asar'), 1024)
+            prewarmer = Prewarmer({'enabled': True, 'delay_seconds': 0, 'max_memory_pressure': 100,
+                                   'min_available_percent': 0})
+            self.addCleanup(prewarmer.shutdown)
+            results = []
+            prewarmer.finished.connect(results.append)
+
+            prewarmer.schedule(executable)
+
+            self.assertTrue(self.run_until(lambda: results))
+            self.assertEqual((results[0].files, results[0].size, results[0].stopped), (2, 5120, None))
+            self.assertTrue(prewarmer.prewarmed)
+
+    def test_disabled(self):
+        """Test that nothing is scheduled unless pre-warming is enabled."""
+        prewarmer = Prewarmer()
+        self.addCleanup(prewarmer.shutdown)
+
+        prewarmer.schedule('/usr/lib/proton-mail/Proton Mail Beta')
+
+        self.assertFalse(prewarmer._timer.isActive())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,149 @@
+import json
+import os
+import pstats
+import sys
+import tempfile
+import threading
+import unittest
+
+base_path = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(base_path)
+
+from proton_mail_tray import profiling
+from proton_mail_tray.profiling import (Histogram, ProfileCapture, dump_stats,
+                                        get_stats, load_spans, record,
+                                        reset_stats, save_spans, span, timed)
+
+
+class TestHistogram(unittest.TestCase):
+    """Test the Histogram class."""
+
+    def test_snapshot(self):
+        """Test the count, percentiles and max of a set of timings."""
+        histogram = Histogram()
+        for ms in range(1, 101):
+            histogram.add(ms / 1000)
+
+        self.assertEqual(histogram.snapshot(), {'count': 100, 'mean_ms': 50.5, 'p50_ms': 51.0, 'p99_ms': 100.0,
+                                                'max_ms': 100.0})
+
+    def test_reservoir(self):
+        """Test that percentiles use the most recent samples while the count and max cover all of them."""
+        histogram = Histogram(size=10)
+        histogram.add(5.0)
+        for _ in range(10):
+            histogram.add(0.001)
+
+        snapshot = histogram.snapshot()
+        self.assertEqual(snapshot['count'], 11)
+        self.assertEqual(snapshot['p99_ms'], 1.0)
+        self.assertEqual(snapshot['max_ms'], 5000.0)
+
+    def test_empty(self):
+        """Test the snapshot of a histogram without timings."""
+        self.assertEqual(Histogram().snapshot()['p50_ms'], 0.0)
+
+
+class TestSpans(unittest.TestCase):
+    """Test the span, timed and record functions."""
+
+    def setUp(self):
+        reset_stats()
+        self.addCleanup(reset_stats)
+
+    def test_span_and_timed(self):
+        """Test that spans are recorded, including when the block raises."""
+        @timed('decorated')
+        def decorated(value):
+            return value * 2
+
+        self.assertEqual(decorated(2), 4)
+        with self.assertRaises(ValueError):
+            with span('block'):
+                raise ValueError()
+
+        stats = get_stats()
+        self.assertEqual(stats['decorated']['count'], 1)
+        self.assertEqual(stats['block']['count'], 1)
+        self.assertEqual(decorated.__name__, 'decorated')
+
+    def test_threads(self):
+        """Test that spans recorded from several threads are all counted."""
+        threads = [threading.Thread(target=lambda: [record('worker', 0.001) for _ in range(1000)]) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(get_stats()['worker']['count'], 4000)
+
+    def test_dump_stats(self):
+        """Test that the stats are written as JSON."""
+        record('scan', 0.002)
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, 'stats.json')
+            dump_stats(path)
+            with open(path) as f:
+                self.assertEqual(json.load(f)['scan']['p50_ms'], 2.0)
+
+    def test_save_and_load_spans(self):
+        """Test that spans with a prefix survive a restart and keep counting."""
+        record('ready.cold', 2.0)
+        record('ready.cold', 4.0)
+        record('click', 0.001)
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, 'latency.json')
+            save_spans(path, 'ready.')
+            reset_stats()
+
+            record('ready.cold', 3.0)
+            self.assertEqual(load_spans(path, 'ready.'), 1)
+            self.assertEqual(load_spans(os.path.join(tmp_dir, 'missing.json'), 'ready.'), 0)
+
+        stats = get_stats()
+        self.assertNotIn('click', stats)
+        self.assertEqual(stats['ready.cold']['count'], 3)
+        self.assertEqual(stats['ready.cold']['p50_ms'], 3000.0)
+        self.assertEqual(stats['ready.cold']['max_ms'], 4000.0)
+
+
+class TestProfileCapture(unittest.TestCase):
+    """Test the ProfileCapture class."""
+
+    def setUp(self):
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        self.output_dir = tmp_dir.name
+
+    def test_cprofile(self):
+        """Test that a cProfile capture can be loaded by pstats."""
+        capture = ProfileCapture('cprofile', self.output_dir)
+        capture.start()
+        sorted(range(1000), reverse=True)
+        path = capture.stop()
+
+        self.assertTrue(path.endswith('.prof'))
+        self.assertGreater(pstats.Stats(path).total_calls, 0)
+
+    def test_tracemalloc(self):
+        """Test that a tracemalloc capture lists allocation sites and stops tracing."""
+        capture = ProfileCapture('tracemalloc', self.output_dir)
+        capture.start()
+        data = [bytearray(1024) for _ in range(100)]
+        path = capture.stop()
+
+        with open(path) as f:
+            report = f.read()
+        self.assertIn('Traced memory', report)
+        self.assertIn('test_profiling.py', report)
+        self.assertFalse(profiling.tracemalloc.is_tracing())
+        del data
+
+    def test_unknown_kind(self):
+        """Test that an unknown profile kind is rejected."""
+        with self.assertRaises(ValueError):
+            ProfileCapture('perf', self.output_dir)
+
+
+if __name__ == '__main__':
+    unittest.main()
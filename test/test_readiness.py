@@ -0,0 +1,112 @@
+import os
+import subprocess
+import sys
+import threading
+import time
+import unittest
+
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+from PySide6.QtCore import QCoreApplication, QEventLoop, QTimer
+from PySide6.QtWidgets import QApplication
+
+base_path = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(base_path)
+
+from proton_mail_tray.profiling import get_stats, reset_stats
+from proton_mail_tray.readiness import ReadinessDetector, wait_until_ready
+
+
+class TestWaitUntilReady(unittest.TestCase):
+    """Test the wait_until_ready function."""
+
+    def start_process(self, *args: str) -> subprocess.Popen:
+        process = subprocess.Popen(list(args))
+        self.addCleanup(process.wait)
+        self.addCleanup(process.kill)
+        return process
+
+    def test_settled(self):
+        """Test that a quiet process is ready from the start of its quiet period."""
+        process = self.start_process('sleep', '30')
+
+        start = time.monotonic()
+        how, ready_at = wait_until_ready(process.pid, threading.Event(), settle_seconds=0.3, check_windows=False,
+                                         poll_seconds=0.05)
+
+        self.assertEqual(how, 'settled')
+        self.assertLess(ready_at - start, time.monotonic() - start - 0.2)
+
+    def test_busy_process_times_out(self):
+        """Test that a process that keeps using CPU is only ready after the timeout."""
+        process = self.start_process(sys.executable, '-c', 'while True: pass')
+
+        how, _ = wait_until_ready(process.pid, threading.Event(), settle_seconds=0.2, timeout=0.5,
+                                  check_windows=False, poll_seconds=0.05)
+
+        self.assertEqual(how, 'timeout')
+
+    def test_exited_or_stopped(self):
+        """Test that waiting ends without readiness when the process exits or the wait is stopped."""
+        process = self.start_process('sleep', '30')
+        stop = threading.Event()
+        stop.set()
+        self.assertIsNone(wait_until_ready(process.pid, stop, check_windows=False)[0])
+
+        process.kill()
+        process.wait()
+        self.assertIsNone(wait_until_ready(process.pid, threading.Event(), check_windows=False,
+                                           poll_seconds=0.05)[0])
+
+
+class TestReadinessDetector(unittest.TestCase):
+    """Test the ReadinessDetector class."""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.app = QCoreApplication.instance() or QApplication([])
+
+    def setUp(self):
+        reset_stats()
+        self.addCleanup(reset_stats)
+        self.process = subprocess.Popen(['sleep', '30'])
+        self.addCleanup(self.process.wait)
+        self.addCleanup(self.process.kill)
+        self.detector = ReadinessDetector(settle_seconds=0.3)
+        self.addCleanup(self.detector.shutdown)
+        self.ready = []
+        self.detector.ready.connect(lambda pid, how, seconds: self.ready.append((pid, how)))
+
+    def run_until(self, predicate, timeout: float = 5) -> bool:
+        deadline = time.monotonic() + timeout
+        while not predicate() and time.monotonic() < deadline:
+            loop = QEventLoop()
+            timer = QTimer()
+            timer.timeout.connect(loop.quit)
+            timer.start(10)
+            loop.exec()
+            timer.stop()
+        return predicate()
+
+    def test_ready_records_latency(self):
+        """Test that readiness is signalled and the click-to-ready latency recorded."""
+        self.detector.watch(self.process.pid, time.monotonic() - 1, 'cold')
+        self.assertTrue(self.detector.waiting)
+
+        self.assertTrue(self.run_until(lambda: self.ready))
+        self.assertEqual(self.ready[0][0], self.process.pid)
+        self.assertFalse(self.detector.waiting)
+        self.assertGreaterEqual(get_stats()['ready.cold']['p50_ms'], 1000)
+
+    def test_cancel(self):
+        """Test that a cancelled watch reports nothing."""
+        self.detector.watch(self.process.pid, time.monotonic(), 'cold')
+        self.detector.cancel()
+
+        self.run_until(lambda: self.ready, timeout=1)
+        self.assertEqual(self.ready, [])
+        self.assertNotIn('ready.cold', get_stats())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,60 @@
+import os
+import subprocess
+import sys
+import unittest
+
+base_path = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(base_path)
+
+# Self time of our own modules when importing proton_mail_tray.app, about 30 ms on a developer machine
+IMPORT_BUDGET_MS = 100
+
+
+def import_times(module: str) -> dict:
+    """Import a module in a fresh interpreter with -X importtime.
+
+    Args:
+        module (str): The module to import.
+
+    Returns:
+        dict: The self time in microseconds of every module imported, keyed by name.
+    """
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {module}'], cwd=base_path,
+                            capture_output=True, text=True, check=True)
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, _, name = line[len('import time:'):].split('|')
+        times[name.strip()] = int(self_us)
+    return times
+
+
+class TestImportTime(unittest.TestCase):
+    """Test that the modules needed to show the tray icon import quickly."""
+
+    def test_app_defers_heavy_imports(self):
+        """Test that process management and the control server are not imported before the icon is shown."""
+        times = import_times('proton_mail_tray.app')
+
+        for module in ('psutil', 'proton_mail_tray.utils', 'proton_mail_tray.config', 'proton_mail_tray.discovery',
+                       'PySide6.QtNetwork', 'tracemalloc'):
+            self.assertNotIn(module, times)
+
+    def test_app_import_budget(self):
+        """Test that our own modules stay within the import time budget."""
+        times = import_times('proton_mail_tray.app')
+
+        own_ms = sum(us for name, us in times.items() if name.startswith('proton_mail_tray')) / 1000
+        self.assertLess(own_ms, IMPORT_BUDGET_MS)
+
+    def test_cli_does_not_import_qt(self):
+        """Test that commands sent to a running tray do not pay for Qt or psutil."""
+        times = import_times('proton_mail_tray.cli')
+
+        self.assertFalse([name for name in times if name.startswith('PySide6')])
+        self.assertNotIn('psutil', times)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,90 @@
+import os
+import subprocess
+import sys
+import time
+import unittest
+
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+from PySide6.QtCore import QCoreApplication
+from PySide6.QtWidgets import QApplication
+
+base_path = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(base_path)
+
+from proton_mail_tray.telemetry import (MAX_INTERVAL_MS, MIN_INTERVAL_MS,
+                                        StatsSampler, TreeSample, TreeSampler,
+                                        format_bytes)
+
+
+class TestTreeSampler(unittest.TestCase):
+    """Test the TreeSampler class."""
+
+    def setUp(self):
+        # A parent with one busy child and one idle child
+        self.process = subprocess.Popen(['sh', '-c', 'while :; do :; done & sleep 30 & wait'])
+        time.sleep(0.2)
+
+    def tearDown(self):
+        subprocess.run(['pkill', '-KILL', '-P', str(self.process.pid)])
+        self.process.kill()
+        self.process.wait()
+
+    def test_sample_tree(self):
+        """Test that the whole tree is aggregated and CPU use is measured between samples."""
+        sampler = TreeSampler()
+
+        first = sampler.sample(self.process.pid)
+        time.sleep(0.3)
+        second = sampler.sample(self.process.pid)
+
+        self.assertEqual(first.processes, 3)
+        self.assertIsNone(first.cpu_percent)
+        self.assertGreaterEqual(second.threads, 3)
+        self.assertGreater(second.rss, 0)
+        self.assertGreater(second.cpu_percent, 20)
+
+    def test_sample_missing_process(self):
+        """Test that sampling a process that does not exist returns None."""
+        self.assertIsNone(TreeSampler().sample(2 ** 22 + 1))
+
+
+class TestStatsSampler(unittest.TestCase):
+    """Test the adaptive interval of the StatsSampler class."""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.app = QCoreApplication.instance() or QApplication([])
+
+    def make_sample(self, rss, cpu_percent):
+        return TreeSample(1, time.monotonic(), 1, 1, rss, None, cpu_percent)
+
+    def test_interval_backs_off_while_stable(self):
+        """Test that stable readings double the interval and a change resets it."""
+        stats = StatsSampler()
+        stats.set_pid(1)
+        stats._running = True
+
+        stats._on_sample_ready(self.make_sample(100 * 2 ** 20, 1.0))
+        for _ in range(5):
+            stats._on_sample_ready(self.make_sample(100 * 2 ** 20, 1.0))
+        self.assertEqual(stats._interval_ms, MAX_INTERVAL_MS)
+
+        stats._on_sample_ready(self.make_sample(200 * 2 ** 20, 1.0))
+        self.assertEqual(stats._interval_ms, MIN_INTERVAL_MS)
+        stats.shutdown()
+        self.assertFalse(stats.active)
+
+
+class TestFormatBytes(unittest.TestCase):
+    """Test the format_bytes function."""
+
+    def test_format_bytes(self):
+        """Test formatting sizes in MB and GB."""
+        self.assertEqual(format_bytes(512 * 2 ** 20), "512 MB")
+        self.assertEqual(format_bytes(3 * 2 ** 30), "3.00 GB")
+        self.assertEqual(format_bytes(None), "n/a")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,126 @@
+import os
+import subprocess
+import sys
+import time
+import unittest
+
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+import psutil
+from PySide6.QtCore import QCoreApplication, QEventLoop, QTimer
+from PySide6.QtWidgets import QApplication
+
+base_path = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(base_path)
+
+from proton_mail_tray.monitor import SubprocessMonitor
+from proton_mail_tray.telemetry import TreeSample
+from proton_mail_tray.throttle import CpuThrottler
+from proton_mail_tray.utils import is_process_frozen
+
+
+def make_sample(pid: int, cpu_percent: float) -> TreeSample:
+    return TreeSample(pid, time.monotonic(), 1, 1, 1024, None, cpu_percent)
+
+
+class TestCpuThrottler(unittest.TestCase):
+    """Test the CpuThrottler class."""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.app = QCoreApplication.instance() or QApplication([])
+
+    def setUp(self):
+        self.process = subprocess.Popen(['sleep', '30'])
+        self.addCleanup(self.process.wait)
+        self.addCleanup(self.process.kill)
+        self.pid = self.process.pid
+
+    def make_throttler(self, **config) -> CpuThrottler:
+        self.monitor = SubprocessMonitor()
+        throttler = CpuThrottler(self.monitor, {'enabled': True, 'cpu_percent': 30, 'sustained_seconds': 0,
+                                                'escalate_after_seconds': 0, 'when': 'always',
+                                                'duty_cycle_period_seconds': 0.2, **config})
+        throttler.set_pid(self.pid)
+        self.restarts = []
+        throttler.restart_requested.connect(lambda pid, sample: self.restarts.append(pid))
+        self.addCleanup(throttler.shutdown)
+        return throttler
+
+    def run_until(self, predicate, timeout: float = 5) -> bool:
+        deadline = time.monotonic() + timeout
+        while not predicate() and time.monotonic() < deadline:
+            loop = QEventLoop()
+            timer = QTimer()
+            timer.timeout.connect(loop.quit)
+            timer.start(10)
+            loop.exec()
+            timer.stop()
+        return predicate()
+
+    def test_escalation(self):
+        """Test that the remedies are applied in turn and the reclaimed CPU is logged."""
+        throttler = self.make_throttler(nice=7)
+
+        with self.assertLogs('proton_mail_tray.throttle', 'INFO') as logs:
+            throttler._on_sample_ready(make_sample(self.pid, 80.0), None)
+            self.assertEqual(throttler.level, 1)
+            self.assertEqual(psutil.Process(self.pid).nice(), 7)
+
+            throttler._on_sample_ready(make_sample(self.pid, 60.0), None)
+            self.assertEqual(throttler.level, 2)
+            self.assertTrue(self.run_until(lambda: is_process_frozen(self.pid)))
+            self.assertTrue(self.run_until(lambda: not is_process_frozen(self.pid)))
+
+            throttler._on_sample_ready(make_sample(self.pid, 15.0), None)  # still 60% unthrottled
+            self.assertEqual(self.restarts, [self.pid])
+            self.assertFalse(is_process_frozen(self.pid))
+
+        self.assertTrue(any("(renice): CPU 80% -> 60%, reclaimed 20%" in line for line in logs.output))
+        self.assertTrue(any("(duty cycle): CPU 60% -> 15%, reclaimed 45%" in line for line in logs.output))
+
+    def test_sustained_window(self):
+        """Test that nothing is done until the CPU use has been high for the whole window."""
+        throttler = self.make_throttler(sustained_seconds=60)
+
+        throttler._on_sample_ready(make_sample(self.pid, 80.0), None)
+        throttler._on_sample_ready(make_sample(self.pid, 80.0), None)
+
+        self.assertEqual(throttler.level, 0)
+
+    def test_release_when_idle_or_shown(self):
+        """Test that the duty cycle is lifted when the CPU use drops or a window is shown."""
+        throttler = self.make_throttler(when='hidden', restart=False)
+
+        throttler._on_sample_ready(make_sample(self.pid, 80.0), [])
+        throttler._on_sample_ready(make_sample(self.pid, 80.0), [])
+        self.assertEqual(throttler.level, 2)
+        throttler._on_sample_ready(make_sample(self.pid, 80.0), [])
+        self.assertEqual(throttler.level, 2)  # no restart
+
+        throttler._on_sample_ready(make_sample(self.pid, 5.0), [])
+        self.assertEqual(throttler.level, 0)
+        self.assertFalse(is_process_frozen(self.pid))
+
+        throttler._on_sample_ready(make_sample(self.pid, 80.0), [])
+        self.assertEqual(throttler.level, 1)
+        throttler._on_sample_ready(make_sample(self.pid, 80.0), ['0x1'])
+        self.assertEqual(throttler.level, 0)
+
+    def test_hidden_needs_window_control(self):
+        """Test that with when set to 'hidden', nothing is done when windows cannot be inspected."""
+        throttler = self.make_throttler(when='hidden')
+
+        throttler._on_sample_ready(make_sample(self.pid, 80.0), None)
+
+        self.assertEqual(throttler.level, 0)
+
+    def test_disabled(self):
+        """Test that a disabled throttler does not sample."""
+        throttler = self.make_throttler(enabled=False)
+
+        self.assertFalse(throttler._timer.isActive())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,98 +1,242 @@
 import os
+import subprocess
 import sys
+import tempfile
+import time
 import unittest
-from unittest.mock import MagicMock, patch
+from unittest.mock import patch
 
 import psutil
 
 base_path = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
 sys.path.append(base_path)
 
-from proton_mail_tray.utils import (find_proton_mail_path,
-                                    is_proton_mail_running, terminate_process)
-
-
-class TestFindProtonMailPath(unittest.TestCase):
-    """Test the find_proton_mail_path function."""
-
-    @patch('proton_mail_tray.utils.os.path.exists')
-    def test_find_proton_mail_path_exists(self, mock_exists):
-        """Test when Proton Mail is found at one of the paths."""
-        mock_exists.side_effect = lambda path: path == "/usr/lib/proton-mail/Proton Mail Beta"
-
-        result = find_proton_mail_path()
-        self.assertEqual(result, "/usr/lib/proton-mail/Proton Mail Beta")
-
-    @patch('proton_mail_tray.utils.os.path.exists')
-    def test_find_proton_mail_path_not_exists(self, mock_exists):
-        """Test when Proton Mail is not found at any of the paths."""
-        mock_exists.return_value = False
-
-        result = find_proton_mail_path()
-        self.assertIsNone(result)
+from proton_mail_tray.targets import Target
+from proton_mail_tray.utils import (ProcessCache, find_processes,
+                                    is_proton_mail_running, process_cache,
+                                    process_tree_pids, read_proc_stat,
+                                    scan_processes, terminate_process)
 
 
 class TestIsProtonMailRunning(unittest.TestCase):
     """Test the is_proton_mail_running function."""
 
-    @patch('proton_mail_tray.utils.psutil.process_iter')
-    def test_proton_mail_running(self, mock_process_iter):
+    def setUp(self):
+        process_cache.invalidate()
+
+    @patch('proton_mail_tray.utils.scan_processes')
+    def test_proton_mail_running(self, mock_scan):
         """Test when Proton Mail is running."""
-        mock_proc = MagicMock()
-        mock_proc.info = {'name': 'Proton Mail Beta', 'pid': 1337}
-        mock_process_iter.return_value = [mock_proc]
+        mock_scan.return_value = {'proton-mail': 1337}
 
         pid = is_proton_mail_running()
         self.assertEqual(pid, 1337)
 
-    @patch('proton_mail_tray.utils.psutil.process_iter')
-    def test_proton_mail_not_running(self, mock_process_iter):
+    @patch('proton_mail_tray.utils.scan_processes')
+    def test_proton_mail_not_running(self, mock_scan):
         """Test when Proton Mail is not running."""
-        mock_process_iter.return_value = []
+        mock_scan.return_value = {'proton-mail': None}
 
         pid = is_proton_mail_running()
         self.assertIsNone(pid)
 
-    @patch('proton_mail_tray.utils.psutil.process_iter')
-    def test_access_denied(self, mock_process_iter):
-        """Test when AccessDenied is raised while checking the process."""
-        mock_proc = MagicMock()
-        mock_proc.info = {'name': 'SomeProcess', 'pid': 1337}
-        mock_process_iter.return_value = [mock_proc]
-        with patch('proton_mail_tray.utils.psutil.Process', side_effect=psutil.AccessDenied):
-            pid = is_proton_mail_running()
-            self.assertIsNone(pid)
+    @patch('proton_mail_tray.utils.scan_processes')
+    def test_cached_pid_skips_scan(self, mock_scan):
+        """Test that a validated cached PID is returned without scanning the process table."""
+        mock_scan.return_value = {'proton-mail': os.getpid()}
 
+        self.assertEqual(is_proton_mail_running(), os.getpid())
+        self.assertEqual(is_proton_mail_running(), os.getpid())
+        mock_scan.assert_called_once()
 
-class TestTerminateProcess(unittest.TestCase):
-    """Test the terminate_process function."""
-    # TODO: expand testing
 
-    @patch('proton_mail_tray.utils.psutil')
-    def test_normal_termination(self, mock_psutil):
-        """Test when the process terminates normally."""
-        mock_process = MagicMock()
-        mock_process.children.return_value = []
-        mock_psutil.TimeoutExpired = psutil.TimeoutExpired
+class TestFindProcesses(unittest.TestCase):
+    """Test the find_processes function."""
+
+    def setUp(self):
+        process_cache.invalidate()
+
+    @patch('proton_mail_tray.utils.scan_processes')
+    def test_only_misses_are_scanned(self, mock_scan):
+        """Test that cached targets are not rescanned and the rest share one scan."""
+        targets = [Target('a', 'A', 'a'), Target('b', 'B', 'b'), Target('c', 'C', 'c')]
+        process_cache.store('a', os.getpid())
+        mock_scan.return_value = {'b': 42, 'c': None}
+
+        pids = find_processes(targets)
+
+        self.assertEqual(pids, {'a': os.getpid(), 'b': 42, 'c': None})
+        mock_scan.assert_called_once_with(targets[1:])
+
+
+class TestScanProcesses(unittest.TestCase):
+    """Test the scan_processes function against a fake /proc."""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.proc_root = self.tmp_dir.name
+        os.mkdir(os.path.join(self.proc_root, 'self'))
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
 
-        terminate_process(mock_process)
+    def add_process(self, pid, ppid, comm):
+        """Add a fake process entry."""
+        path = os.path.join(self.proc_root, str(pid))
+        os.mkdir(path)
+        with open(os.path.join(path, 'comm'), 'w') as f:
+            f.write(comm + '\n')
+        with open(os.path.join(path, 'stat'), 'w') as f:
+            f.write(f"{pid} ({comm}) S {ppid} " + " ".join(['0'] * 17) + " 1000 0\n")
 
-        mock_process.terminate.assert_called_once()
-        mock_process.wait.assert_called_once_with(timeout=5)
+    def test_resolves_all_targets(self):
+        """Test that every target is resolved and the Electron parent is preferred over its children."""
+        self.add_process(1, 0, 'systemd')
+        self.add_process(50, 1, 'Proton Mail Bet')
+        self.add_process(40, 50, 'Proton Mail Bet')
+        self.add_process(60, 1, 'Proton Pass')
+        targets = [Target('proton-mail', 'Proton Mail', 'Proton Mail Beta'),
+                   Target('proton-pass', 'Proton Pass', 'Proton Pass'),
+                   Target('proton-vpn', 'Proton VPN', 'protonvpn-app')]
 
+        pids = scan_processes(targets, self.proc_root)
 
-    @patch('proton_mail_tray.utils.psutil')
-    def test_process_timeout(self, mock_psutil):
-        """Test when the process does not terminate in time."""
-        mock_process = MagicMock()
-        mock_process.children.return_value = []
-        mock_process.wait.side_effect = psutil.TimeoutExpired(seconds=6)
-        mock_psutil.TimeoutExpired = psutil.TimeoutExpired
+        self.assertEqual(pids, {'proton-mail': 50, 'proton-pass': 60, 'proton-vpn': None})
 
-        terminate_process(mock_process)
+    def test_read_proc_stat(self):
+        """Test reading a stat line whose comm contains spaces and parentheses."""
+        self.add_process(70, 1, 'a) b (c')
 
-        mock_process.terminate.assert_called_once()
-        mock_process.kill.assert_called_once()  # kill in except
+        self.assertEqual(read_proc_stat(70, self.proc_root), ('S', 1, 1000))
+        self.assertIsNone(read_proc_stat(71, self.proc_root))
+
+
+class TestProcessTreePids(unittest.TestCase):
+    """Test the process_tree_pids function."""
+
+    def test_tree(self):
+        """Test that a process and its descendants are listed, root first."""
+        process = subprocess.Popen(['sh', '-c', 'sleep 30 & sleep 30 & wait'])
+        time.sleep(0.2)
+        try:
+            pids = process_tree_pids(process.pid)
+            children = [child.pid for child in psutil.Process(process.pid).children(recursive=True)]
+            self.assertEqual(pids[0], process.pid)
+            self.assertEqual(sorted(pids[1:]), sorted(children))
+            self.assertEqual(len(pids), 3)
+        finally:
+            subprocess.run(['pkill', '-KILL', '-P', str(process.pid)])
+            process.kill()
+            process.wait()
+
+    def test_missing_process(self):
+        """Test that a process that does not exist has an empty tree."""
+        self.assertEqual(process_tree_pids(2 ** 22 + 1), [])
+
+
+class TestProcessCache(unittest.TestCase):
+    """Test the ProcessCache class."""
+
+    def test_hit(self):
+        """Test that a live PID with a matching create time is a hit."""
+        cache = ProcessCache()
+        cache.store('proton-mail', os.getpid())
+
+        self.assertEqual(cache.lookup('proton-mail'), os.getpid())
+        self.assertEqual(cache.stats(), {'hits': 1, 'misses': 0})
+
+    def test_reused_pid(self):
+        """Test that a PID whose create time changed is a miss."""
+        cache = ProcessCache()
+        cache.store('proton-mail', os.getpid())
+        pid, create_time = cache.entries['proton-mail']
+        cache.entries['proton-mail'] = (pid, create_time - 1)
+
+        self.assertIsNone(cache.lookup('proton-mail'))
+        self.assertNotIn('proton-mail', cache.entries)
+        self.assertEqual(cache.stats(), {'hits': 0, 'misses': 1})
+
+    def test_invalidate_other_pid(self):
+        """Test that invalidating a different PID keeps the entry."""
+        cache = ProcessCache()
+        cache.store('proton-mail', os.getpid())
+
+        cache.invalidate(os.getpid() + 1)
+        self.assertIn('proton-mail', cache.entries)
+        cache.invalidate(os.getpid())
+        self.assertNotIn('proton-mail', cache.entries)
+
+
+class TestTerminateProcess(unittest.TestCase):
+    """Test the terminate_process function against a stub process tree."""
+
+    def start_tree(self, script: str, pass_fds: tuple = ()) -> psutil.Process:
+        """Start a shell process tree and wait for its children to appear."""
+        process = subprocess.Popen(['sh', '-c', script], pass_fds=pass_fds)
+        self.addCleanup(process.wait)
+        root = psutil.Process(process.pid)
+        deadline = time.monotonic() + 2
+        while len(root.children(recursive=True)) < 2 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.addCleanup(self.kill_all, [root] + root.children(recursive=True))
+        return root
+
+    @staticmethod
+    def kill_all(processes):
+        for process in processes:
+            try:
+                process.kill()
+            except psutil.NoSuchProcess:
+                pass
+
+    @staticmethod
+    def is_alive(process):
+        """Check whether a process is running, counting zombies waiting to be reaped as exited."""
+        try:
+            return process.status() != psutil.STATUS_ZOMBIE
+        except psutil.NoSuchProcess:
+            return False
+
+    def test_normal_termination(self):
+        """Test that the whole tree is terminated with SIGTERM."""
+        root = self.start_tree('sleep 30 & sleep 30 & wait')
+        tree = [root] + root.children(recursive=True)
+
+        report = terminate_process(root)
+
+        self.assertEqual(report.outcomes, {process.pid: 'terminated' for process in tree})
+        self.assertFalse(any(self.is_alive(process) for process in tree))
+        self.assertLess(report.elapsed, 2)
+
+    def test_process_timeout(self):
+        """Test that processes ignoring SIGTERM are killed at the single overall deadline."""
+        # The shell and its sleep ignore SIGTERM, the Python child restores the default handler and then says so
+        ready, write = os.pipe()
+        self.addCleanup(os.close, ready)
+        child = (f"{sys.executable} -c 'import os, signal, time; signal.signal(signal.SIGTERM, signal.SIG_DFL); "
+                 f"os.write({write}, b\".\"); time.sleep(30)'")
+        root = self.start_tree(f"trap '' TERM; {child} & sleep 30 & wait", pass_fds=(write,))
+        os.close(write)
+        os.read(ready, 1)
+        tree = [root] + root.children(recursive=True)
+        sleeper = next(process for process in tree if process.name() == 'sleep')
+        python = next(process for process in tree if process not in (root, sleeper))
+
+        report = terminate_process(root, timeout=0.5)
+
+        self.assertEqual(report.outcomes, {root.pid: 'killed', sleeper.pid: 'killed', python.pid: 'terminated'})
+        self.assertFalse(any(self.is_alive(process) for process in tree))
+        self.assertLess(report.elapsed, 2)
+
+    def test_process_already_gone(self):
+        """Test that a process that has already exited is reported as gone."""
+        process = subprocess.Popen(['true'])
+        stub = psutil.Process(process.pid)
+        process.wait()
+
+        report = terminate_process(stub)
+
+        self.assertEqual(report.outcomes, {process.pid: 'gone'})
 
 
 if __name__ == '__main__':
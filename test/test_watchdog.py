@@ -0,0 +1,104 @@
+import os
+import sys
+import time
+import unittest
+
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+from PySide6.QtCore import QCoreApplication
+from PySide6.QtWidgets import QApplication
+
+base_path = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(base_path)
+
+from proton_mail_tray.monitor import SubprocessMonitor
+from proton_mail_tray.telemetry import TreeSample
+from proton_mail_tray.watchdog import MemoryWatchdog
+
+GB = 1024 ** 3
+
+
+def make_sample(memory: int, cpu_percent: float = 0.0, pid: int = 1337) -> TreeSample:
+    return TreeSample(pid, time.monotonic(), 10, 100, memory, memory, cpu_percent)
+
+
+class TestMemoryWatchdog(unittest.TestCase):
+    """Test the MemoryWatchdog class."""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.app = QCoreApplication.instance() or QApplication([])
+
+    def make_watchdog(self, **config):
+        self.monitor = SubprocessMonitor()
+        watchdog = MemoryWatchdog(self.monitor, {'enabled': True, 'memory_limit_mb': 1024, **config})
+        watchdog.set_pid(1337)
+        self.restarts = []
+        watchdog.restart_requested.connect(lambda pid, sample: self.restarts.append(pid))
+        self.addCleanup(watchdog.shutdown)
+        return watchdog
+
+    def test_restart_after_sustained_window(self):
+        """Test that a restart is only requested once memory has been over the limit for the whole window."""
+        watchdog = self.make_watchdog(sustained_minutes=0.001, restart_when='immediately')
+
+        watchdog._on_sample_ready(make_sample(2 * GB), None)
+        self.assertEqual(self.restarts, [])
+        time.sleep(0.1)
+        watchdog._on_sample_ready(make_sample(2 * GB), None)
+        self.assertEqual(self.restarts, [1337])
+
+        watchdog._on_sample_ready(make_sample(2 * GB), None)
+        self.assertEqual(self.restarts, [1337])  # only once while pending
+
+    def test_dip_under_limit_resets_window(self):
+        """Test that dropping under the limit restarts the sustained window."""
+        watchdog = self.make_watchdog(sustained_minutes=0.001, restart_when='immediately')
+
+        watchdog._on_sample_ready(make_sample(2 * GB), None)
+        time.sleep(0.1)
+        watchdog._on_sample_ready(make_sample(GB // 2), None)
+        watchdog._on_sample_ready(make_sample(2 * GB), None)
+
+        self.assertEqual(self.restarts, [])
+
+    def test_wait_until_idle(self):
+        """Test that restart_when 'idle' waits for CPU use to drop."""
+        watchdog = self.make_watchdog(sustained_minutes=0, restart_when='idle')
+
+        watchdog._on_sample_ready(make_sample(2 * GB, cpu_percent=40.0), None)
+        self.assertEqual(self.restarts, [])
+        watchdog._on_sample_ready(make_sample(2 * GB, cpu_percent=0.5), None)
+        self.assertEqual(self.restarts, [1337])
+
+    def test_wait_until_hidden(self):
+        """Test that restart_when 'hidden' waits for the windows to be hidden."""
+        watchdog = self.make_watchdog(sustained_minutes=0, restart_when='hidden')
+
+        watchdog._on_sample_ready(make_sample(2 * GB), ['0x1'])
+        self.assertEqual(self.restarts, [])
+        watchdog._on_sample_ready(make_sample(2 * GB), [])
+        self.assertEqual(self.restarts, [1337])
+
+    def test_disabled(self):
+        """Test that a disabled watchdog does not sample."""
+        watchdog = self.make_watchdog(enabled=False)
+
+        self.assertFalse(watchdog._timer.isActive())
+
+    def test_configure(self):
+        """Test that new settings apply to a running watchdog."""
+        watchdog = self.make_watchdog(check_interval_seconds=60)
+        self.assertTrue(watchdog._timer.isActive())
+
+        watchdog.configure({'enabled': True, 'memory_limit_mb': 4096, 'check_interval_seconds': 5})
+        self.assertEqual(watchdog.memory_limit, 4 * GB)
+        self.assertEqual(watchdog._timer.interval(), 5000)
+        self.assertTrue(watchdog._timer.isActive())
+
+        watchdog.configure({'enabled': False})
+        self.assertFalse(watchdog._timer.isActive())
+
+
+if __name__ == '__main__':
+    unittest.main()